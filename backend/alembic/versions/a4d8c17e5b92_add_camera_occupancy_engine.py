@@ -0,0 +1,26 @@
+"""Add camera occupancy engine
+
+Revision ID: a4d8c17e5b92
+Revises: e3f91a5d2c47
+Create Date: 2026-10-17 11:26:07.734410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d8c17e5b92'
+down_revision: Union[str, None] = 'e3f91a5d2c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('cameras', sa.Column('occupancy_engine', sa.String(length=20), nullable=False, server_default='yolo'))
+
+
+def downgrade() -> None:
+    op.drop_column('cameras', 'occupancy_engine')
@@ -0,0 +1,80 @@
+"""Add slot geometry columns (area, bbox)
+
+Revision ID: b7e2c4a91f03
+Revises: d85313399ea6
+Create Date: 2026-10-17 09:12:40.118233
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c4a91f03'
+down_revision: Union[str, None] = 'd85313399ea6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _repair_polygon(points):
+    """
+    Points, area and bbox of a slot polygon repaired with make_valid (largest part kept)
+    Frozen copy of the repair at the time of this migration (no app imports)
+    """
+    import shapely
+    from shapely.geometry import Polygon
+
+    polygon = Polygon(points)
+    if not polygon.is_valid:
+        parts = [part for part in shapely.get_parts(shapely.make_valid(polygon)) if isinstance(part, Polygon)]
+        if not parts:
+            raise ValueError("polygon has no area")
+        polygon = max(parts, key=lambda part: part.area)
+
+    if polygon.is_empty or polygon.area <= 0:
+        raise ValueError("polygon has no area")
+
+    coords = [[float(x), float(y)] for x, y in polygon.exterior.coords[:-1]]
+    return coords, float(polygon.area), tuple(float(v) for v in polygon.bounds)
+
+
+def upgrade() -> None:
+    op.add_column('slots', sa.Column('area', sa.Float(), nullable=True))
+    op.add_column('slots', sa.Column('min_x', sa.Float(), nullable=True))
+    op.add_column('slots', sa.Column('min_y', sa.Float(), nullable=True))
+    op.add_column('slots', sa.Column('max_x', sa.Float(), nullable=True))
+    op.add_column('slots', sa.Column('max_y', sa.Float(), nullable=True))
+    op.create_index('ix_slots_camera_bbox', 'slots', ['camera_id', 'min_x', 'max_x', 'min_y', 'max_y'], unique=False)
+
+    # Backfill existing slots (repairing invalid polygons)
+    bind = op.get_bind()
+    slots = sa.table(
+        'slots',
+        sa.column('id', sa.Integer), sa.column('polygon', sa.JSON),
+        sa.column('area', sa.Float), sa.column('min_x', sa.Float), sa.column('min_y', sa.Float),
+        sa.column('max_x', sa.Float), sa.column('max_y', sa.Float)
+    )
+    for slot_id, polygon in bind.execute(sa.select(slots.c.id, slots.c.polygon)).all():
+        if isinstance(polygon, str):
+            polygon = json.loads(polygon)
+        try:
+            points, area, (min_x, min_y, max_x, max_y) = _repair_polygon(polygon)
+        except (TypeError, ValueError):
+            continue  # Left NULL: always kept as a candidate by the prefilter
+        bind.execute(
+            slots.update().where(slots.c.id == slot_id).values(
+                polygon=points, area=area, min_x=min_x, min_y=min_y, max_x=max_x, max_y=max_y
+            )
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_slots_camera_bbox', table_name='slots')
+    op.drop_column('slots', 'max_y')
+    op.drop_column('slots', 'max_x')
+    op.drop_column('slots', 'min_y')
+    op.drop_column('slots', 'min_x')
+    op.drop_column('slots', 'area')
@@ -0,0 +1,135 @@
+"""Partition detections/slot_events by time, add time-range indexes
+
+Revision ID: c5f2a8e61d34
+Revises: a4d8c17e5b92
+Create Date: 2026-10-17 12:41:52.906117
+
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f2a8e61d34'
+down_revision: Union[str, None] = 'a4d8c17e5b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Periods created ahead of today (the retention job keeps adding more)
+PARTITIONS_AHEAD = {"day": 7, "month": 2}
+
+# Time-partitioned tables at this revision: table -> (partition column, partition unit)
+PARTITIONED_TABLES = {
+    "detections": ("timestamp", "day"),
+    "slot_events": ("start_time", "month"),
+}
+
+
+# Partition DDL helpers frozen at this revision (no app imports)
+def _period_start(day, unit):
+    """First day of the period (day or month) containing day"""
+    return day.replace(day=1) if unit == "month" else day
+
+
+def _next_period(day, unit):
+    """First day of the period after the one starting at day"""
+    if unit == "month":
+        return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    return day + timedelta(days=1)
+
+
+def _partition_bounds(first_bound, until, unit):
+    """Upper bounds from first_bound (a period start) up to the first bound after until"""
+    bounds = [first_bound]
+    while bounds[-1] <= until:
+        bounds.append(_next_period(bounds[-1], unit))
+    return bounds
+
+
+def _partition_by_clause(column, bounds):
+    """PARTITION BY RANGE (TO_DAYS(column)) clause, rows before the first bound go to the first partition"""
+    parts = [
+        f"PARTITION p{bound:%Y%m%d} VALUES LESS THAN (TO_DAYS('{bound.isoformat()}'))"
+        for bound in bounds
+    ]
+    parts.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return f"PARTITION BY RANGE (TO_DAYS(`{column}`)) ({', '.join(parts)})"
+
+
+# Names of the unnamed SQLite foreign keys in batch mode
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def upgrade() -> None:
+    op.create_index('ix_detections_camera_time', 'detections', ['camera_id', 'timestamp'], unique=False)
+    op.create_index('ix_slot_events_slot_time', 'slot_events', ['slot_id', 'start_time'], unique=False)
+
+    # Same schema on every backend: no foreign keys (MySQL partitioned tables
+    # cannot have them) and a NOT NULL time column
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table, (column, _) in PARTITIONED_TABLES.items():
+        op.execute(sa.text(f"UPDATE {table} SET {column} = :now WHERE {column} IS NULL").bindparams(
+            now=datetime.now(timezone.utc).replace(tzinfo=None)
+        ))
+        foreign_keys = inspector.get_foreign_keys(table)
+        if bind.dialect.name == 'mysql':
+            for foreign_key in foreign_keys:
+                op.drop_constraint(foreign_key['name'], table, type_='foreignkey')
+            continue  # NOT NULL is set with the primary key below
+
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            for foreign_key in foreign_keys:
+                name = foreign_key['name'] or NAMING_CONVENTION['fk'] % {
+                    'table_name': table,
+                    'column_0_name': foreign_key['constrained_columns'][0],
+                    'referred_table_name': foreign_key['referred_table']
+                }
+                batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.alter_column(column, existing_type=sa.DateTime(), nullable=False)
+
+    if bind.dialect.name != 'mysql':
+        return  # Partitioning is MySQL only
+
+    # MySQL partitioning: the partition column must be part of the primary key
+    today = datetime.now(timezone.utc).date()
+    for table, (column, unit) in PARTITIONED_TABLES.items():
+        op.execute(
+            f"ALTER TABLE `{table}` MODIFY `{column}` DATETIME NOT NULL, "
+            f"DROP PRIMARY KEY, ADD PRIMARY KEY (`id`, `{column}`)"
+        )
+
+        # Rows before the current period all go to the first partition
+        until = today
+        for _ in range(PARTITIONS_AHEAD[unit]):
+            until = _next_period(_period_start(until, unit), unit)
+        bounds = _partition_bounds(_next_period(_period_start(today, unit), unit), until, unit)
+        op.execute(f"ALTER TABLE `{table}` {_partition_by_clause(column, bounds)}")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_slot_events_slot_time', table_name='slot_events')
+    op.drop_index('ix_detections_camera_time', table_name='detections')
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'mysql':
+        for table, column in (('detections', 'timestamp'), ('slot_events', 'start_time')):
+            op.execute(f"ALTER TABLE `{table}` REMOVE PARTITIONING")
+            op.execute(
+                f"ALTER TABLE `{table}` DROP PRIMARY KEY, ADD PRIMARY KEY (`id`), "
+                f"MODIFY `{column}` DATETIME NULL"
+            )
+        op.create_foreign_key(None, 'detections', 'cameras', ['camera_id'], ['id'])
+        op.create_foreign_key(None, 'slot_events', 'slots', ['slot_id'], ['id'])
+        return
+
+    for table, column, referred, local in (
+            ('detections', 'timestamp', 'cameras', 'camera_id'),
+            ('slot_events', 'start_time', 'slots', 'slot_id')
+    ):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=sa.DateTime(), nullable=True)
+            batch_op.create_foreign_key(f"fk_{table}_{local}_{referred}", referred, [local], ['id'])
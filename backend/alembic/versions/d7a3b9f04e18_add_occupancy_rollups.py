@@ -0,0 +1,66 @@
+"""Add occupancy rollup tables
+
+Revision ID: d7a3b9f04e18
+Revises: c5f2a8e61d34
+Create Date: 2026-10-17 14:08:31.552906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3b9f04e18'
+down_revision: Union[str, None] = 'c5f2a8e61d34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('slot_occupancy_rollups',
+    sa.Column('slot_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('bucket_seconds', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('occupied_seconds', sa.Float(), nullable=False),
+    sa.Column('changes', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('slot_id', 'bucket_seconds', 'bucket_start')
+    )
+    op.create_table('camera_occupancy_rollups',
+    sa.Column('camera_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('bucket_seconds', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('occupied_seconds', sa.Float(), nullable=False),
+    sa.Column('changes', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('camera_id', 'bucket_seconds', 'bucket_start')
+    )
+    op.add_column('slots', sa.Column('accounted_until', sa.DateTime(), nullable=True))
+
+    # Events written before end_time was maintained are all open: close each one at the
+    # start of the next event of its slot (only the latest event of a slot stays open)
+    if op.get_bind().dialect.name == "mysql":
+        op.execute(
+            "UPDATE slot_events e JOIN ("
+            " SELECT id, start_time, LEAD(start_time) OVER (PARTITION BY slot_id ORDER BY start_time, id) AS next_start"
+            " FROM slot_events"
+            ") n ON n.id = e.id AND n.start_time = e.start_time "
+            "SET e.end_time = n.next_start "
+            "WHERE e.end_time IS NULL AND n.next_start IS NOT NULL"
+        )
+    else:
+        op.execute(
+            "UPDATE slot_events SET end_time = ("
+            " SELECT MIN(n.start_time) FROM slot_events n"
+            " WHERE n.slot_id = slot_events.slot_id AND n.start_time > slot_events.start_time"
+            ") WHERE end_time IS NULL AND EXISTS ("
+            " SELECT 1 FROM slot_events n"
+            " WHERE n.slot_id = slot_events.slot_id AND n.start_time > slot_events.start_time"
+            ")"
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('slots', 'accounted_until')
+    op.drop_table('camera_occupancy_rollups')
+    op.drop_table('slot_occupancy_rollups')
@@ -0,0 +1,56 @@
+"""Add packed slot polygon (float32 blob + vertex count)
+
+Revision ID: e3f91a5d2c47
+Revises: b7e2c4a91f03
+Create Date: 2026-10-17 10:03:18.502114
+
+"""
+import json
+import struct
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f91a5d2c47'
+down_revision: Union[str, None] = 'b7e2c4a91f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _pack_polygon(points):
+    """float32 little-endian [x0, y0, x1, y1, ...] blob and vertex count (no app imports)"""
+    values = [float(value) for point in points for value in point]
+    if len(values) % 2:
+        raise ValueError("polygon points must have 2 coordinates")
+    return struct.pack(f"<{len(values)}f", *values), len(values) // 2
+
+
+def upgrade() -> None:
+    op.add_column('slots', sa.Column('polygon_blob', sa.LargeBinary(), nullable=True))
+    op.add_column('slots', sa.Column('vertex_count', sa.Integer(), nullable=True))
+
+    # Backfill from the JSON polygons
+    bind = op.get_bind()
+    slots = sa.table(
+        'slots',
+        sa.column('id', sa.Integer), sa.column('polygon', sa.JSON),
+        sa.column('polygon_blob', sa.LargeBinary), sa.column('vertex_count', sa.Integer)
+    )
+    for slot_id, polygon in bind.execute(sa.select(slots.c.id, slots.c.polygon)).all():
+        if isinstance(polygon, str):
+            polygon = json.loads(polygon)
+        try:
+            blob, vertex_count = _pack_polygon(polygon)
+        except (TypeError, ValueError):
+            continue  # Left NULL: loaded from JSON
+        bind.execute(
+            slots.update().where(slots.c.id == slot_id).values(polygon_blob=blob, vertex_count=vertex_count)
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('slots', 'vertex_count')
+    op.drop_column('slots', 'polygon_blob')
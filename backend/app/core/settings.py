@@ -16,9 +16,99 @@ class Settings(BaseSettings):
 
     # Detection
     DETECTION_THRESHOLD: float = 0.3
+    MATCHING_ENGINE: str = "polygon"  # "polygon" (exact intersections) or "raster" (slot masks + summed-area tables)
+    MATCHING_RASTER_SCALE: float = 0.5  # Raster pixels per frame pixel for the "raster" engine
+    SLOT_CACHE_ENABLED: bool = True  # In-memory slot index (off = load only nearby slots per frame, SQL bbox prefilter)
     SMOOTHING_FRAMES: int = 3
+    SMOOTHING_ENTER_RATIO: float = 0.6  # Occupied share of the window to mark a slot occupied
+    SMOOTHING_EXIT_RATIO: float = 0.4  # Occupied share at or below which it becomes empty again
+    SMOOTHING_DEBOUNCE: float = 0.0  # Seconds a status change must hold before it is applied
     DETECTION_INTERVAL: int = 5  # Process every N frames
     MIN_PROCESS_INTERVAL: float = 0.5  # Min seconds between processing
+    TARGET_CLASSES: str = "car,bus,truck"  # Comma-separated class names to keep (empty = all)
+    MIN_CONFIDENCE: float = 0.25  # Drop detections below this confidence
+
+    # Slot updates (DB write + WebSocket broadcast)
+    SLOT_UPDATE_CHANGE_ONLY: bool = True  # Skip DB and broadcast when no slot status changed
+    SLOT_UPDATE_HEARTBEAT: float = 10.0  # Broadcast at least every N seconds even without change (0 = never)
+    SLOT_STATE_STORE_ENABLED: bool = True  # Slot statuses served from memory, written behind to the DB
+    SLOT_STATE_FLUSH_INTERVAL: float = 1.0  # Max seconds before pending status changes are written
+    SLOT_STATE_FLUSH_SIZE: int = 500  # Flush early once this many rows + events are pending
+
+    # Detection persistence (buffered, multi-row inserts)
+    DETECTION_WRITER_BATCH_SIZE: int = 500  # Rows per insert, flush early once this many are buffered
+    DETECTION_WRITER_FLUSH_INTERVAL: float = 1.0  # Max seconds detections stay buffered
+    DETECTION_WRITER_MAX_PENDING: int = 20000  # Buffer capacity (backpressure beyond)
+    DETECTION_WRITER_PUT_TIMEOUT: float = 0.5  # Max seconds POST /detections waits for room (then 503)
+    DETECTION_WRITER_SAMPLE_RATE: float = 1.0  # Share of frames whose detections are stored (0 = none)
+
+    # Retention (drops whole time partitions on MySQL, bulk range delete elsewhere)
+    RETENTION_ENABLED: bool = False  # Opt-in: delete history older than the days below (partitions are added either way)
+    RETENTION_INTERVAL: float = 3600.0  # Seconds between retention runs
+    RETENTION_PARTITIONS_AHEAD: int = 3  # Periods (days/months) partitioned ahead of today
+    DETECTION_RETENTION_DAYS: int = 30  # Keep detections this many days (0 = forever)
+    SLOT_EVENT_RETENTION_DAYS: int = 365  # Keep slot events this many days (0 = forever)
+
+    # Occupancy history (pre-aggregated minute/hour/day rollups)
+    ROLLUP_CHECKPOINT_INTERVAL: float = 60.0  # Seconds between rollup updates of slots still occupied
+    ROLLUP_MINUTE_RETENTION_DAYS: int = 14  # Keep minute buckets this many days (0 = forever)
+    ROLLUP_HOUR_RETENTION_DAYS: int = 400  # Keep hour buckets this many days (0 = forever)
+    HISTORY_MAX_BUCKETS: int = 750  # Auto bucket: smallest size giving at most this many points
+
+    # Vehicle tracker (carries detections between inferences)
+    TRACKER_ENABLED: bool = False
+    TRACKER_IOU_THRESHOLD: float = 0.3  # Min IoU to match a detection to a track
+    TRACKER_MAX_MISSED: int = 2  # Inferences a moving track survives without detection
+    TRACKER_STATIONARY_SPEED: float = 0.05  # Max speed of a parked vehicle (box diagonals per second)
+    TRACKER_STATIONARY_TIME: float = 3.0  # Seconds a track must stay put to count as parked
+    TRACKER_STATIONARY_MAX_MISSED: int = 10  # Inferences a parked track survives without detection
+
+    # Adaptive cadence (processing interval follows measured latency)
+    CADENCE_ADAPTIVE: bool = True
+    CADENCE_MIN_INTERVAL: float = 0.2  # Floor for seconds between processed frames
+    CADENCE_MAX_INTERVAL: float = 5.0  # Ceiling for seconds between processed frames
+    CADENCE_TARGET_LATENCY: float = 0.5  # Target inference + post-processing latency, EWMA (seconds)
+    CADENCE_CPU_BUDGET: float = 0.0  # Max fraction of one core per camera (0 = no budget)
+
+    # Frame capture (preallocated frame ring, decode only when needed)
+    FRAME_RING_SLOTS: int = 6  # Preallocated frame buffers per camera
+    CAPTURE_DECODE_ON_DEMAND: bool = True  # Only decode frames needed by inference or viewers
+    FRAME_DEMAND_TIMEOUT: float = 2.0  # Keep decoding this long after the last viewer read
+
+    # Motion gate (skip inference when slot regions don't change)
+    MOTION_GATE_ENABLED: bool = True
+    MOTION_GATE_WIDTH: int = 160  # Width of the downscaled grayscale frame
+    MOTION_PIXEL_THRESHOLD: int = 25  # Gray level difference for a changed pixel
+    MOTION_MIN_CHANGED_RATIO: float = 0.02  # Changed pixel ratio inside a slot to trigger inference
+    MOTION_FORCE_INTERVAL: float = 30.0  # Run inference at least this often (seconds)
+
+    # Slot-ROI cropping (only run inference on the area covered by slots)
+    ROI_CROP_ENABLED: bool = True
+    ROI_PADDING: float = 0.25  # Padding around each slot, as a fraction of its bbox size
+    ROI_MAX_CROPS: int = 2  # Max separate crops per frame
+    ROI_MAX_AREA_RATIO: float = 0.8  # Use the full frame if crops cover more than this
+
+    # Inference scheduler (shared by all cameras)
+    INFERENCE_MAX_BATCH_SIZE: int = 8  # Max frames per forward pass
+    INFERENCE_MAX_WAIT_MS: float = 20.0  # Max wait for a batch to fill up
+    INFERENCE_WORKERS: int = 1  # Fixed number of inference worker threads
+    INFERENCE_QUEUE_SIZE: int = 32  # Max frames waiting for inference (all cameras)
+    INFERENCE_QUEUE_PER_CAMERA: int = 2  # Max frames waiting per camera
+    INFERENCE_DROP_POLICY: str = "oldest"  # When full: "oldest" (keep freshest) or "newest" (reject new)
+    INFERENCE_MAX_FRAME_AGE: float = 1.0  # Drop frames that waited longer (seconds, 0 = never)
+    INFERENCE_MODE: str = "thread"  # "thread" (in API process) or "process" (worker processes)
+    INFERENCE_PROCESSES: int = 2  # Number of worker processes in "process" mode
+    INFERENCE_PROCESS_THREADS: int = 0  # Backend threads per worker process (0 = default)
+    INFERENCE_MAX_FRAME_BYTES: int = 1920 * 1080 * 3  # Shared memory slot size (1080p BGR)
+    INFERENCE_BACKEND: str = "torch"  # "torch", "onnx" or "openvino" (exported once, cached next to the .pt)
+    INFERENCE_IMGSZ: int = 640  # Model input size
+    INFERENCE_THREADS: int = 0  # Backend threads in "thread" mode (0 = default)
+
+    # Slot classifier engine (per-camera alternative to full-frame YOLO)
+    SLOT_CLASSIFIER_MODEL: str = ""  # ONNX slot classifier (empty = edge-density heuristic)
+    SLOT_CLASSIFIER_SIZE: int = 64  # Slot patch size in pixels
+    SLOT_CLASSIFIER_THRESHOLD: float = 0.5  # Occupied probability of the ONNX model
+    SLOT_CLASSIFIER_EDGE_DENSITY: float = 0.08  # Share of edge pixels above which a slot is occupied (heuristic)
 
     # Config 
     model_config = SettingsConfigDict(
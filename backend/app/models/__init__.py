@@ -5,6 +5,7 @@ from app.models.camera import Camera, CameraStatus
 from app.models.slot import Slot, SlotStatus
 from app.models.detection import Detection
 from app.models.slot_event import SlotEvent
+from app.models.occupancy_rollup import SlotOccupancyRollup, CameraOccupancyRollup
 
 __all__ = [
     "Base",
@@ -12,4 +13,5 @@ __all__ = [
     "Slot", "SlotStatus",
     "Detection",
     "SlotEvent",
+    "SlotOccupancyRollup", "CameraOccupancyRollup",
 ]
\ No newline at end of file
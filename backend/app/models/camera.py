@@ -27,13 +27,16 @@ class Camera(Base):
     # Source type: webcam, rtsp, file, http
     source_type = Column(Enum(SourceType), default=SourceType.WEBCAM)
 
-    # Homography matrix (4x4) for transform coordinates
+    # Homography matrix (3x3) from frame to ground-plane coordinates
     homography_matrix = Column(JSON, nullable=True)
 
+    # Occupancy engine: "yolo" (full-frame detection) or "classifier" (per-slot patches)
+    occupancy_engine = Column(String(20), nullable=False, default="yolo", server_default="yolo")
+
     status = Column(Enum(CameraStatus), default=CameraStatus.INACTIVE)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     # Relationships
     slots = relationship("Slot", back_populates="camera", cascade="all, delete-orphan")
-    detections = relationship("Detection", back_populates="camera")
\ No newline at end of file
+    detections = relationship("Detection", back_populates="camera", primaryjoin="Camera.id == foreign(Detection.camera_id)")
\ No newline at end of file
@@ -1,5 +1,5 @@
 # Vehicle detection ORM model
-from sqlalchemy import Column, Integer, JSON, Float, DateTime, ForeignKey, String
+from sqlalchemy import Column, Integer, JSON, Float, DateTime, String, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.core.db import Base
@@ -7,8 +7,13 @@ from app.core.db import Base
 class Detection(Base):
     __tablename__ = "detections"
 
+    # The DB primary key is (id, timestamp) on MySQL (partitioned), id alone stays unique.
+    # The ORM keys on id: SQLite cannot autoincrement a composite primary key.
     id = Column(Integer, primary_key=True, index=True)
-    camera_id = Column(Integer, ForeignKey("cameras.id"), nullable=False)
+
+    # cameras.id, no FOREIGN KEY: MySQL partitioned tables cannot have one
+    # (checked by the application, see the Camera relationship)
+    camera_id = Column(Integer, nullable=False)
 
     # Bounding box [x, y, w, h]
     bbox = Column(JSON, nullable=False)
@@ -19,7 +24,13 @@ class Detection(Base):
     # Class name (car, truck, motorcycle, etc.)
     class_name = Column(String(50), nullable=False)
 
-    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Partition column on MySQL (RANGE by day, see partition_utils)
+    timestamp = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    # Relationships (join declared explicitly, there is no foreign key)
+    camera = relationship("Camera", back_populates="detections", primaryjoin="Camera.id == foreign(Detection.camera_id)")
 
-    # Relationships
-    camera = relationship("Camera", back_populates="detections")
+    __table_args__ = (
+        # Detections of a camera over a time range
+        Index("ix_detections_camera_time", "camera_id", "timestamp"),
+    )
@@ -0,0 +1,31 @@
+# Occupancy rollup ORM models (pre-aggregated slot/camera history)
+from sqlalchemy import Column, Integer, DateTime, Float
+from app.core.db import Base
+
+
+class SlotOccupancyRollup(Base):
+    __tablename__ = "slot_occupancy_rollups"
+
+    slot_id = Column(Integer, primary_key=True, autoincrement=False)
+
+    # Bucket size in seconds (60, 3600, 86400) and UTC start of the bucket
+    bucket_seconds = Column(Integer, primary_key=True, autoincrement=False)
+    bucket_start = Column(DateTime, primary_key=True)
+
+    # Seconds the slot was occupied within the bucket, status changes within the bucket
+    occupied_seconds = Column(Float, nullable=False, default=0.0)
+    changes = Column(Integer, nullable=False, default=0)
+
+
+class CameraOccupancyRollup(Base):
+    __tablename__ = "camera_occupancy_rollups"
+
+    camera_id = Column(Integer, primary_key=True, autoincrement=False)
+
+    # Bucket size in seconds (60, 3600, 86400) and UTC start of the bucket
+    bucket_seconds = Column(Integer, primary_key=True, autoincrement=False)
+    bucket_start = Column(DateTime, primary_key=True)
+
+    # Occupied slot-seconds of every slot of the camera, status changes within the bucket
+    occupied_seconds = Column(Float, nullable=False, default=0.0)
+    changes = Column(Integer, nullable=False, default=0)
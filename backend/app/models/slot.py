@@ -1,10 +1,12 @@
 # Parking slot ORM model
 
-from sqlalchemy import Column, Integer, String, JSON, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Enum, ForeignKey, Float, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 import enum
+import numpy as np
 from app.core.db import Base
+from app.utils.polygon_utils import pack_polygon, unpack_polygon
 
 class SlotStatus(str, enum.Enum):
     EMPTY = "empty"
@@ -24,11 +26,46 @@ class Slot(Base):
     # Polygon coordinates [[x1, y1], [x2, y2], ...]
     polygon = Column(JSON, nullable=False)
 
+    # Precomputed geometry (set on create, see repair_slot_polygon)
+    area = Column(Float, nullable=True)
+    min_x = Column(Float, nullable=True)
+    min_y = Column(Float, nullable=True)
+    max_x = Column(Float, nullable=True)
+    max_y = Column(Float, nullable=True)
+
+    # Packed polygon: float32 little-endian [x0, y0, x1, y1, ...] (see pack_polygon)
+    polygon_blob = Column(LargeBinary, nullable=True)
+    vertex_count = Column(Integer, nullable=True)
+
     status = Column(Enum(SlotStatus), default=SlotStatus.EMPTY)
     last_changed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Occupied time before this is already in the occupancy rollups (DB checkpoints, see checkpoint_occupied_slots)
+    accounted_until = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     # Relationships
     camera = relationship("Camera", back_populates="slots")
-    events = relationship("SlotEvent", back_populates="slot", cascade="all, delete-orphan")
\ No newline at end of file
+    events = relationship(
+        "SlotEvent", back_populates="slot", cascade="all, delete-orphan",
+        primaryjoin="Slot.id == foreign(SlotEvent.slot_id)"
+    )
+
+    __table_args__ = (
+        # Bbox prefilter: slots of a camera near a point or box
+        Index("ix_slots_camera_bbox", "camera_id", "min_x", "max_x", "min_y", "max_y"),
+    )
+
+    def set_geometry(self, points, area: float, bounds):
+        """Store a (repaired) polygon with its area, bbox and packed form"""
+        self.polygon = points
+        self.polygon_blob, self.vertex_count = pack_polygon(points)
+        self.area = area
+        self.min_x, self.min_y, self.max_x, self.max_y = bounds
+
+    @property
+    def points(self):
+        """Polygon as a (K, 2) float32 array (from the packed blob when available)"""
+        if self.polygon_blob is not None:
+            return unpack_polygon(self.polygon_blob, self.vertex_count)
+        return np.asarray(self.polygon, dtype=np.float32).reshape(-1, 2)
\ No newline at end of file
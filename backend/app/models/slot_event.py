@@ -1,6 +1,6 @@
 # Slot event history ORM model
 
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Enum, String
+from sqlalchemy import Column, Integer, DateTime, Enum, String, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.core.db import Base
@@ -8,15 +8,26 @@ from app.core.db import Base
 class SlotEvent(Base):
     __tablename__ = "slot_events"
 
+    # The DB primary key is (id, start_time) on MySQL (partitioned), id alone stays unique.
+    # The ORM keys on id: SQLite cannot autoincrement a composite primary key.
     id = Column(Integer, primary_key=True, index=True)
-    slot_id = Column(Integer, ForeignKey("slots.id"), nullable=False)
+
+    # slots.id, no FOREIGN KEY: MySQL partitioned tables cannot have one
+    # (events are deleted with their slot by the Slot.events cascade)
+    slot_id = Column(Integer, nullable=False)
 
     old_status = Column(String(20), nullable=False)
     new_status = Column(String(20), nullable=False)
 
-    start_time = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Partition column on MySQL (RANGE by month, see partition_utils)
+    start_time = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
     end_time = Column(DateTime, nullable=True)
 
     # Relationships
-    slot = relationship("Slot", back_populates="events")
+    slot = relationship("Slot", back_populates="events", primaryjoin="Slot.id == foreign(SlotEvent.slot_id)")
+
+    __table_args__ = (
+        # History of a slot over a time range
+        Index("ix_slot_events_slot_time", "slot_id", "start_time"),
+    )
 
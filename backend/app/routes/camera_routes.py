@@ -7,6 +7,11 @@ from typing import List
 from app.core.db import get_db_session
 from app.models.camera import Camera
 from app.schemas.camera_schema import CameraCreate, CameraResponse, CameraUpdate
+from app.services.slot_cache import slot_cache
+from app.services.slot_service import status_buffer
+from app.services.slot_state import slot_state
+from app.services.slot_classifier import OCCUPANCY_ENGINES
+from app.services.ai_listener import get_detector
 
 router = APIRouter()
 
@@ -30,6 +35,8 @@ async def create_camera(
     db: AsyncSession = Depends(get_db_session)
 ):
     """Tạo camera mới"""
+    if camera_data.occupancy_engine not in OCCUPANCY_ENGINES:
+        raise HTTPException(status_code=400, detail=f"occupancy_engine must be one of {list(OCCUPANCY_ENGINES)}")
     camera = Camera(**camera_data.model_dump())
     db.add(camera)
     await db.commit()
@@ -60,10 +67,18 @@ async def update_camera(
     if not camera:
         raise HTTPException(status_code=404, detail="Camera not found")
     
-    for key, value in camera_data.model_dump(exclude_unset=True).items():
+    update_data = camera_data.model_dump(exclude_unset=True)
+    if "occupancy_engine" in update_data and update_data["occupancy_engine"] not in OCCUPANCY_ENGINES:
+        raise HTTPException(status_code=400, detail=f"occupancy_engine must be one of {list(OCCUPANCY_ENGINES)}")
+    for key, value in update_data.items():
         setattr(camera, key, value)
     
     await db.commit()
+    if "homography_matrix" in update_data:
+        slot_cache.invalidate(camera_id)  # Matching geometry depends on the homography
+    detector = get_detector(camera_id)
+    if "occupancy_engine" in update_data and detector:
+        detector.set_occupancy_engine(update_data["occupancy_engine"])  # Switch the running detector
     await db.refresh(camera)
     return camera
 
@@ -80,4 +95,7 @@ async def delete_camera(
     
     await db.delete(camera)
     await db.commit()
+    slot_cache.invalidate(camera_id)  # Slots were deleted with the camera
+    status_buffer.evict_camera(camera_id)
+    slot_state.remove_camera(camera_id)
     return None  # No content response
\ No newline at end of file
@@ -1,22 +1,50 @@
 # Detection API endpoints
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from typing import List
 
-from app.core.db import get_db_session
+from app.core.db import async_session_maker
 from app.schemas.detection_schema import DetectionBase, DetectionResponse
-from app.models.detection import Detection
+from app.services.detection_writer import DetectionQueueFull, InvalidDetection, detection_writer
 from app.services.slot_service import match_detections_to_slots, update_slot_statuses
+from app.services.slot_state import slot_state
 from app.core.logger import logger
 from app.services.websocket_manager import manager
 router = APIRouter()
 
-@router.post("/detections", status_code=201)
+async def _update_slots(camera_id: int, detections: List[dict]):
+    """Match detections to slots, update statuses and broadcast (runs after the response)"""
+    try:
+        async with async_session_maker() as db:
+            slot_status_map = await match_detections_to_slots(
+                camera_id=camera_id,
+                detections=detections,
+                db=db
+            )
+
+            if slot_state.loaded:
+                changed = slot_state.apply(slot_status_map)  # Written behind to DB
+            else:
+                changed = await update_slot_statuses(slot_status_map, db)
+                await db.commit()
+
+        slots_data = [
+            {"slot_id": slot_id, "status": status}
+            for slot_id, status in slot_status_map.items()
+        ]
+        await manager.send_slot_update(camera_id, slots_data)
+        logger.info(f"Processed {len(detections)} detections for camera {camera_id} ({len(changed)} slots changed)")
+    except Exception as e:
+        logger.error(f"Error updating slots from detections of camera {camera_id}: {str(e)}")
+
+@router.post("/detections", status_code=202)
 async def receive_detections(
     data: DetectionBase,
-    db: AsyncSession = Depends(get_db_session)
+    background_tasks: BackgroundTasks
 ):
     """
     Get detections data from YOLO model
+    Returns once the detections are queued; slot matching, status updates
+    and the WebSocket broadcast run in the background.
 
     Requests body example:
     {
@@ -36,40 +64,21 @@ async def receive_detections(
     }    
     """
     try: 
-        # 1. Save detections to DB
-        for det in data.detections:
-            detection = Detection(
-                camera_id=data.camera_id,
-                bbox=det.get("bbox"),
-                confidence=det.get("confidence"),
-                class_name=det.get("class_name")
-            )
-            db.add(detection)
-        
-        await db.commit()
-
-        # 2. Match with slots
-        slot_status_map = await match_detections_to_slots(
-            camera_id=data.camera_id,
-            detections=data.detections,
-            db=db
-        )
-
-        # 3. Update slot statuses
-        await update_slot_statuses(slot_status_map, db)
-        slots_data = [
-            {"slot_id": slot_id, "status": status}
-            for slot_id, status in slot_status_map.items()
-        ]
-        await manager.send_slot_update(data.camera_id, slots_data)
-        logger.info(f"Processed {len(data.detections)} detections for camera {data.camera_id}")
-
-        return {
-            "status": "success",
-            "camera_id": data.camera_id,
-            "detections_count": len(data.detections),
-            "slots_updated": len(slot_status_map)
-        }
+        # Validate and queue detections (written in batches by the detection writer)
+        queued = await detection_writer.put(data.camera_id, data.detections, data.timestamp)
+    except InvalidDetection as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except DetectionQueueFull as e:
+        logger.warning(f"Detection queue full, rejecting detections for camera {data.camera_id}: {e}")
+        raise HTTPException(status_code=503, detail="Detection queue full, retry later")
     except Exception as e:
         logger.error(f"Error processing detections: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal Server Error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    background_tasks.add_task(_update_slots, data.camera_id, data.detections)
+    return {
+        "status": "success",
+        "camera_id": data.camera_id,
+        "detections_count": len(data.detections),
+        "detections_queued": queued
+    }
@@ -63,7 +63,8 @@ async def start_detector(
         init_detector(
             camera_id=camera_id,
             stream_url=camera.stream_url,
-            yolo_model_path=request.yolo_model_path
+            yolo_model_path=request.yolo_model_path,
+            occupancy_engine=camera.occupancy_engine or "yolo"
         )
         
         logger.info(f"Started detector for camera {camera_id}")
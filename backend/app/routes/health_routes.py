@@ -4,6 +4,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from app.core.db import get_db_session
+from app.services.slot_state import slot_state
+from app.services.detection_writer import detection_writer
+from app.services.retention import retention_job
 
 router = APIRouter()
 
@@ -19,4 +22,19 @@ async def database_health(db: AsyncSession = Depends(get_db_session)):
         await db.execute(text("SELECT 1"))
         return {"status": "database ok", "database": "connected"}
     except Exception as e:
-        return {"status": "database error", "database": str(e)}
\ No newline at end of file
+        return {"status": "database error", "database": str(e)}
+
+@router.get("/health/slot-state")
+async def slot_state_health():
+    """Slot state store health (pending writes, flush stats)."""
+    return slot_state.get_stats()
+
+@router.get("/health/detection-writer")
+async def detection_writer_health():
+    """Detection writer health (buffered rows, drops, flush stats)."""
+    return detection_writer.get_stats()
+
+@router.get("/health/retention")
+async def retention_health():
+    """Retention job health (last run, dropped partitions)."""
+    return retention_job.get_stats()
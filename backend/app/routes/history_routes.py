@@ -0,0 +1,72 @@
+# Occupancy history API endpoints
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.core.db import get_db_session
+from app.core.settings import settings
+from app.schemas.history_schema import OccupancyHistoryResponse
+from app.services.occupancy_rollup import BUCKET_SIZES, choose_bucket, get_occupancy_history
+from app.services.slot_service import get_slot_status
+from app.services.slot_state import slot_state
+
+router = APIRouter()
+
+# Explicit bucket sizes may return up to this many times HISTORY_MAX_BUCKETS points
+MAX_BUCKETS_FACTOR = 10
+
+@router.get("/history/occupancy", response_model=OccupancyHistoryResponse)
+async def occupancy_history(
+    start: datetime = Query(...),
+    end: Optional[datetime] = Query(None),
+    camera_id: Optional[int] = Query(None),
+    slot_id: Optional[int] = Query(None),
+    bucket: Optional[str] = Query(None, description="minute, hour or day (picked from the range if omitted)"),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Occupancy over time of a slot, a camera or the whole lot.
+    Read from the pre-aggregated rollups only, the bucket size is picked
+    from the range unless given (minute for hours, hour for weeks, day beyond).
+    """
+    end = end or datetime.now(timezone.utc)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if camera_id is not None and slot_id is not None:
+        raise HTTPException(status_code=400, detail="Give camera_id or slot_id, not both")
+
+    if bucket is None:
+        bucket = choose_bucket(start, end, settings.HISTORY_MAX_BUCKETS)
+    elif bucket not in BUCKET_SIZES:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(BUCKET_SIZES)}")
+    bucket_seconds = BUCKET_SIZES[bucket]
+    if (end - start) / timedelta(seconds=bucket_seconds) > settings.HISTORY_MAX_BUCKETS * MAX_BUCKETS_FACTOR:
+        raise HTTPException(status_code=400, detail="Range too long for this bucket size")
+
+    if slot_id is not None:
+        slot_count = 1
+    elif slot_state.loaded:
+        slot_count = slot_state.summary(camera_id)["total"]
+    else:
+        slot_count = (await get_slot_status(camera_id, db))["total"]
+
+    history = await get_occupancy_history(start, end, bucket, db, camera_id=camera_id, slot_id=slot_id)
+    capacity = slot_count * bucket_seconds
+    for point in history:
+        point["occupancy"] = min(1.0, point["occupied_seconds"] / capacity) if capacity else 0.0
+
+    return {
+        "camera_id": camera_id,
+        "slot_id": slot_id,
+        "start": start,
+        "end": end,
+        "bucket": bucket,
+        "bucket_seconds": bucket_seconds,
+        "slot_count": slot_count,
+        "buckets": history
+    }
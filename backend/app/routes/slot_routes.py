@@ -7,7 +7,10 @@ from typing import List, Optional
 from app.core.db import get_db_session
 from app.models.slot import Slot
 from app.schemas.slot_schema import SlotCreate,SlotResponse, SlotUpdate, SlotStatusResponse
-from app.services.slot_service import get_slot_status
+from app.services.slot_service import get_slot_status, get_slots_at_point, status_buffer
+from app.services.slot_cache import slot_cache
+from app.services.slot_state import slot_state
+from app.utils.polygon_utils import repair_slot_polygon
 
 router = APIRouter()
 
@@ -18,7 +21,11 @@ async def list_slots(
 ):
     """
     Get list of parking slots, filter by camera_id if provided.
+    Served from the slot state store when it is loaded.
     """
+    if slot_state.loaded:
+        return slot_state.list(camera_id)
+    
     query = select(Slot)
     if camera_id:
         query = query.where(Slot.camera_id == camera_id)
@@ -34,11 +41,20 @@ async def create_slot(
 ):
     """
     Create a new parking slot.
+    The polygon is validated and repaired (make_valid), its area and bbox are stored.
     """
-    slot = Slot(**slot_data.model_dump())
+    try:
+        points, area, bounds = repair_slot_polygon(slot_data.polygon)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid polygon: {e}")
+    
+    slot = Slot(camera_id=slot_data.camera_id, label=slot_data.label)
+    slot.set_geometry(points, area, bounds)
     db.add(slot)
     await db.commit()
     await db.refresh(slot)
+    slot_cache.invalidate(slot.camera_id)
+    slot_state.upsert_slot(slot)
     return slot
 
 @router.get("/slots/status", response_model=SlotStatusResponse)
@@ -46,6 +62,8 @@ async def get_all_slots_status(
     db: AsyncSession = Depends(get_db_session)
 ):
     """Lấy thống kê tất cả slots"""
+    if slot_state.loaded:
+        return slot_state.summary()
     stats = await get_slot_status(None, db)
     return stats
 
@@ -55,9 +73,23 @@ async def slot_statistics(
     db: AsyncSession = Depends(get_db_session)
 ):
     """Lấy thống kê slots theo camera"""
+    if slot_state.loaded:
+        return slot_state.summary(camera_id)
     stats = await get_slot_status(camera_id, db)
     return stats
 
+@router.get("/slots/at-point", response_model=List[SlotResponse])
+async def slots_at_point(
+    camera_id: int = Query(...),
+    x: float = Query(...),
+    y: float = Query(...),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Get slots of a camera containing a point (frame pixels).
+    """
+    return await get_slots_at_point(camera_id, x, y, db)
+
 @router.get("/slots/{slot_id}", response_model=SlotResponse)
 async def get_slot(
     slot_id: int,
@@ -66,6 +98,12 @@ async def get_slot(
     """
     Get details of a specific parking slot by ID.
     """
+    if slot_state.loaded:
+        state = slot_state.get(slot_id)
+        if state is None:
+            raise HTTPException(status_code=404, detail="Slot not found")
+        return state
+    
     result = await db.execute(
         select(Slot).where(Slot.id == slot_id)
     )
@@ -91,4 +129,7 @@ async def delete_slot(
     
     await db.delete(slot)
     await db.commit()
+    slot_cache.invalidate(slot.camera_id)
+    status_buffer.evict_slots(slot.camera_id, [slot.id])
+    slot_state.remove_slots([slot.id])
     return None  # No content response
\ No newline at end of file
@@ -17,14 +17,17 @@ def generate_video_stream(camera_id: int):
         logger.error(f"Detector for camera {camera_id} not found")
         return
     
-    while True:
-        # Get current frame
-        frame = detector.get_current_frame()
-        if frame is None:
-            continue
+    last_seq = 0
+    while detector.running:
+        # Wait for a newer frame, encode straight from the shared (read-only) buffer
+        with detector.read_frame(after_seq=last_seq, timeout=1.0) as (seq, frame):
+            if frame is None:
+                continue
+            last_seq = seq
+            
+            # Encode frame to JPEG
+            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
         
-        # Encode frame to JPEG
-        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
         if not ret:
             continue
         
@@ -92,17 +95,15 @@ async def capture_snapshot(camera_id: int):
             detail=f"Detector for camera {camera_id} not found. Start detector first."
         )
     
-    # Get current frame
-    frame = detector.get_current_frame()
-    
-    if frame is None:
-        raise HTTPException(
-            status_code=503,
-            detail="No frame available from camera"
-        )
-    
-    # Encode frame to JPEG with high quality
-    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    # Ask for a freshly decoded frame, then encode it from the read-only view
+    with detector.read_frame(after_seq=detector.frame_ring.latest_seq, timeout=1.0) as (_, frame):
+        if frame is None:
+            raise HTTPException(
+                status_code=503,
+                detail="No frame available from camera"
+            )
+        
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
     
     if not ret:
         raise HTTPException(
@@ -10,6 +10,7 @@ class CameraBase(BaseModel):
     stream_url: Optional[str] = None
     source_type: Optional[str] = "webcam"  # webcam, rtsp, file, http
     homography_matrix: Optional[List[List[float]]] = None
+    occupancy_engine: Optional[str] = "yolo"  # yolo, classifier
 
 class CameraCreate(CameraBase):
     pass
@@ -20,6 +21,7 @@ class CameraUpdate(BaseModel):
     stream_url: Optional[str] = None
     source_type: Optional[str] = None
     homography_matrix: Optional[List[List[float]]] = None
+    occupancy_engine: Optional[str] = None
     status: Optional[str] = None
 
 class CameraResponse(CameraBase):
@@ -0,0 +1,21 @@
+# Occupancy history Pydantic schemas
+
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class OccupancyBucket(BaseModel):
+    bucket_start: datetime  # UTC
+    occupied_seconds: float  # Occupied slot-seconds within the bucket
+    changes: int  # Status changes within the bucket
+    occupancy: float  # occupied_seconds / (slot_count * bucket_seconds), 0..1
+
+class OccupancyHistoryResponse(BaseModel):
+    camera_id: Optional[int] = None
+    slot_id: Optional[int] = None
+    start: datetime
+    end: datetime
+    bucket: str  # "minute", "hour" or "day"
+    bucket_seconds: int
+    slot_count: int  # Slots the occupancy is relative to (current count)
+    buckets: List[OccupancyBucket]
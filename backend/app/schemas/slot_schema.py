@@ -1,6 +1,7 @@
 # Slot Pydantic schemas
 
-from pydantic import BaseModel, Field
+import base64
+from pydantic import BaseModel, Field, field_serializer
 from typing import List, Optional
 from datetime import datetime
 
@@ -21,11 +22,18 @@ class SlotResponse(SlotBase):
     camera_id: int
     status: str
     last_changed_at: datetime
+    area: Optional[float] = None
+    polygon_blob: Optional[bytes] = None  # Packed float32 LE [x0, y0, ...], base64 in JSON
+    vertex_count: Optional[int] = None
 
     model_config = {
         "from_attributes": True
     }
 
+    @field_serializer("polygon_blob")
+    def serialize_polygon_blob(self, blob: Optional[bytes]):
+        return base64.b64encode(blob).decode("ascii") if blob is not None else None
+
 class SlotStatusResponse(BaseModel):
     total: int
     empty: int
@@ -4,17 +4,38 @@ import asyncio
 import cv2
 import time
 import numpy as np
-from typing import Optional, Dict
+from contextlib import contextmanager
+from typing import Optional, Dict, List, NamedTuple
 from collections import deque
-from threading import Thread, Lock
+from threading import Thread, Lock, Condition, current_thread
 from sqlalchemy import select
 
 from app.core.logger import logger
 from app.core.settings import settings
 from app.models.slot import Slot
-from app.services.slot_service import match_detections_to_slots, update_slot_statuses
+from app.services.slot_service import match_detections_to_slots, smooth_slot_occupancy, update_and_load_slot_statuses, status_buffer
 from app.services.websocket_manager import manager
+from app.services.inference_workers import ProcessInferencePool
+from app.services.inference_backends import create_backend
+from app.services.frame_ring import FrameRing
+from app.services.motion_gate import MotionGate
+from app.services.cadence_controller import CadenceController
+from app.services.tracker import VehicleTracker
+from app.services.slot_cache import slot_cache
+from app.services.slot_state import slot_state
+from app.services.detection_writer import detection_writer
+from app.services.slot_classifier import OCCUPANCY_ENGINES, get_slot_classifier
 from app.core.db import async_session_maker
+from app.utils.detection_utils import array_to_detections, class_ids_for_names, filter_detections
+from app.utils.polygon_utils import slot_crop_regions, warp_slot_patches
+
+# Fixed-size record of recent frames (frame_id 0 = empty entry)
+FRAME_INFO_DTYPE = np.dtype([
+    ("frame_id", np.int64),
+    ("timestamp", np.float64),
+    ("processed", np.bool_)
+])
+
 
 class YOLODetector:
     """
@@ -22,32 +43,89 @@ class YOLODetector:
     Supports both detection and video streaming
     """
     
-    def __init__(self, camera_id: int, stream_url: str, yolo_model_path: str = "yolov8n.pt", loop=None):
+    def __init__(
+        self,
+        camera_id: int,
+        stream_url: str,
+        yolo_model_path: str = "yolov8n.pt",
+        loop=None,
+        occupancy_engine: str = "yolo"
+    ):
         self.camera_id = camera_id
         self.stream_url = stream_url
         self.yolo_model_path = yolo_model_path
         
+        # Occupancy engine: full-frame YOLO, or a classifier on slot patches
+        self.occupancy_engine = "yolo"
+        self.set_occupancy_engine(occupancy_engine)
+        self._patches = None  # Reused (S, size, size, 3) patch buffer
+        
         # State
         self.running = False
         self.model = None
         self.cap = None
         
-        # Frame management
-        self.current_frame = None
-        self.frame_lock = Lock()
+        # Frame management (preallocated ring, consumers get read-only views)
+        self.frame_ring = FrameRing(num_slots=settings.FRAME_RING_SLOTS)
         self.frame_id = 0
+        self._inflight: Dict[int, tuple] = {}  # frame_id -> (ring slot held by inference, crops, submit time)
+        
+        # Decode on demand: grab() every tick, retrieve() only for inference or viewers
+        self.decode_on_demand = settings.CAPTURE_DECODE_ON_DEMAND
+        self._frame_demand_until = 0.0
+        self.decoded_frames = 0
+        
+        # Motion gate: only run inference when something changes inside slots
+        self.motion_gate = MotionGate(
+            width=settings.MOTION_GATE_WIDTH,
+            pixel_threshold=settings.MOTION_PIXEL_THRESHOLD,
+            min_changed_ratio=settings.MOTION_MIN_CHANGED_RATIO,
+            force_interval=settings.MOTION_FORCE_INTERVAL,
+            settle_frames=settings.SMOOTHING_FRAMES
+        ) if settings.MOTION_GATE_ENABLED else None
+        self._layout_loading = False
+        
+        # Slot-ROI crops (cached per slot layout version and frame size)
+        self._crops = None
+        self._crops_key = None
         
         # Detection settings - OPTIMIZED for performance
         self.detection_interval = settings.DETECTION_INTERVAL  # From config
-        self.target_classes = [2, 5, 7]  # car, bus, truck in COCO
+        self.target_classes = [name for name in settings.TARGET_CLASSES.split(",") if name.strip()]
+        self.min_confidence = settings.MIN_CONFIDENCE
+        self._target_class_ids = None  # Resolved from model class names
+        self._target_names = None
         
-        # Processing state
-        self.is_processing = False  # Flag to prevent concurrent processing
+        # Processing state (concurrency is bounded by the inference scheduler queue)
         self.last_process_time = 0
         self.min_process_interval = settings.MIN_PROCESS_INTERVAL  # From config
         
+        # Adaptive cadence: processing interval follows measured latency
+        self.cadence = CadenceController(
+            initial_interval=settings.MIN_PROCESS_INTERVAL,
+            floor=settings.CADENCE_MIN_INTERVAL,
+            ceiling=settings.CADENCE_MAX_INTERVAL,
+            target_latency=settings.CADENCE_TARGET_LATENCY,
+            cpu_budget=settings.CADENCE_CPU_BUDGET
+        ) if settings.CADENCE_ADAPTIVE else None
+        
+        # Optional tracker: stable IDs, parked vehicles survive missed detections
+        self.tracker = VehicleTracker(
+            iou_threshold=settings.TRACKER_IOU_THRESHOLD,
+            max_missed=settings.TRACKER_MAX_MISSED,
+            stationary_speed=settings.TRACKER_STATIONARY_SPEED,
+            stationary_time=settings.TRACKER_STATIONARY_TIME,
+            stationary_max_missed=settings.TRACKER_STATIONARY_MAX_MISSED
+        ) if settings.TRACKER_ENABLED else None
+        
+        # Last published slot statuses (skip DB + broadcast when nothing changed)
+        self._published_statuses: Dict[int, str] = {}
+        self._last_publish_time = 0.0
+        self.published_updates = 0
+        self.suppressed_updates = 0
+        
         # Frame buffer for sync
-        self.frame_buffer = deque(maxlen=60)
+        self.frame_buffer = np.zeros(60, dtype=FRAME_INFO_DTYPE)
         
         # Event loop for async operations
         self.loop = loop or asyncio.get_event_loop()
@@ -71,10 +149,20 @@ class YOLODetector:
     def stop(self):
         """Stop detection"""
         self.running = False
+        self.frame_ring.wake_readers()
         if self.cap:
             self.cap.release()
         logger.info(f"Stopped YOLO detector for camera {self.camera_id}")
     
+    def set_occupancy_engine(self, engine: str):
+        """Switch occupancy engine ("yolo" or "classifier"), takes effect on the next frame"""
+        if engine not in OCCUPANCY_ENGINES:
+            logger.warning(f"Unknown occupancy engine '{engine}' for camera {self.camera_id}, using yolo")
+            engine = "yolo"
+        if engine != self.occupancy_engine:
+            logger.info(f"Camera {self.camera_id} occupancy engine: {engine}")
+        self.occupancy_engine = engine
+    
     def _detection_loop(self):
         """Main detection loop (runs in thread)"""
         camera_opened = False
@@ -117,7 +205,8 @@ class YOLODetector:
             max_failures = 50  # Stop after 50 consecutive failures (~5s)
             
             while self.running:
-                ret, frame = self.cap.read()
+                # Grab every tick to keep the stream current (no decode yet)
+                ret = self.cap.grab()
                 if not ret:
                     consecutive_failures += 1
                     logger.warning(f"Failed to read frame from camera {self.camera_id} ({consecutive_failures}/{max_failures})")
@@ -138,32 +227,21 @@ class YOLODetector:
                 self.frame_id += 1
                 current_time = time.time()
                 
-                # Update current frame (for streaming)
-                with self.frame_lock:
-                    self.current_frame = frame.copy()
-                
                 # Store frame info
-                frame_info = {
-                    'frame_id': self.frame_id,
-                    'timestamp': current_time,
-                    'processed': False
-                }
-                self.frame_buffer.append(frame_info)
+                self.frame_buffer[self.frame_id % len(self.frame_buffer)] = (self.frame_id, current_time, False)
                 
                 # Run detection with throttling
                 current_process_time = time.time()
                 should_process = (
                     self.frame_id % self.detection_interval == 0 and  # Every N frames
-                    not self.is_processing and  # Not already processing
-                    (current_process_time - self.last_process_time) >= self.min_process_interval  # Min interval
+                    (current_process_time - self.last_process_time) >= self._process_interval()  # Min interval
                 )
                 
-                if should_process:
-                    self.is_processing = True
-                    self.last_process_time = current_process_time
-                    
-                    # Process in thread to avoid blocking capture loop
-                    Thread(target=self._process_frame, args=(frame.copy(), self.frame_id, current_time), daemon=True).start()
+                # Decode only when inference is due or someone is watching
+                if should_process or self._frame_wanted(current_time):
+                    if self._decode_frame() and should_process:
+                        self.last_process_time = current_process_time
+                        self._submit_inference(self.frame_id, current_time)
                 
                 # Control FPS
                 time.sleep(1.0 / fps)
@@ -190,61 +268,228 @@ class YOLODetector:
             
             logger.info(f"Detection thread stopped for camera {self.camera_id}")
     
-    def _process_frame(self, frame, frame_id: int, timestamp: float):
-        """Process a single frame with YOLO (runs in separate thread)"""
+    def _process_interval(self) -> float:
+        """Min seconds between processed frames (adaptive if enabled)"""
+        return self.cadence.interval if self.cadence else self.min_process_interval
+    
+    def _frame_wanted(self, now: float) -> bool:
+        """Check if a consumer (MJPEG/snapshot) wants new frames"""
+        return (
+            not self.decode_on_demand or  # Decode every frame
+            self.frame_ring.latest_seq == 0 or  # First frame (has_video)
+            now < self._frame_demand_until  # Recent reader
+        )
+    
+    def _decode_frame(self) -> bool:
+        """Decode the grabbed frame straight into a free ring slot and publish it"""
+        slot, buffer = self.frame_ring.acquire_write()
+        if slot is None:
+            # Every slot is held by readers: skip this frame
+            return False
+        
+        ret, frame = self.cap.retrieve(buffer) if buffer is not None else self.cap.retrieve()
+        if not ret:
+            self.frame_ring.abort(slot)
+            logger.warning(f"Failed to decode frame {self.frame_id} from camera {self.camera_id}")
+            return False
+        
+        self.frame_ring.commit(slot, frame)
+        self.decoded_frames += 1
+        return True
+    
+    def _get_slot_layout(self):
+        """Get cached slot layout, loading it in the event loop if missing (non-blocking)"""
+        layout = slot_cache.get_cached(self.camera_id)
+        if layout is None and not self._layout_loading:
+            self._layout_loading = True
+            asyncio.run_coroutine_threadsafe(self._load_slot_layout(), self.loop)
+        return layout
+    
+    async def _load_slot_layout(self):
+        """Load slot layout into the cache (runs in event loop)"""
         try:
-            # Run YOLO inference
-            results = self.model(frame, verbose=False)
+            async with async_session_maker() as db:
+                await slot_cache.get_layout(self.camera_id, db)
+        except Exception as e:
+            logger.error(f"Error loading slot layout for camera {self.camera_id}: {e}")
+        finally:
+            self._layout_loading = False
+    
+    def _get_crops(self, frame_shape, layout) -> List[tuple]:
+        """Get crop regions covering the slots (whole frame if cropping doesn't pay off)"""
+        height, width = frame_shape[:2]
+        full_frame = [(0, 0, width, height)]
+        if not settings.ROI_CROP_ENABLED or layout is None or len(layout) == 0:
+            return full_frame
+        
+        key = (layout.version, height, width)
+        if key != self._crops_key:
+            crops = slot_crop_regions(
+                layout.polygons,
+                frame_shape,
+                padding=settings.ROI_PADDING,
+                max_crops=settings.ROI_MAX_CROPS
+            )
+            crop_area = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in crops)
+            if crop_area >= settings.ROI_MAX_AREA_RATIO * width * height:
+                crops = full_frame
             
-            # Parse results
-            detections = []
-            for result in results:
-                boxes = result.boxes
-                if boxes is None:
-                    continue
-                
-                for box in boxes:
-                    cls = int(box.cls[0])
-                    
-                    # Filter by class (only vehicles)
-                    # if cls not in self.target_classes:
-                    #     continue
-                    
-                    # Get bbox in xywh format
-                    x, y, w, h = box.xywh[0].tolist()
-                    conf = float(box.conf[0])
-                    
-                    detections.append({
-                        "bbox": [float(x), float(y), float(w), float(h)],
-                        "confidence": conf,
-                        "class_name": self.model.names[cls]
-                    })
+            self._crops = crops
+            self._crops_key = key
+            logger.info(f"Camera {self.camera_id} inference regions: {crops}")
+        
+        return self._crops
+    
+    def _submit_inference(self, frame_id: int, timestamp: float):
+        """Hand the latest frame to the shared scheduler (batched with other cameras)"""
+        slot, _, frame = self.frame_ring.acquire()
+        if slot is None:
+            return
+        
+        layout = self._get_slot_layout()
+        
+        # Skip inference if nothing changed inside the slot regions
+        if self.motion_gate is not None:
+            if not self.motion_gate.should_infer(frame, layout, timestamp):
+                self.frame_ring.release(slot)
+                return
+        
+        # Classifier engine: classify slot patches right here, no YOLO pass
+        if self.occupancy_engine == "classifier":
+            try:
+                self._classify_slots(frame, layout, frame_id, timestamp)
+            finally:
+                self.frame_ring.release(slot)
+            return
+        
+        # Only send the slot regions (views into the ring slot, no copy)
+        crops = self._get_crops(frame.shape, layout)
+        images = [frame[y0:y1, x0:x1] for x0, y0, x1, y1 in crops]
+        
+        # The ring slot stays referenced until inference is done with it
+        self._inflight[frame_id] = (slot, crops, time.perf_counter())
+        if not get_inference_scheduler().submit(self, images, frame_id, timestamp):
+            self._release_inference_frame(frame_id)
+    
+    def _classify_slots(self, frame: np.ndarray, layout, frame_id: int, timestamp: float):
+        """Warp every slot to a small patch and classify all of them in one batch"""
+        if layout is None or len(layout) == 0:
+            return  # Layout still loading, or no slots to classify
+        
+        started_at = time.perf_counter()
+        classifier = get_slot_classifier()
+        self._patches = warp_slot_patches(frame, layout.get_warps(classifier.size), classifier.size, out=self._patches)
+        occupied = classifier.classify(self._patches)
+        elapsed = time.perf_counter() - started_at
+        
+        if self.cadence is not None:
+            self.cadence.record_inference(elapsed, elapsed)
+        
+        # Mark frame as processed
+        index = frame_id % len(self.frame_buffer)
+        if self.frame_buffer[index]['frame_id'] == frame_id:
+            self.frame_buffer[index]['processed'] = True
+        
+        asyncio.run_coroutine_threadsafe(
+            self._handle_slot_occupancy(list(layout.slot_ids), occupied, frame_id, timestamp),
+            self.loop
+        )
+        logger.debug(f"Frame {frame_id}: classified {len(occupied)} slots in {elapsed * 1000:.1f} ms")
+    
+    def _release_inference_frame(self, frame_id: int):
+        """Give back the ring slot used by inference for a frame, return (crops, submit time)"""
+        slot, crops, submitted_at = self._inflight.pop(frame_id, (None, None, None))
+        if slot is not None:
+            self.frame_ring.release(slot)
+        return crops, submitted_at
+    
+    def _on_inference_result(
+        self,
+        crop_boxes: List[np.ndarray],
+        names: Dict[int, str],
+        frame_id: int,
+        timestamp: float,
+        compute_time: float = 0.0
+    ):
+        """Map detections of every crop back to full-frame coordinates"""
+        crops, submitted_at = self._release_inference_frame(frame_id)
+        crops = crops or [(0, 0, 0, 0)]
+        
+        if self.cadence is not None and submitted_at is not None:
+            self.cadence.record_inference(time.perf_counter() - submitted_at, compute_time)
+        
+        mapped = []
+        for boxes, (x0, y0, _, _) in zip(crop_boxes, crops):
+            if x0 or y0:
+                boxes = boxes.copy()
+                boxes[:, 0] += x0
+                boxes[:, 1] += y0
+            mapped.append(boxes)
+        
+        boxes = mapped[0] if len(mapped) == 1 else np.concatenate(mapped)
+        self._process_detections(boxes, names, frame_id, timestamp)
+    
+    def _get_target_class_ids(self, names: Dict[int, str]) -> Optional[np.ndarray]:
+        """Resolve target class names to ids of the model (None = keep every class)"""
+        if names != self._target_names:
+            self._target_names = names
+            self._target_class_ids = None
+            if self.target_classes:
+                class_ids = class_ids_for_names(names, self.target_classes)
+                if len(class_ids):
+                    self._target_class_ids = class_ids
+                else:
+                    logger.warning(f"Model has none of the target classes {self.target_classes}, keeping every class")
+        return self._target_class_ids
+    
+    def _process_detections(self, boxes: np.ndarray, names: Dict[int, str], frame_id: int, timestamp: float):
+        """
+        Process detections for one frame (called from the inference scheduler)
+        boxes is a compact (N, 6) array: [x, y, w, h, confidence, class_id]
+        """
+        try:
+            # Filter by class (only vehicles) and confidence, once for the whole array
+            boxes = filter_detections(boxes, self._get_target_class_ids(names), self.min_confidence)
+            
+            # Track vehicles across inferences (adds parked vehicles missed by this frame)
+            track_ids = None
+            if self.tracker is not None:
+                boxes, track_ids = self.tracker.update(boxes, timestamp)
             
             # Mark frame as processed
-            for f in self.frame_buffer:
-                if f['frame_id'] == frame_id:
-                    f['processed'] = True
-                    break
+            index = frame_id % len(self.frame_buffer)
+            if self.frame_buffer[index]['frame_id'] == frame_id:
+                self.frame_buffer[index]['processed'] = True
             
-            # Process detections async in main event loop
-            if detections:
-                # Schedule coroutine in FastAPI's event loop (thread-safe)
-                asyncio.run_coroutine_threadsafe(
-                    self._handle_detections(detections, frame_id, timestamp),
-                    self.loop
-                )
+            # Process detections async in main event loop (thread-safe), even with no
+            # vehicle left: an empty (0, 6) array is what marks the slots empty again
+            asyncio.run_coroutine_threadsafe(
+                self._handle_detections(boxes, names, frame_id, timestamp, track_ids),
+                self.loop
+            )
             
-            logger.debug(f"Frame {frame_id}: {len(detections)} detections")
+            logger.debug(f"Frame {frame_id}: {len(boxes)} detections")
         
         except Exception as e:
             logger.error(f"Error processing frame {frame_id}: {e}")
-        finally:
-            # Reset processing flag
-            self.is_processing = False
     
-    async def _handle_detections(self, detections: list, frame_id: int, timestamp: float):
-        """Handle detections: match slots, update DB, broadcast"""
+    async def _handle_detections(
+        self,
+        detections: np.ndarray,
+        names: Dict[int, str],
+        frame_id: int,
+        timestamp: float,
+        track_ids: Optional[np.ndarray] = None
+    ):
+        """
+        Handle detections: match slots, update DB, broadcast
+        detections stay a compact (N, 6) array until the WebSocket payload
+        """
+        started_at = time.perf_counter()
         try:
+            # Store detections (buffered, dropped if the writer is backed up)
+            detection_writer.offer(self.camera_id, array_to_detections(detections, names), timestamp)
+            
             async with async_session_maker() as db:
                 # Match detections to slots
                 slot_status_map = await match_detections_to_slots(
@@ -253,75 +498,516 @@ class YOLODetector:
                     db=db
                 )
                 
-                # Update slot statuses in DB
-                await update_slot_statuses(slot_status_map, db)
+                await self._publish_statuses(slot_status_map, db, detections, names, frame_id, timestamp, track_ids)
+        
+        except Exception as e:
+            logger.error(f"Error handling detections: {e}", exc_info=True)
+        finally:
+            if self.cadence is not None:
+                self.cadence.record_postprocess(time.perf_counter() - started_at)
+    
+    async def _handle_slot_occupancy(self, slot_ids: List[int], occupied: np.ndarray, frame_id: int, timestamp: float):
+        """Handle per-slot classifier output: smooth, update DB, broadcast (no detection boxes)"""
+        started_at = time.perf_counter()
+        try:
+            slot_status_map = smooth_slot_occupancy(self.camera_id, slot_ids, occupied)
+            async with async_session_maker() as db:
+                await self._publish_statuses(slot_status_map, db, None, {}, frame_id, timestamp)
+        
+        except Exception as e:
+            logger.error(f"Error handling slot occupancy: {e}", exc_info=True)
+        finally:
+            if self.cadence is not None:
+                self.cadence.record_postprocess(time.perf_counter() - started_at)
+    
+    async def _publish_statuses(
+        self,
+        slot_status_map: Dict[int, str],
+        db,
+        detections: Optional[np.ndarray],
+        names: Dict[int, str],
+        frame_id: int,
+        timestamp: float,
+        track_ids: Optional[np.ndarray] = None
+    ):
+        """
+        Write changed statuses to DB and broadcast them
+        Skipped while the statuses equal the last published ones
+        (a heartbeat broadcast is still sent)
+        """
+        # Compare with the last published state
+        now = time.time()
+        changed = {
+            slot_id: status for slot_id, status in slot_status_map.items()
+            if self._published_statuses.get(slot_id) != status
+        }
+        layout_changed = slot_status_map.keys() != self._published_statuses.keys()
+        heartbeat_due = (
+            settings.SLOT_UPDATE_HEARTBEAT > 0 and
+            now - self._last_publish_time >= settings.SLOT_UPDATE_HEARTBEAT
+        )
+        
+        if settings.SLOT_UPDATE_CHANGE_ONLY and not changed and not layout_changed and not heartbeat_due:
+            self.suppressed_updates += 1
+            logger.debug(f"Frame {frame_id}: no slot change, update suppressed")
+            return
+        
+        slots = None
+        if changed or not settings.SLOT_UPDATE_CHANGE_ONLY:
+            if slot_state.loaded:
+                # In-memory state, written to DB by the store's flush task
+                slot_state.apply(changed if settings.SLOT_UPDATE_CHANGE_ONLY else slot_status_map)
+            else:
+                # Only slots whose stored status differs are written, the rows it loads
+                # are reused for the broadcast
+                _, slots = await update_and_load_slot_statuses(slot_status_map, db)
                 
                 # Ensure all changes are committed
                 await db.commit()
-                
-                # Get full slot data with polygon for frontend
-                slot_ids = list(slot_status_map.keys())
-                stmt = select(Slot).where(Slot.id.in_(slot_ids))
-                result = await db.execute(stmt)
-                slots = result.scalars().all()
-                
-                # Prepare data for broadcast with polygon
-                slots_data = [
-                    {
-                        "id": slot.id,
-                        "slot_id": slot.id,  # For backward compatibility
-                        "label": slot.label,
-                        "polygon": slot.polygon,  # Include polygon coordinates
-                        "status": slot_status_map.get(slot.id, slot.status)
-                    }
-                    for slot in slots
-                ]
-                
-                # Broadcast via WebSocket with frame sync info
-                await manager.send_slot_update(
-                    camera_id=self.camera_id,
-                    slots=slots_data,
-                    frame_id=frame_id,
-                    timestamp=timestamp,
-                    detections=detections  # Include detection bboxes
-                )
-                
-                logger.info(f"Processed {len(detections)} detections, updated {len(slot_status_map)} slots")
         
-        except Exception as e:
-            logger.error(f"Error handling detections: {e}", exc_info=True)
+        # Get full slot data with polygon for frontend
+        slot_ids = list(slot_status_map.keys())
+        if slot_state.loaded:
+            slots = [state for state in map(slot_state.get, slot_ids) if state is not None]
+        elif slots is None:
+            # Heartbeat or layout change without status change
+            stmt = select(Slot).where(Slot.id.in_(slot_ids))
+            result = await db.execute(stmt)
+            slots = result.scalars().all()
+        
+        # Prepare data for broadcast with polygon
+        slots_data = [
+            {
+                "id": slot.id,
+                "slot_id": slot.id,  # For backward compatibility
+                "label": slot.label,
+                "polygon": slot.polygon,  # Include polygon coordinates
+                "status": slot_status_map.get(slot.id, slot.status)
+            }
+            for slot in slots
+        ]
+        
+        # Broadcast via WebSocket with frame sync info
+        await manager.send_slot_update(
+            camera_id=self.camera_id,
+            slots=slots_data,
+            frame_id=frame_id,
+            timestamp=timestamp,
+            # Include detection bboxes (+ track IDs), none for the classifier engine
+            detections=array_to_detections(detections, names, track_ids) if detections is not None else []
+        )
+        
+        self._published_statuses = slot_status_map
+        self._last_publish_time = now
+        self.published_updates += 1
+        
+        logger.info(f"Published frame {frame_id}: {len(changed)} of {len(slot_status_map)} slots changed")
+    
+    def _on_inference_failed(self, frame_id: int):
+        """Called when the scheduler could not run inference for a frame"""
+        self._release_inference_frame(frame_id)
+        logger.warning(f"Inference failed for frame {frame_id} of camera {self.camera_id}")
+    
+    def _on_inference_dropped(self, frame_id: int):
+        """Called when the scheduler dropped a queued frame (queue full or stale)"""
+        self._release_inference_frame(frame_id)
+        logger.debug(f"Inference skipped for frame {frame_id} of camera {self.camera_id}")
+    
+    @contextmanager
+    def read_frame(self, after_seq: int = 0, timeout: Optional[float] = None):
+        """
+        Borrow a read-only view of the latest frame (no copy)
+        Yields (seq, frame), frame is None if no frame newer than after_seq
+        arrived within timeout. Don't keep the view after the with-block.
+        Reading also tells the capture loop to keep decoding frames for a while.
+        """
+        self._frame_demand_until = time.time() + settings.FRAME_DEMAND_TIMEOUT
+        slot, seq, frame = self.frame_ring.acquire(after_seq, timeout)
+        try:
+            yield seq, frame
+        finally:
+            if slot is not None:
+                self.frame_ring.release(slot)
     
     def get_current_frame(self) -> Optional[np.ndarray]:
-        """Get current frame for streaming"""
-        with self.frame_lock:
-            return self.current_frame.copy() if self.current_frame is not None else None
+        """Get a private copy of the current frame"""
+        with self.read_frame() as (_, frame):
+            return frame.copy() if frame is not None else None
     
     def get_stats(self) -> Dict:
         """Get detector statistics"""
-        processed = sum(1 for f in self.frame_buffer if f['processed'])
-        has_frames = self.current_frame is not None
+        recorded = self.frame_buffer['frame_id'] > 0
+        processed = int(np.count_nonzero(self.frame_buffer['processed'] & recorded))
+        total = int(np.count_nonzero(recorded))
+        has_frames = self.frame_ring.latest_seq > 0
+        scheduler = _inference_scheduler
         return {
             "camera_id": self.camera_id,
             "running": self.running,
             "healthy": self.running and has_frames,  # Healthy = running AND receiving frames
             "frame_id": self.frame_id,
             "processed_frames": processed,
-            "total_frames": len(self.frame_buffer),
-            "detection_rate": f"{processed}/{len(self.frame_buffer)}",
-            "has_video": has_frames
+            "total_frames": total,
+            "detection_rate": f"{processed}/{total}",
+            "decoded_frames": self.decoded_frames,
+            "dropped_frames": self.frame_ring.dropped_frames,
+            "has_video": has_frames,
+            "motion_gate": self.motion_gate.get_stats() if self.motion_gate else None,
+            "occupancy_engine": self.occupancy_engine,
+            "tracker": self.tracker.get_stats() if self.tracker else None,
+            "published_updates": self.published_updates,
+            "suppressed_updates": self.suppressed_updates,
+            "cadence": self.cadence.get_stats() if self.cadence else {"interval": self.min_process_interval},
+            "inference": scheduler.get_camera_stats(self.camera_id) if scheduler else None
         }
 
 
+class InferenceJob(NamedTuple):
+    """A frame (one or more crops of it) waiting for inference"""
+    detector: "YOLODetector"
+    frames: List[np.ndarray]
+    frame_id: int
+    timestamp: float
+    enqueued_at: float
+
+
+class InferenceScheduler:
+    """
+    Central inference scheduler shared by all detectors
+    Collects frames from every running camera into micro-batches and runs
+    one forward pass per batch, then hands each camera its own result.
+    
+    A fixed number of worker threads pull batches from bounded per-camera
+    queues in round-robin order, so a busy camera cannot starve the others.
+    With a process pool, each worker thread drives one inference process.
+    """
+    
+    DROP_POLICIES = ("oldest", "newest")
+    
+    def __init__(
+        self,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 20.0,
+        num_workers: int = 1,
+        queue_size: int = 32,
+        queue_per_camera: int = 2,
+        drop_policy: str = "oldest",
+        max_frame_age: float = 0.0,
+        process_pool: Optional[ProcessInferencePool] = None
+    ):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.process_pool = process_pool
+        self.num_workers = process_pool.num_processes if process_pool else max(1, num_workers)
+        self.queue_size = max(1, queue_size)
+        self.queue_per_camera = max(1, queue_per_camera)
+        self.max_frame_age = max(0.0, max_frame_age)  # 0 = never drop by age
+        
+        if drop_policy not in self.DROP_POLICIES:
+            logger.warning(f"Unknown drop policy '{drop_policy}', using 'oldest'")
+            drop_policy = "oldest"
+        self.drop_policy = drop_policy
+        
+        # State
+        self.running = False
+        self._threads: List[Thread] = []
+        
+        # Pending frames, one bounded queue per camera + round-robin order
+        self._queues: Dict[int, deque] = {}
+        self._rr_order = deque()
+        self._pending_count = 0
+        self._cond = Condition()
+        
+        # Stats
+        self.batch_count = 0
+        self.frame_count = 0
+        self._camera_stats: Dict[int, Dict] = {}
+    
+    def start(self):
+        """Start worker threads"""
+        if self.running:
+            return
+        
+        self.running = True
+        if self.process_pool is not None:
+            self.process_pool.start()
+        
+        self._threads = [
+            Thread(target=self._run, args=(worker_id,), daemon=True)
+            for worker_id in range(self.num_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        
+        logger.info(
+            f"Started inference scheduler (workers: {self.num_workers}, max batch: {self.max_batch_size}, "
+            f"max wait: {self.max_wait * 1000:.0f}ms, queue: {self.queue_size}, drop policy: {self.drop_policy})"
+        )
+    
+    def stop(self):
+        """Stop worker threads and drop pending frames"""
+        with self._cond:
+            self.running = False
+            dropped = [job for queue in self._queues.values() for job in queue]
+            self._queues.clear()
+            self._rr_order.clear()
+            self._pending_count = 0
+            self._cond.notify_all()
+        
+        for job in dropped:
+            job.detector._on_inference_failed(job.frame_id)
+        
+        for thread in self._threads:
+            if thread is not current_thread():
+                thread.join(timeout=5)
+        
+        if self.process_pool is not None:
+            self.process_pool.stop()
+        logger.info("Stopped inference scheduler")
+    
+    def _camera_stat(self, camera_id: int) -> Dict:
+        """Get (or create) stats entry for a camera (call with lock held)"""
+        stat = self._camera_stats.get(camera_id)
+        if stat is None:
+            stat = {
+                "submitted": 0,
+                "processed": 0,
+                "dropped_full": 0,
+                "dropped_stale": 0,
+                "wait_total": 0.0,
+                "wait_max": 0.0
+            }
+            self._camera_stats[camera_id] = stat
+        return stat
+    
+    def submit(self, detector: "YOLODetector", frames: List[np.ndarray], frame_id: int, timestamp: float) -> bool:
+        """
+        Queue a frame (as one or more crops) for the next batch (thread-safe)
+        Returns False if the frame was rejected because the queue is full
+        """
+        camera_id = detector.camera_id
+        job = InferenceJob(detector, frames, frame_id, timestamp, time.time())
+        evicted = None
+        
+        with self._cond:
+            stat = self._camera_stat(camera_id)
+            stat["submitted"] += 1
+            
+            queue = self._queues.get(camera_id)
+            if queue is None:
+                queue = deque()
+                self._queues[camera_id] = queue
+                self._rr_order.append(camera_id)
+            
+            if len(queue) >= self.queue_per_camera or self._pending_count >= self.queue_size:
+                if self.drop_policy == "newest" or not queue:
+                    # Keep what is queued, reject the new frame
+                    stat["dropped_full"] += 1
+                    return False
+                
+                # Make room by dropping this camera's oldest frame
+                evicted = queue.popleft()
+                self._pending_count -= 1
+                stat["dropped_full"] += 1
+            
+            queue.append(job)
+            self._pending_count += 1
+            self._cond.notify()
+        
+        if evicted is not None:
+            evicted.detector._on_inference_dropped(evicted.frame_id)
+        return True
+    
+    def _take_batch(self, now: float):
+        """
+        Take up to max_batch_size jobs, one camera at a time (call with lock held)
+        Returns (batch, stale) where stale jobs waited longer than max_frame_age
+        """
+        batch = []
+        stale = []
+        images = 0
+        
+        while images < self.max_batch_size and self._pending_count > 0:
+            camera_id = self._rr_order[0]
+            queue = self._queues[camera_id]
+            if not queue:
+                self._rr_order.rotate(-1)
+                continue
+            
+            # Batch size counts images (crops), keep a job's crops together
+            if batch and images + len(queue[0].frames) > self.max_batch_size:
+                break
+            self._rr_order.rotate(-1)
+            
+            job = queue.popleft()
+            self._pending_count -= 1
+            stat = self._camera_stat(camera_id)
+            wait = now - job.enqueued_at
+            
+            if self.max_frame_age and wait > self.max_frame_age:
+                stat["dropped_stale"] += 1
+                stale.append(job)
+                continue
+            
+            stat["processed"] += 1
+            stat["wait_total"] += wait
+            stat["wait_max"] = max(stat["wait_max"], wait)
+            batch.append(job)
+            images += len(job.frames)
+        
+        # Forget cameras with no queued frames
+        for camera_id in [cid for cid, queue in self._queues.items() if not queue]:
+            del self._queues[camera_id]
+            self._rr_order.remove(camera_id)
+        
+        return batch, stale
+    
+    def _next_batch(self) -> List[InferenceJob]:
+        """Wait for frames, then give the batch up to max_wait to fill"""
+        stale = []
+        batch = []
+        
+        with self._cond:
+            while self.running and self._pending_count == 0:
+                self._cond.wait(timeout=0.5)
+            
+            deadline = time.time() + self.max_wait
+            while self.running and self._pending_count < self.max_batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(timeout=remaining)
+            
+            if self.running:
+                batch, stale = self._take_batch(time.time())
+        
+        for job in stale:
+            job.detector._on_inference_dropped(job.frame_id)
+        return batch
+    
+    def _create_runner(self, worker_id: int):
+        """Return a function: list of frames -> (list of (N, 6) arrays, class names)"""
+        if self.process_pool is not None:
+            names = self.process_pool.wait_ready(worker_id)
+            
+            def run_in_process(frames):
+                return self.process_pool.infer(worker_id, frames), names
+            return run_in_process
+        
+        # Worker 0 shares the global model, other workers need their own copy
+        model = get_yolo_model() if worker_id == 0 else create_yolo_model()
+        
+        def run_in_thread(frames):
+            return model.infer(frames), model.names
+        return run_in_thread
+    
+    def _run(self, worker_id: int):
+        """Worker loop (runs in thread)"""
+        try:
+            infer = self._create_runner(worker_id)
+        except Exception as e:
+            logger.error(f"[ERROR] Inference worker {worker_id} has no model: {e}")
+            self.stop()
+            return
+        
+        while self.running:
+            batch = self._next_batch()
+            
+            # Skip frames of detectors stopped while waiting
+            for job in batch:
+                if not job.detector.running:
+                    job.detector._on_inference_dropped(job.frame_id)
+            batch = [job for job in batch if job.detector.running]
+            if not batch:
+                continue
+            
+            try:
+                # One forward pass for all cameras (and crops) in the batch
+                started_at = time.perf_counter()
+                detections, names = infer([frame for job in batch for frame in job.frames])
+                batch_time = time.perf_counter() - started_at
+            except Exception as e:
+                logger.error(f"Batched inference failed ({len(batch)} frames): {e}", exc_info=True)
+                for job in batch:
+                    job.detector._on_inference_failed(job.frame_id)
+                continue
+            
+            with self._cond:
+                self.batch_count += 1
+                self.frame_count += len(detections)
+            
+            # Hand every camera the detections of its own crops
+            image_time = batch_time / max(1, len(detections))
+            start = 0
+            for job in batch:
+                end = start + len(job.frames)
+                job.detector._on_inference_result(
+                    detections[start:end], names, job.frame_id, job.timestamp,
+                    compute_time=image_time * len(job.frames)
+                )
+                start = end
+    
+    def get_camera_stats(self, camera_id: int) -> Dict:
+        """Get queue statistics for one camera"""
+        with self._cond:
+            stat = dict(self._camera_stat(camera_id))
+            queue = self._queues.get(camera_id)
+            depth = len(queue) if queue else 0
+        
+        processed = stat["processed"]
+        return {
+            "queue_depth": depth,
+            "submitted": stat["submitted"],
+            "processed": processed,
+            "dropped_full": stat["dropped_full"],
+            "dropped_stale": stat["dropped_stale"],
+            "avg_wait_ms": round(stat["wait_total"] / processed * 1000, 1) if processed else 0.0,
+            "max_wait_ms": round(stat["wait_max"] * 1000, 1)
+        }
+    
+    def forget_camera(self, camera_id: int):
+        """Drop queued frames and stats of a camera"""
+        with self._cond:
+            queue = self._queues.pop(camera_id, None)
+            if queue is not None:
+                self._pending_count -= len(queue)
+                self._rr_order.remove(camera_id)
+            self._camera_stats.pop(camera_id, None)
+        
+        for job in queue or ():
+            job.detector._on_inference_dropped(job.frame_id)
+    
+    def get_stats(self) -> Dict:
+        """Get scheduler statistics"""
+        with self._cond:
+            return {
+                "running": self.running,
+                "mode": "process" if self.process_pool else "thread",
+                "workers": self.num_workers,
+                "queue_depth": self._pending_count,
+                "queue_size": self.queue_size,
+                "drop_policy": self.drop_policy,
+                "batches": self.batch_count,
+                "frames": self.frame_count,
+                "avg_batch_size": round(self.frame_count / self.batch_count, 2) if self.batch_count else 0.0
+            }
+
+
 # Global detector registry (support multiple cameras)
 _detectors: Dict[int, YOLODetector] = {}
 
 # Global event loop reference (set from main.py)
 _event_loop: Optional[asyncio.AbstractEventLoop] = None
 
-# Global YOLO model (loaded once at startup)
+# Global YOLO model (loaded once at startup, wrapped in an inference backend)
 _global_yolo_model = None
+_global_model_path = "yolov8n.pt"
 _model_lock = Lock()
 
+# Global inference scheduler (shared by all detectors)
+_inference_scheduler: Optional[InferenceScheduler] = None
+_scheduler_lock = Lock()
+
 
 def set_event_loop(loop: asyncio.AbstractEventLoop):
     """Set the event loop to use for all detectors"""
@@ -331,8 +1017,12 @@ def set_event_loop(loop: asyncio.AbstractEventLoop):
 
 
 def load_yolo_model(model_path: str = "yolov8n.pt"):
-    """Load YOLO model globally (call once at startup)"""
-    global _global_yolo_model
+    """
+    Load YOLO model globally (call once at startup)
+    Exported backends (onnx/openvino) export the checkpoint on first load
+    and reuse the cached artifact next to the .pt afterwards
+    """
+    global _global_yolo_model, _global_model_path
     
     with _model_lock:
         if _global_yolo_model is not None:
@@ -340,10 +1030,10 @@ def load_yolo_model(model_path: str = "yolov8n.pt"):
             return _global_yolo_model
         
         try:
-            from ultralytics import YOLO
-            logger.info(f"Loading YOLO model: {model_path}...")
-            _global_yolo_model = YOLO(model_path)
-            logger.info(f"[SUCCESS] YOLO model loaded successfully: {model_path}")
+            logger.info(f"Loading YOLO model: {model_path} ({settings.INFERENCE_BACKEND} backend)...")
+            _global_yolo_model = _create_backend(model_path)
+            _global_model_path = model_path
+            logger.info(f"[SUCCESS] YOLO model loaded successfully: {model_path} ({_global_yolo_model.name})")
             return _global_yolo_model
         except Exception as e:
             logger.error(f"Failed to load YOLO model: {e}", exc_info=True)
@@ -361,12 +1051,72 @@ def get_yolo_model():
     return _global_yolo_model
 
 
+def _create_backend(model_path: str):
+    """Create an inference backend from the configured settings"""
+    return create_backend(
+        model_path,
+        backend=settings.INFERENCE_BACKEND,
+        imgsz=settings.INFERENCE_IMGSZ,
+        num_threads=settings.INFERENCE_THREADS
+    )
+
+
+def create_yolo_model():
+    """Create a separate model instance (ultralytics models are not thread-safe)"""
+    get_yolo_model()  # Make sure the global model (and its path) is loaded
+    logger.info(f"Loading extra YOLO model instance: {_global_model_path}...")
+    return _create_backend(_global_model_path)
+
+
+def get_inference_scheduler() -> InferenceScheduler:
+    """Get the global inference scheduler, starting it on first use"""
+    global _inference_scheduler
+    
+    with _scheduler_lock:
+        if _inference_scheduler is None or not _inference_scheduler.running:
+            process_pool = None
+            if settings.INFERENCE_MODE == "process":
+                get_yolo_model()  # Resolve model path before spawning workers
+                process_pool = ProcessInferencePool(
+                    model_path=_global_model_path,
+                    backend=settings.INFERENCE_BACKEND,
+                    imgsz=settings.INFERENCE_IMGSZ,
+                    num_processes=settings.INFERENCE_PROCESSES,
+                    slots_per_process=max(settings.INFERENCE_MAX_BATCH_SIZE, settings.ROI_MAX_CROPS),
+                    max_frame_bytes=settings.INFERENCE_MAX_FRAME_BYTES,
+                    threads_per_process=settings.INFERENCE_PROCESS_THREADS
+                )
+            
+            _inference_scheduler = InferenceScheduler(
+                max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+                max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+                num_workers=settings.INFERENCE_WORKERS,
+                queue_size=settings.INFERENCE_QUEUE_SIZE,
+                queue_per_camera=settings.INFERENCE_QUEUE_PER_CAMERA,
+                drop_policy=settings.INFERENCE_DROP_POLICY,
+                max_frame_age=settings.INFERENCE_MAX_FRAME_AGE,
+                process_pool=process_pool
+            )
+            _inference_scheduler.start()
+        return _inference_scheduler
+
+
+def stop_inference_scheduler():
+    """Stop the global inference scheduler (call at shutdown)"""
+    global _inference_scheduler
+    
+    with _scheduler_lock:
+        if _inference_scheduler is not None:
+            _inference_scheduler.stop()
+            _inference_scheduler = None
+
+
 def get_detector(camera_id: int) -> Optional[YOLODetector]:
     """Get detector for a specific camera"""
     return _detectors.get(camera_id)
 
 
-def init_detector(camera_id: int, stream_url: str, yolo_model_path: str = "yolov8n.pt"):
+def init_detector(camera_id: int, stream_url: str, yolo_model_path: str = "yolov8n.pt", occupancy_engine: str = "yolo"):
     """Initialize and start detector for a camera"""
     # Check if detector already exists
     if camera_id in _detectors:
@@ -383,7 +1133,7 @@ def init_detector(camera_id: int, stream_url: str, yolo_model_path: str = "yolov
             loop = asyncio.get_event_loop()
     
     # Create and start detector
-    detector = YOLODetector(camera_id, stream_url, yolo_model_path, loop=loop)
+    detector = YOLODetector(camera_id, stream_url, yolo_model_path, loop=loop, occupancy_engine=occupancy_engine)
     detector.start()
     
     # Store in registry
@@ -401,11 +1151,17 @@ def stop_detector(camera_id: int = None):
         if detector:
             detector.stop()
             del _detectors[camera_id]
+            if _inference_scheduler is not None:
+                _inference_scheduler.forget_camera(camera_id)
+            status_buffer.evict_camera(camera_id)
             logger.info(f"Stopped detector for camera {camera_id}")
     else:
         # Stop all detectors
         for cid, detector in list(_detectors.items()):
             detector.stop()
+            if _inference_scheduler is not None:
+                _inference_scheduler.forget_camera(cid)
+            status_buffer.evict_camera(cid)
             logger.info(f"Stopped detector for camera {cid}")
         _detectors.clear()
 
@@ -0,0 +1,93 @@
+# Cadence controller - adapt detection interval to measured latency
+from collections import deque
+from threading import Lock
+from typing import Dict
+import numpy as np
+
+
+class CadenceController:
+    """
+    Per-detector controller for the processing interval
+
+    Tracks inference latency (queue wait + forward pass), the compute time
+    of the forward pass and post-processing latency (matching, DB, broadcast)
+    as EWMA and p95 (p95 is reported only). Once per frame, when its
+    post-processing is recorded, the interval is:
+    - raised when the EWMA latency is over target (node is overloaded)
+    - lowered when the EWMA latency is under half the target (spare capacity)
+    - kept as is in between (hysteresis band)
+    - kept >= compute / cpu_budget, so one camera uses at most cpu_budget of a core
+    and always clamped to [floor, ceiling]. The EWMA forgets a transient
+    spike within a few frames, so the interval comes back down quickly.
+    """
+
+    def __init__(
+        self,
+        initial_interval: float = 0.5,
+        floor: float = 0.2,
+        ceiling: float = 5.0,
+        target_latency: float = 0.5,
+        cpu_budget: float = 0.0,
+        window: int = 100,
+        alpha: float = 0.2
+    ):
+        self.floor = floor
+        self.ceiling = max(floor, ceiling)
+        self.target_latency = target_latency
+        self.cpu_budget = cpu_budget  # Fraction of one core (0 = no budget)
+        self.alpha = alpha
+        self.interval = min(max(initial_interval, self.floor), self.ceiling)
+
+        self._inference = deque(maxlen=window)
+        self._postprocess = deque(maxlen=window)
+        self._inference_ewma = None
+        self._compute_ewma = None
+        self._postprocess_ewma = None
+        self._lock = Lock()
+
+    def _ewma(self, current, sample: float) -> float:
+        return sample if current is None else current + self.alpha * (sample - current)
+
+    def record_inference(self, latency: float, compute_time: float):
+        """Record latency from submit to result, and forward pass time of one frame"""
+        with self._lock:
+            self._inference.append(latency)
+            self._inference_ewma = self._ewma(self._inference_ewma, latency)
+            self._compute_ewma = self._ewma(self._compute_ewma, compute_time)
+
+    def record_postprocess(self, latency: float):
+        """Record post-processing time of one frame (matching, DB, broadcast) and adjust the interval"""
+        with self._lock:
+            self._postprocess.append(latency)
+            self._postprocess_ewma = self._ewma(self._postprocess_ewma, latency)
+            self._update()
+
+    def _p95(self, samples: deque) -> float:
+        return float(np.percentile(samples, 95)) if samples else 0.0
+
+    def _update(self):
+        """Recompute the interval once per frame (call with lock held)"""
+        latency = (self._inference_ewma or 0.0) + (self._postprocess_ewma or 0.0)
+        interval = self.interval
+
+        if latency > self.target_latency:
+            interval *= 1.25  # Back off
+        elif latency < self.target_latency * 0.5:
+            interval *= 0.8  # Speed up again
+
+        if self.cpu_budget > 0 and self._compute_ewma is not None:
+            interval = max(interval, self._compute_ewma / self.cpu_budget)
+
+        self.interval = min(max(interval, self.floor), self.ceiling)
+
+    def get_stats(self) -> Dict:
+        """Get controller statistics"""
+        with self._lock:
+            return {
+                "interval": round(self.interval, 3),
+                "inference_ewma_ms": round((self._inference_ewma or 0.0) * 1000, 1),
+                "inference_p95_ms": round(self._p95(self._inference) * 1000, 1),
+                "compute_ewma_ms": round((self._compute_ewma or 0.0) * 1000, 1),
+                "postprocess_ewma_ms": round((self._postprocess_ewma or 0.0) * 1000, 1),
+                "postprocess_p95_ms": round(self._p95(self._postprocess) * 1000, 1)
+            }
@@ -0,0 +1,291 @@
+# Detection writer - buffered, batched inserts into the detections table
+import asyncio
+import math
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError, StatementError
+
+from app.core.db import async_session_maker
+from app.core.logger import logger
+from app.core.settings import settings
+from app.models.detection import Detection
+
+
+class DetectionQueueFull(Exception):
+    """Raised when the buffer stays full for longer than the put timeout"""
+
+
+class InvalidDetection(ValueError):
+    """Raised for a detection that cannot be stored (bbox not 4 numbers, confidence not a number)"""
+
+
+def normalize_detection(det: Dict) -> Dict:
+    """bbox as 4 finite floats, confidence as a finite float, class name (raises InvalidDetection)"""
+    if not isinstance(det, dict):
+        raise InvalidDetection(f"detection must be an object, got {type(det).__name__}")
+    try:
+        bbox = [float(value) for value in det.get("bbox")]
+        confidence = float(det.get("confidence"))
+    except (TypeError, ValueError):
+        raise InvalidDetection(f"invalid bbox or confidence: {det}")
+    if len(bbox) != 4 or not all(math.isfinite(value) for value in bbox) or not math.isfinite(confidence):
+        raise InvalidDetection(f"bbox must be 4 numbers and confidence a number: {det}")
+    class_name = det.get("class_name") or det.get("class") or "unknown"
+    return {"bbox": bbox, "confidence": confidence, "class_name": str(class_name)[:50]}
+
+
+def _is_data_error(error: Exception) -> bool:
+    """Errors caused by the rows themselves (retrying the same batch cannot succeed)"""
+    if isinstance(error, (IntegrityError, DataError)):
+        return True
+    # StatementError raised before reaching the DB (e.g. a value the column type cannot bind)
+    return isinstance(error, StatementError) and not isinstance(error, DBAPIError)
+
+
+class DetectionWriter:
+    """
+    Queue-backed writer for the detections table
+    Detections from the HTTP route and from the detectors are buffered in
+    memory and written by a background task with multi-row inserts, every
+    flush_interval seconds or as soon as batch_size rows are pending.
+    - sample_rate keeps that share of frames per camera (whole frames)
+    - When max_pending rows are buffered, put() waits for room (backpressure)
+      and raises DetectionQueueFull after timeout, offer() drops the frame
+    - Detections are validated when buffered: put() raises InvalidDetection,
+      offer() skips them. A batch the DB still rejects as bad data is
+      written row by row and only the failing rows are dropped; connection
+      errors keep the batch for the next flush.
+    Only used from the event loop (no locking).
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 20000,
+        sample_rate: float = 1.0,
+        put_timeout: float = 0.5
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.sample_rate = sample_rate
+        self.put_timeout = put_timeout
+
+        self._rows: List[Dict] = []
+        self._sample_credit: Dict[int, float] = {}  # camera_id -> accumulated sample rate
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Stats
+        self.enqueued_rows = 0
+        self.written_rows = 0
+        self.sampled_out_frames = 0
+        self.dropped_rows = 0
+        self.invalid_rows = 0
+        self.rejected_rows = 0
+        self.failed_flushes = 0
+        self.flushes = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._rows)
+
+    def _sampled(self, camera_id: int) -> bool:
+        """Keep sample_rate of the frames of each camera, evenly spread"""
+        if self.sample_rate >= 1:
+            return True
+        credit = self._sample_credit.get(camera_id, 0.0) + max(0.0, self.sample_rate)
+        keep = credit >= 1
+        self._sample_credit[camera_id] = credit - 1 if keep else credit
+        if not keep:
+            self.sampled_out_frames += 1
+        return keep
+
+    def _make_rows(self, camera_id: int, detections: List[Dict], timestamp: Optional[float], strict: bool = True) -> List[Dict]:
+        """
+        Detection dicts ({"bbox", "confidence", "class_name"}) to table rows
+        strict: raise InvalidDetection on a bad detection, otherwise skip it
+        """
+        detected_at = datetime.fromtimestamp(timestamp, timezone.utc) if timestamp else datetime.now(timezone.utc)
+        rows = []
+        for det in detections:
+            try:
+                row = normalize_detection(det)
+            except InvalidDetection:
+                if strict:
+                    raise
+                self.invalid_rows += 1
+                continue
+            row["camera_id"] = camera_id
+            row["timestamp"] = detected_at
+            rows.append(row)
+        return rows
+
+    def _enqueue(self, rows: List[Dict]):
+        self._rows.extend(rows)
+        self.enqueued_rows += len(rows)
+        if len(self._rows) >= self.batch_size:
+            self._wakeup.set()
+
+    async def put(self, camera_id: int, detections: List[Dict], timestamp: Optional[float] = None) -> int:
+        """
+        Buffer the detections of one frame, waiting for room if the buffer is full
+        Returns the number of rows buffered (0 if the frame was sampled out)
+        Raises InvalidDetection (nothing buffered) if any detection is malformed
+        """
+        if not detections:
+            return 0
+        rows = self._make_rows(camera_id, detections, timestamp)  # Validate before sampling
+        if not self._sampled(camera_id):
+            return 0
+
+        deadline = time.monotonic() + self.put_timeout
+        while self._rows and len(self._rows) + len(rows) > self.max_pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._task is None:
+                self.dropped_rows += len(rows)
+                raise DetectionQueueFull(f"{len(self._rows)} detections waiting to be written")
+            self._space.clear()
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._space.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+
+        self._enqueue(rows)
+        if self._task is None:
+            await self.flush()  # Writer not started: write through
+        return len(rows)
+
+    def offer(self, camera_id: int, detections: List[Dict], timestamp: Optional[float] = None) -> int:
+        """Buffer the detections of one frame without waiting (dropped if the buffer is full, malformed ones skipped)"""
+        if not detections or not self._sampled(camera_id):
+            return 0
+
+        if len(self._rows) + len(detections) > self.max_pending:
+            self.dropped_rows += len(detections)
+            self._wakeup.set()
+            return 0
+
+        rows = self._make_rows(camera_id, detections, timestamp, strict=False)
+        self._enqueue(rows)
+        return len(rows)
+
+    def _requeue(self, rows: List[Dict]):
+        """Put unwritten rows back in front for the next flush, without growing past capacity"""
+        self._rows = rows + self._rows
+        overflow = len(self._rows) - self.max_pending
+        if overflow > 0:
+            del self._rows[:overflow]
+            self.dropped_rows += overflow
+
+    async def _write_rows_one_by_one(self, rows: List[Dict]) -> int:
+        """
+        Insert rows in separate transactions, dropping the ones the DB rejects
+        On a connection error the remaining rows are requeued
+        """
+        written = 0
+        for index, row in enumerate(rows):
+            try:
+                async with async_session_maker() as db:
+                    await db.execute(insert(Detection).values([row]))
+                    await db.commit()
+                written += 1
+            except Exception as e:
+                if not _is_data_error(e):
+                    self._requeue(rows[index:])
+                    self.failed_flushes += 1
+                    logger.error(f"[ERROR] Detection flush failed ({len(self._rows)} rows pending): {e}")
+                    break
+                self.rejected_rows += 1
+                logger.warning(f"Dropped detection row rejected by DB: {row} ({e})")
+        return written
+
+    async def flush(self) -> int:
+        """Write every buffered row (batch_size rows per insert) in one transaction, return rows written"""
+        if not self._rows:
+            return 0
+
+        rows, self._rows = self._rows, []
+        try:
+            async with async_session_maker() as db:
+                for start in range(0, len(rows), self.batch_size):
+                    await db.execute(insert(Detection).values(rows[start:start + self.batch_size]))
+                await db.commit()
+            written = len(rows)
+        except Exception as e:
+            if _is_data_error(e):
+                # Retrying would fail on the same bad rows forever: salvage the others
+                logger.error(f"[ERROR] Detection batch rejected ({e}), writing {len(rows)} rows one by one")
+                written = await self._write_rows_one_by_one(rows)
+            else:
+                # Connection / operational error: keep the rows for the next flush
+                self._requeue(rows)
+                self.failed_flushes += 1
+                logger.error(f"[ERROR] Detection flush failed ({len(self._rows)} rows pending): {e}")
+                return 0
+        finally:
+            if len(self._rows) < self.max_pending:
+                self._space.set()
+
+        self.flushes += 1
+        self.written_rows += written
+        logger.debug(f"Wrote {written} detections")
+        return written
+
+    async def _run(self):
+        """Flush loop: every flush_interval, or early when batch_size is reached"""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        """Start the flush task (in the running event loop)"""
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+            logger.info("[OK] Detection writer started")
+
+    async def stop(self):
+        """Stop the flush task and write everything still buffered"""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        logger.info("Detection writer stopped")
+
+    def get_stats(self) -> Dict:
+        """Get writer statistics"""
+        return {
+            "running": self._task is not None,
+            "pending": len(self._rows),
+            "enqueued_rows": self.enqueued_rows,
+            "written_rows": self.written_rows,
+            "sampled_out_frames": self.sampled_out_frames,
+            "dropped_rows": self.dropped_rows,
+            "invalid_rows": self.invalid_rows,
+            "rejected_rows": self.rejected_rows,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes
+        }
+
+
+# Global writer (started in the app lifespan)
+detection_writer = DetectionWriter(
+    batch_size=settings.DETECTION_WRITER_BATCH_SIZE,
+    flush_interval=settings.DETECTION_WRITER_FLUSH_INTERVAL,
+    max_pending=settings.DETECTION_WRITER_MAX_PENDING,
+    sample_rate=settings.DETECTION_WRITER_SAMPLE_RATE,
+    put_timeout=settings.DETECTION_WRITER_PUT_TIMEOUT
+)
@@ -0,0 +1,121 @@
+# Frame ring - preallocated per-camera frame buffers shared without copies
+
+import time
+import numpy as np
+from threading import Condition
+from typing import List, Optional, Tuple
+
+
+class FrameRing:
+    """
+    Fixed ring of preallocated frame buffers for one camera
+
+    - One writer (the capture thread) decodes straight into a free slot
+    - Readers (inference, MJPEG clients, snapshots) get read-only views
+    - Every published frame gets a sequence number, readers can wait for a newer one
+    - A slot held by a reader (ref count > 0) is never overwritten
+    """
+
+    def __init__(self, num_slots: int = 6):
+        self.num_slots = max(2, num_slots)
+
+        self._buffers: List[Optional[np.ndarray]] = [None] * self.num_slots
+        self._refs = [0] * self.num_slots
+        self._seqs = [0] * self.num_slots
+        self._writing: Optional[int] = None
+        self._latest: Optional[int] = None
+        self._seq = 0
+        self._cond = Condition()
+
+        # Stats
+        self.dropped_frames = 0  # Frames skipped because every slot was busy
+
+    @property
+    def latest_seq(self) -> int:
+        """Sequence number of the latest published frame (0 = none yet)"""
+        return self._seq
+
+    def acquire_write(self) -> Tuple[Optional[int], Optional[np.ndarray]]:
+        """
+        Reserve a free slot for the writer
+        Returns (slot, buffer), buffer is None until the frame size is known.
+        Returns (None, None) if every slot is held by readers.
+        """
+        with self._cond:
+            for offset in range(1, self.num_slots + 1):
+                # Start after the latest slot: reuse the oldest frames first
+                slot = ((self._latest if self._latest is not None else -1) + offset) % self.num_slots
+                if slot != self._latest and self._refs[slot] == 0:
+                    self._writing = slot
+                    return slot, self._buffers[slot]
+
+            self.dropped_frames += 1
+            return None, None
+
+    def commit(self, slot: int, frame: np.ndarray) -> int:
+        """
+        Publish the frame written into slot, return its sequence number
+        If the capture could not decode into the slot buffer (first frame or
+        resolution change), the frame is copied into a (re)allocated buffer.
+        """
+        with self._cond:
+            buffer = self._buffers[slot]
+            if buffer is None or not np.shares_memory(buffer, frame):
+                if buffer is None or buffer.shape != frame.shape or buffer.dtype != frame.dtype:
+                    self._allocate(frame.shape, frame.dtype)
+                    buffer = self._buffers[slot]
+                np.copyto(buffer, frame)
+
+            self._seq += 1
+            self._seqs[slot] = self._seq
+            self._latest = slot
+            self._writing = None
+            self._cond.notify_all()
+            return self._seq
+
+    def abort(self, slot: int):
+        """Give back a slot reserved with acquire_write without publishing"""
+        with self._cond:
+            if self._writing == slot:
+                self._writing = None
+
+    def _allocate(self, shape, dtype):
+        """(Re)allocate every slot not held by a reader (call with lock held)"""
+        for slot in range(self.num_slots):
+            if self._refs[slot] == 0:
+                buffer = self._buffers[slot]
+                if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+                    self._buffers[slot] = np.empty(shape, dtype=dtype)
+
+    def acquire(self, after_seq: int = 0, timeout: Optional[float] = None) -> Tuple[Optional[int], int, Optional[np.ndarray]]:
+        """
+        Take a reference on the latest frame newer than after_seq
+        Waits up to timeout seconds (None = don't wait) for a new frame.
+        Returns (slot, seq, read-only view), or (None, latest_seq, None) if no newer frame.
+        Every acquired slot must be given back with release().
+        """
+        deadline = time.time() + timeout if timeout else None
+
+        with self._cond:
+            while self._latest is None or self._seq <= after_seq:
+                remaining = deadline - time.time() if deadline else 0
+                if remaining <= 0:
+                    return None, self._seq, None
+                self._cond.wait(timeout=remaining)
+
+            slot = self._latest
+            self._refs[slot] += 1
+            view = self._buffers[slot].view()
+            view.flags.writeable = False
+            return slot, self._seqs[slot], view
+
+    def release(self, slot: int):
+        """Drop a reference taken with acquire()"""
+        with self._cond:
+            if self._refs[slot] > 0:
+                self._refs[slot] -= 1
+
+    def wake_readers(self):
+        """Wake up every waiting reader (e.g. when the camera stops)"""
+        with self._cond:
+            self._cond.notify_all()
@@ -0,0 +1,289 @@
+# Inference backends - run YOLO with PyTorch, ONNX Runtime or OpenVINO
+import ast
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+
+from app.core.logger import logger
+from app.utils.detection_utils import DETECTION_COLUMNS, empty_detections, result_to_array
+
+BACKENDS = ("torch", "onnx", "openvino")
+
+
+class InferenceBackend:
+    """
+    Common interface of every backend
+    infer() takes a list of BGR frames and returns one compact (N, 6)
+    float32 array per frame, in the frame's own pixel coordinates
+    """
+
+    name = "base"
+
+    def __init__(self, model_path: str, imgsz: int = 640, num_threads: int = 0,
+                 conf: float = 0.25, iou: float = 0.7, max_det: int = 300):
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.num_threads = num_threads
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+        self.names: Dict[int, str] = {}
+
+    def infer(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+        raise NotImplementedError
+
+
+class TorchBackend(InferenceBackend):
+    """Ultralytics PyTorch model (eager)"""
+
+    name = "torch"
+
+    def __init__(self, model_path: str, **kwargs):
+        super().__init__(model_path, **kwargs)
+        from ultralytics import YOLO
+
+        if self.num_threads > 0:
+            import torch
+            torch.set_num_threads(self.num_threads)
+
+        self.model = YOLO(model_path)
+        self.names = dict(self.model.names)
+
+    def infer(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+        results = self.model(
+            frames, imgsz=self.imgsz, conf=self.conf, iou=self.iou,
+            max_det=self.max_det, verbose=False
+        )
+        return [result_to_array(result) for result in results]
+
+
+class _ExportedBackend(InferenceBackend):
+    """
+    Shared pre/post-processing of exported graphs (exported with dynamic shapes)
+    Letterbox the batch to the smallest stride-aligned shape that fits every
+    frame, one batched forward pass, then decode and class-aware NMS with
+    OpenCV (same output as the ultralytics predictor)
+    """
+
+    stride = 32
+
+    def _input_shape(self, frames: List[np.ndarray]) -> Tuple[int, int]:
+        """Smallest (height, width) multiple of stride that fits every letterboxed frame"""
+        height = width = 0
+        for frame in frames:
+            gain = min(self.imgsz / frame.shape[0], self.imgsz / frame.shape[1])
+            height = max(height, round(frame.shape[0] * gain))
+            width = max(width, round(frame.shape[1] * gain))
+        return -(-height // self.stride) * self.stride, -(-width // self.stride) * self.stride
+
+    def _letterbox(self, frame: np.ndarray, shape: Tuple[int, int]) -> Tuple[np.ndarray, float, int, int]:
+        """Resize keeping aspect ratio and pad to shape, return (CHW RGB image, gain, pad x, pad y)"""
+        height, width = frame.shape[:2]
+        gain = min(shape[0] / height, shape[1] / width)
+        new_w, new_h = round(width * gain), round(height * gain)
+        left, top = round((shape[1] - new_w) / 2 - 0.1), round((shape[0] - new_h) / 2 - 0.1)
+
+        canvas = np.full((shape[0], shape[1], 3), 114, dtype=np.uint8)
+        canvas[top:top + new_h, left:left + new_w] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+        return canvas[..., ::-1].transpose(2, 0, 1), gain, left, top
+
+    def _preprocess(self, frames: List[np.ndarray]):
+        """Build the (B, 3, H, W) float32 input tensor"""
+        shape = self._input_shape(frames)
+        batch = np.empty((len(frames), 3, shape[0], shape[1]), dtype=np.float32)
+        transforms = []
+        for index, frame in enumerate(frames):
+            image, gain, pad_x, pad_y = self._letterbox(frame, shape)
+            np.multiply(image, 1 / 255.0, out=batch[index], casting="unsafe")
+            transforms.append((gain, pad_x, pad_y, frame.shape[1], frame.shape[0]))
+        return batch, transforms
+
+    def _decode(self, output: np.ndarray, transform) -> np.ndarray:
+        """Turn one raw output into a (N, 6) array in frame coordinates"""
+        gain, pad_x, pad_y, width, height = transform
+
+        if output.shape[-1] == 6 and output.shape[0] != 4 + len(self.names):
+            # End-to-end head: rows are [x1, y1, x2, y2, conf, class], NMS already done
+            rows = output[output[:, 4] >= self.conf]
+            xyxy, scores, class_ids = rows[:, 0:4], rows[:, 4], rows[:, 5]
+        else:
+            # Raw head: (4 + num_classes, anchors) with [cx, cy, w, h, class scores...]
+            preds = output.T
+            class_scores = preds[:, 4:]
+            class_ids = class_scores.argmax(axis=1)
+            scores = class_scores[np.arange(len(preds)), class_ids]
+            keep = scores >= self.conf
+            preds, scores, class_ids = preds[keep], scores[keep], class_ids[keep]
+
+            xyxy = np.empty((len(preds), 4), dtype=np.float32)
+            xyxy[:, 0:2] = preds[:, 0:2] - preds[:, 2:4] / 2
+            xyxy[:, 2:4] = preds[:, 0:2] + preds[:, 2:4] / 2
+
+            if len(preds):
+                boxes = np.concatenate([xyxy[:, 0:2], preds[:, 2:4]], axis=1)
+                keep = cv2.dnn.NMSBoxesBatched(
+                    boxes.tolist(), scores.tolist(), class_ids.tolist(), self.conf, self.iou
+                )
+                keep = np.asarray(keep, dtype=np.int64).reshape(-1)[:self.max_det]
+                xyxy, scores, class_ids = xyxy[keep], scores[keep], class_ids[keep]
+
+        if len(xyxy) == 0:
+            return empty_detections()
+
+        # Undo letterbox and clip to the frame
+        xyxy = (xyxy - np.array([pad_x, pad_y, pad_x, pad_y], dtype=np.float32)) / gain
+        np.clip(xyxy[:, 0::2], 0, width, out=xyxy[:, 0::2])
+        np.clip(xyxy[:, 1::2], 0, height, out=xyxy[:, 1::2])
+
+        detections = np.empty((len(xyxy), DETECTION_COLUMNS), dtype=np.float32)
+        detections[:, 0:2] = (xyxy[:, 0:2] + xyxy[:, 2:4]) / 2
+        detections[:, 2:4] = xyxy[:, 2:4] - xyxy[:, 0:2]
+        detections[:, 4] = scores
+        detections[:, 5] = class_ids
+        return detections
+
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def infer(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+        if not frames:
+            return []
+        batch, transforms = self._preprocess(frames)
+        outputs = self._forward(batch)
+        return [self._decode(output, transform) for output, transform in zip(outputs, transforms)]
+
+
+class OnnxBackend(_ExportedBackend):
+    """ONNX Runtime on CPU"""
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, **kwargs):
+        super().__init__(model_path, **kwargs)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads > 0:
+            options.intra_op_num_threads = self.num_threads
+            options.inter_op_num_threads = 1
+
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.names = _parse_names(self.session.get_modelmeta().custom_metadata_map.get("names"))
+
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVinoBackend(_ExportedBackend):
+    """OpenVINO runtime on CPU"""
+
+    name = "openvino"
+
+    def __init__(self, model_path: str, **kwargs):
+        super().__init__(model_path, **kwargs)
+        import openvino as ov
+
+        core = ov.Core()
+        model_dir = Path(model_path)
+        model = core.read_model(str(next(model_dir.glob("*.xml"))))
+
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if self.num_threads > 0:
+            config["INFERENCE_NUM_THREADS"] = self.num_threads
+        self.compiled = core.compile_model(model, "CPU", config)
+        self.output = self.compiled.output(0)
+
+        names = None
+        if model.has_rt_info(["model_info", "names"]):
+            names = model.get_rt_info(["model_info", "names"]).astype(str)
+        if names is None and (model_dir / "metadata.yaml").exists():
+            import yaml
+            with open(model_dir / "metadata.yaml") as f:
+                names = (yaml.safe_load(f) or {}).get("names")
+        self.names = _parse_names(names)
+
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        return self.compiled([batch])[self.output]
+
+
+def _parse_names(names) -> Dict[int, str]:
+    """Class names from export metadata (dict or its string repr)"""
+    if isinstance(names, str):
+        try:
+            names = ast.literal_eval(names)
+        except (ValueError, SyntaxError):
+            names = None
+    if not isinstance(names, dict):
+        logger.warning("Exported model has no class names, using class ids")
+        return {}
+    return {int(cls): str(name) for cls, name in names.items()}
+
+
+def exported_model_path(model_path: str, backend: str, imgsz: int) -> Path:
+    """Cache location of an exported model (next to the .pt, keyed by imgsz)"""
+    path = Path(model_path)
+    if backend == "onnx":
+        return path.with_name(f"{path.stem}_{imgsz}.onnx")
+    return path.with_name(f"{path.stem}_{imgsz}_openvino_model")
+
+
+def export_model(model_path: str, backend: str, imgsz: int = 640) -> Path:
+    """
+    Export a .pt checkpoint for a backend once, reuse the cached artifact after
+    (re-exported when the checkpoint is newer than the cache)
+    """
+    target = exported_model_path(model_path, backend, imgsz)
+    if target.exists() and target.stat().st_mtime >= os.path.getmtime(model_path):
+        return target
+
+    from ultralytics import YOLO
+
+    logger.info(f"Exporting {model_path} to {backend} (imgsz={imgsz})...")
+    exported = Path(YOLO(model_path).export(format=backend, imgsz=imgsz, dynamic=True, verbose=False))
+
+    # Move the artifact to its cache name (ultralytics writes <stem>.onnx / <stem>_openvino_model)
+    if exported != target:
+        if target.is_dir():
+            shutil.rmtree(target)
+        elif target.exists():
+            target.unlink()
+        shutil.move(str(exported), str(target))
+
+    logger.info(f"[OK] Exported model cached at {target}")
+    return target
+
+
+def create_backend(
+    model_path: str,
+    backend: str = "torch",
+    imgsz: int = 640,
+    num_threads: int = 0,
+    conf: Optional[float] = None
+) -> InferenceBackend:
+    """
+    Create an inference backend for a .pt checkpoint
+    Exported backends fall back to PyTorch if export or loading fails.
+    """
+    kwargs = {"imgsz": imgsz, "num_threads": num_threads}
+    if conf is not None:
+        kwargs["conf"] = conf
+
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown inference backend '{backend}', using torch")
+        backend = "torch"
+
+    if backend != "torch" and Path(model_path).suffix == ".pt":
+        try:
+            exported = export_model(model_path, backend, imgsz)
+            backend_class = OnnxBackend if backend == "onnx" else OpenVinoBackend
+            return backend_class(str(exported), **kwargs)
+        except Exception as e:
+            logger.error(f"[ERROR] {backend} backend unavailable, falling back to torch: {e}")
+
+    return TorchBackend(model_path, **kwargs)
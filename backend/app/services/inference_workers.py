@@ -0,0 +1,248 @@
+# Inference worker processes - run YOLO outside the API process
+
+import multiprocessing as mp
+import queue
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+
+from app.core.logger import logger
+
+
+def _worker_main(
+    worker_id: int,
+    model_path: str,
+    backend: str,
+    imgsz: int,
+    shm_name: str,
+    slot_bytes: int,
+    num_threads: int,
+    requests,
+    responses,
+    backend_factory: Optional[Callable] = None
+):
+    """
+    Worker process entry point
+    Loads its own model copy, then reads frames from shared memory slots
+    and sends back compact (N, 6) detection arrays
+    """
+    if backend_factory is None:
+        from app.services.inference_backends import create_backend as backend_factory
+
+    # Attach to the ring created by the parent (the parent unlinks it)
+    shm = shared_memory.SharedMemory(name=shm_name)
+
+    try:
+        model = backend_factory(model_path, backend, imgsz, num_threads)
+        responses.put(("ready", dict(model.names), None))
+    except Exception as e:
+        responses.put(("ready", None, str(e)))
+        shm.close()
+        return
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+
+        request_id, frames_meta = request
+        try:
+            # Read-only views over the shared slots (no copy)
+            frames = []
+            for slot, shape in frames_meta:
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                frame.flags.writeable = False
+                frames.append(frame)
+            detections = model.infer(frames)
+            del frames
+            responses.put((request_id, detections, None))
+        except Exception as e:
+            responses.put((request_id, None, str(e)))
+
+    shm.close()
+
+
+class _WorkerHandle:
+    """One worker process with its own shared memory ring and queues"""
+
+    def __init__(self, worker_id: int, ctx, slots: int, slot_bytes: int, backend_factory: Optional[Callable] = None):
+        self.worker_id = worker_id
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.ctx = ctx
+        self.backend_factory = backend_factory
+
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.requests = None
+        self.responses = None
+        self.process = None
+        self.names: Optional[Dict[int, str]] = None
+        self.request_id = 0
+
+    def spawn(self, model_path: str, backend: str, imgsz: int, num_threads: int):
+        """Start (or restart) the worker process"""
+        self.requests = self.ctx.Queue()
+        self.responses = self.ctx.Queue()
+        self.names = None
+        self.process = self.ctx.Process(
+            target=_worker_main,
+            args=(
+                self.worker_id, model_path, backend, imgsz, self.shm.name, self.slot_bytes,
+                num_threads, self.requests, self.responses, self.backend_factory
+            ),
+            daemon=True
+        )
+        self.process.start()
+
+    def wait_ready(self, timeout: float):
+        """Wait for the worker to load its model"""
+        tag, names, error = self.responses.get(timeout=timeout)
+        if error:
+            raise RuntimeError(f"Inference worker {self.worker_id} failed to load model: {error}")
+        self.names = names
+
+    def infer(self, frames: List[np.ndarray], timeout: float) -> List[np.ndarray]:
+        """Copy frames into the ring slots and wait for detections"""
+        if len(frames) > self.slots:
+            raise ValueError(f"Batch of {len(frames)} frames exceeds {self.slots} shared memory slots")
+
+        frames_meta = []
+        for slot, frame in enumerate(frames):
+            frame = np.ascontiguousarray(frame, dtype=np.uint8)
+            if frame.nbytes > self.slot_bytes:
+                raise ValueError(
+                    f"Frame of {frame.nbytes} bytes does not fit in a {self.slot_bytes} byte slot "
+                    "(raise INFERENCE_MAX_FRAME_BYTES)"
+                )
+            target = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+            target[...] = frame
+            frames_meta.append((slot, frame.shape))
+
+        self.request_id += 1
+        self.requests.put((self.request_id, frames_meta))
+
+        while True:
+            request_id, detections, error = self.responses.get(timeout=timeout)
+            if request_id == self.request_id:
+                break
+            # Answer of an earlier request (not expected: a worker that times out is restarted)
+
+        if error:
+            raise RuntimeError(error)
+        return detections
+
+    def restart(self, model_path: str, backend: str, imgsz: int, num_threads: int, startup_timeout: float):
+        """
+        Kill the worker and start a fresh one
+        A worker that missed its deadline may still be reading the shared
+        slots, so it must be gone before the next request overwrites them.
+        """
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+        for old_queue in (self.requests, self.responses):
+            old_queue.cancel_join_thread()  # May hold data the dead worker never read
+            old_queue.close()
+        self.spawn(model_path, backend, imgsz, num_threads)
+        self.wait_ready(startup_timeout)
+
+    def stop(self):
+        """Stop the worker process"""
+        if self.process is not None and self.process.is_alive():
+            self.requests.put(None)
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.process = None
+
+    def release(self):
+        """Free the shared memory segment"""
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ProcessInferencePool:
+    """
+    Pool of inference processes, each with its own model copy
+    Frames reach the workers through shared memory slots (one ring per
+    worker), detections come back as compact (N, 6) float32 arrays
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        backend: str = "torch",
+        imgsz: int = 640,
+        num_processes: int = 2,
+        slots_per_process: int = 8,
+        max_frame_bytes: int = 1920 * 1080 * 3,
+        threads_per_process: int = 0,
+        timeout: float = 30.0,
+        startup_timeout: float = 300.0,
+        backend_factory: Optional[Callable] = None
+    ):
+        self.model_path = model_path
+        self.backend = backend
+        self.imgsz = imgsz
+        self.num_processes = max(1, num_processes)
+        self.slots_per_process = max(1, slots_per_process)
+        self.max_frame_bytes = max_frame_bytes
+        self.threads_per_process = threads_per_process
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        # Picklable (model_path, backend, imgsz, num_threads) -> backend, create_backend by default
+        self.backend_factory = backend_factory
+
+        # Spawn (not fork): torch and OpenCV threads don't survive fork
+        self._ctx = mp.get_context("spawn")
+        self._workers: List[_WorkerHandle] = []
+
+    def start(self):
+        """Create shared memory rings and spawn worker processes"""
+        for worker_id in range(self.num_processes):
+            worker = _WorkerHandle(
+                worker_id, self._ctx, self.slots_per_process, self.max_frame_bytes, self.backend_factory
+            )
+            worker.spawn(self.model_path, self.backend, self.imgsz, self.threads_per_process)
+            self._workers.append(worker)
+
+        logger.info(
+            f"Started {self.num_processes} inference processes "
+            f"({self.slots_per_process} x {self.max_frame_bytes / 1e6:.1f}MB shared slots each)"
+        )
+
+    def wait_ready(self, worker_id: int) -> Dict[int, str]:
+        """Block until a worker has loaded its model, return class names"""
+        worker = self._workers[worker_id]
+        worker.wait_ready(self.startup_timeout)
+        logger.info(f"Inference process {worker_id} ready (pid {worker.process.pid})")
+        return worker.names
+
+    def infer(self, worker_id: int, frames: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Run a batch on one worker (call from a single thread per worker)
+        Restarts the worker process if it died or did not answer in time
+        """
+        worker = self._workers[worker_id]
+        try:
+            return worker.infer(frames, self.timeout)
+        except queue.Empty:
+            if worker.process is None or not worker.process.is_alive():
+                logger.error(f"Inference process {worker_id} died, restarting")
+            else:
+                logger.error(f"Inference process {worker_id} timed out, restarting")
+            worker.restart(self.model_path, self.backend, self.imgsz, self.threads_per_process, self.startup_timeout)
+            raise TimeoutError(f"Inference process {worker_id} did not answer in {self.timeout}s")
+
+    def stop(self):
+        """Stop all workers and free shared memory"""
+        for worker in self._workers:
+            try:
+                worker.stop()
+            finally:
+                worker.release()
+        self._workers = []
+        logger.info("Stopped inference processes")
@@ -0,0 +1,113 @@
+# Motion gate - skip inference when nothing changes inside slot regions
+from typing import Dict, Optional
+import cv2
+import numpy as np
+
+from app.services.slot_cache import SlotLayout
+
+
+class MotionGate:
+    """
+    Cheap change detector deciding whether a frame needs inference
+
+    Compares a downscaled grayscale frame with the frame of the last
+    inference, counting changed pixels inside each slot polygon only.
+    Inference runs when some slot changed enough, for a few more frames
+    after that (so smoothing can settle) and at least every force_interval.
+    """
+
+    def __init__(
+        self,
+        width: int = 160,
+        pixel_threshold: int = 25,
+        min_changed_ratio: float = 0.02,
+        force_interval: float = 30.0,
+        settle_frames: int = 3
+    ):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_ratio = min_changed_ratio
+        self.force_interval = force_interval
+        self.settle_frames = settle_frames
+
+        # Reference frame (at last inference)
+        self._reference: Optional[np.ndarray] = None
+        self._last_infer_time = 0.0
+        self._settle_left = 0
+
+        # Slot label image at low resolution (0 = outside every slot)
+        self._labels: Optional[np.ndarray] = None
+        self._label_counts: Optional[np.ndarray] = None
+        self._labels_key = None
+
+        # Stats
+        self.inferences = 0
+        self.skipped = 0
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        """Downscale, convert to grayscale and blur a frame"""
+        height, width = frame.shape[:2]
+        small_height = max(1, round(height * self.width / width))
+        small = cv2.resize(frame, (self.width, small_height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _build_labels(self, layout: Optional[SlotLayout], frame_shape, small_shape):
+        """Rasterize slot polygons into a low-resolution label image"""
+        labels = np.zeros(small_shape, dtype=np.int32)
+        scale = small_shape[1] / frame_shape[1]
+
+        if layout is None or len(layout) == 0:
+            # No slots known: watch the whole frame
+            labels[...] = 1
+        else:
+            for index, polygon in enumerate(layout.polygons):
+                points = np.round(polygon * scale).astype(np.int32)
+                cv2.fillPoly(labels, [points], index + 1)
+
+        self._labels = labels
+        self._label_counts = np.bincount(labels.ravel(), minlength=labels.max() + 1)
+
+    def should_infer(self, frame: np.ndarray, layout: Optional[SlotLayout], now: float) -> bool:
+        """Decide if a frame needs inference (call once per candidate frame)"""
+        small = self._prepare(frame)
+
+        labels_key = (layout.version if layout else None, len(layout) if layout else 0, frame.shape[:2])
+        if labels_key != self._labels_key or self._labels.shape != small.shape:
+            self._build_labels(layout, frame.shape, small.shape)
+            self._labels_key = labels_key
+            self._reference = None  # Layout changed: force inference
+
+        changed = self._reference is None or (now - self._last_infer_time) >= self.force_interval
+
+        if not changed:
+            moving = cv2.absdiff(small, self._reference) > self.pixel_threshold
+            changed_per_slot = np.bincount(self._labels[moving], minlength=len(self._label_counts))[1:]
+            slot_pixels = np.maximum(self._label_counts[1:], 1)
+            changed = bool(np.any(changed_per_slot / slot_pixels >= self.min_changed_ratio))
+
+        if changed:
+            self._settle_left = self.settle_frames
+        elif self._settle_left > 0:
+            # Keep inferring a few frames after motion so the status can settle
+            self._settle_left -= 1
+            changed = True
+
+        if not changed:
+            self.skipped += 1
+            return False
+
+        self._reference = small
+        self._last_infer_time = now
+        self.inferences += 1
+        return True
+
+    def get_stats(self) -> Dict:
+        """Get gate statistics"""
+        total = self.inferences + self.skipped
+        return {
+            "inferences": self.inferences,
+            "skipped": self.skipped,
+            "skip_rate": round(self.skipped / total, 3) if total else 0.0
+        }
@@ -0,0 +1,190 @@
+# Occupancy rollups - pre-aggregated occupied time per slot/camera in minute/hour/day buckets
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.occupancy_rollup import SlotOccupancyRollup, CameraOccupancyRollup
+
+# Bucket name -> size in seconds (smallest first)
+BUCKET_SIZES = {"minute": 60, "hour": 3600, "day": 86400}
+
+UPSERT_BATCH_SIZE = 1000
+
+_EPOCH = datetime(1970, 1, 1)
+
+# (slot_id, camera_id, start, end) of an occupied period
+OccupiedPeriod = Tuple[int, int, datetime, datetime]
+# (slot_id, camera_id, time) of a status change
+StatusChange = Tuple[int, int, datetime]
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """Naive UTC datetime (as stored in DB) from an aware or naive UTC datetime"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def bucket_floor(value: datetime, bucket_seconds: int) -> datetime:
+    """Start of the bucket containing value (naive UTC)"""
+    value = to_utc_naive(value)
+    offset = int((value - _EPOCH).total_seconds()) // bucket_seconds * bucket_seconds
+    return _EPOCH + timedelta(seconds=offset)
+
+
+def split_period(start: datetime, end: datetime, bucket_seconds: int) -> List[Tuple[datetime, float]]:
+    """(bucket_start, seconds) of every bucket overlapped by [start, end)"""
+    start, end = to_utc_naive(start), to_utc_naive(end)
+    parts = []
+    bucket = bucket_floor(start, bucket_seconds)
+    step = timedelta(seconds=bucket_seconds)
+    while bucket < end:
+        bucket_end = bucket + step
+        seconds = (min(end, bucket_end) - max(start, bucket)).total_seconds()
+        if seconds > 0:
+            parts.append((bucket, seconds))
+        bucket = bucket_end
+    return parts
+
+
+def rollup_deltas(
+        periods: Iterable[OccupiedPeriod],
+        changes: Iterable[StatusChange]
+) -> Tuple[Dict[Tuple, List], Dict[Tuple, List]]:
+    """
+    Aggregate occupied periods and status changes into rollup increments
+    Returns (slot deltas, camera deltas), each
+    (id, bucket_seconds, bucket_start) -> [occupied_seconds, changes]
+    """
+    slot_deltas: Dict[Tuple, List] = {}
+    camera_deltas: Dict[Tuple, List] = {}
+
+    for slot_id, camera_id, start, end in periods:
+        for bucket_seconds in BUCKET_SIZES.values():
+            for bucket_start, seconds in split_period(start, end, bucket_seconds):
+                slot_deltas.setdefault((slot_id, bucket_seconds, bucket_start), [0.0, 0])[0] += seconds
+                camera_deltas.setdefault((camera_id, bucket_seconds, bucket_start), [0.0, 0])[0] += seconds
+
+    for slot_id, camera_id, changed_at in changes:
+        for bucket_seconds in BUCKET_SIZES.values():
+            bucket_start = bucket_floor(changed_at, bucket_seconds)
+            slot_deltas.setdefault((slot_id, bucket_seconds, bucket_start), [0.0, 0])[1] += 1
+            camera_deltas.setdefault((camera_id, bucket_seconds, bucket_start), [0.0, 0])[1] += 1
+
+    return slot_deltas, camera_deltas
+
+
+def _upsert_statement(model, id_column: str, rows: List[Dict], dialect: str):
+    """Multi-row insert adding to the counters of existing buckets"""
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(model).values(rows)
+        return stmt.on_duplicate_key_update(
+            occupied_seconds=model.occupied_seconds + stmt.inserted.occupied_seconds,
+            changes=model.changes + stmt.inserted.changes
+        )
+
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(model).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[id_column, "bucket_seconds", "bucket_start"],
+            set_={
+                "occupied_seconds": model.occupied_seconds + stmt.excluded.occupied_seconds,
+                "changes": model.changes + stmt.excluded.changes
+            }
+        )
+
+    raise ValueError(f"Occupancy rollups are not supported on {dialect}")
+
+
+async def write_rollups(
+        periods: List[OccupiedPeriod],
+        changes: List[StatusChange],
+        db: AsyncSession
+) -> int:
+    """
+    Add occupied periods and status changes to the rollup tables (commit is done by caller)
+    One multi-row upsert per table (per UPSERT_BATCH_SIZE buckets), returns buckets written
+    """
+    if not periods and not changes:
+        return 0
+
+    slot_deltas, camera_deltas = rollup_deltas(periods, changes)
+    dialect = (await db.connection()).dialect.name
+
+    written = 0
+    for model, id_column, deltas in (
+            (SlotOccupancyRollup, "slot_id", slot_deltas),
+            (CameraOccupancyRollup, "camera_id", camera_deltas)
+    ):
+        rows = [
+            {
+                id_column: row_id,
+                "bucket_seconds": bucket_seconds,
+                "bucket_start": bucket_start,
+                "occupied_seconds": seconds,
+                "changes": change_count
+            }
+            for (row_id, bucket_seconds, bucket_start), (seconds, change_count) in sorted(deltas.items())
+        ]
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            await db.execute(_upsert_statement(model, id_column, rows[start:start + UPSERT_BATCH_SIZE], dialect))
+        written += len(rows)
+    return written
+
+
+def choose_bucket(start: datetime, end: datetime, max_buckets: int) -> str:
+    """Smallest bucket giving at most max_buckets points over [start, end) (day otherwise)"""
+    span = (to_utc_naive(end) - to_utc_naive(start)).total_seconds()
+    for name, bucket_seconds in BUCKET_SIZES.items():
+        if span / bucket_seconds <= max_buckets:
+            return name
+    return "day"
+
+
+async def get_occupancy_history(
+        start: datetime,
+        end: datetime,
+        bucket: str,
+        db: AsyncSession,
+        camera_id: Optional[int] = None,
+        slot_id: Optional[int] = None
+) -> List[Dict]:
+    """
+    Occupied seconds and status changes per bucket over [start, end), read from the rollups only
+    Scope: one slot, one camera, or every camera (summed). Buckets without
+    rows are returned with zeros so charts get a continuous series.
+    """
+    bucket_seconds = BUCKET_SIZES[bucket]
+    first = bucket_floor(start, bucket_seconds)
+    end = to_utc_naive(end)
+
+    if slot_id is not None:
+        model, scope = SlotOccupancyRollup, SlotOccupancyRollup.slot_id == slot_id
+    else:
+        model = CameraOccupancyRollup
+        scope = CameraOccupancyRollup.camera_id == camera_id if camera_id is not None else None
+
+    query = (
+        select(model.bucket_start, func.sum(model.occupied_seconds), func.sum(model.changes))
+        .where(model.bucket_seconds == bucket_seconds, model.bucket_start >= first, model.bucket_start < end)
+        .group_by(model.bucket_start)
+    )
+    if scope is not None:
+        query = query.where(scope)
+    result = await db.execute(query)
+    totals = {to_utc_naive(bucket_start): (seconds or 0.0, changes or 0) for bucket_start, seconds, changes in result.all()}
+
+    history = []
+    step = timedelta(seconds=bucket_seconds)
+    bucket_start = first
+    while bucket_start < end:
+        seconds, changes = totals.get(bucket_start, (0.0, 0))
+        history.append({"bucket_start": bucket_start, "occupied_seconds": float(seconds), "changes": int(changes)})
+        bucket_start += step
+    return history
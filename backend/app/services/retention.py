@@ -0,0 +1,312 @@
+# Retention job - drop expired time partitions of detections/slot_events, prune fine rollups, checkpoint occupancy
+import asyncio
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import column, delete, insert, select, table, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import async_session_maker
+from app.core.logger import logger
+from app.core.settings import settings
+from app.models.occupancy_rollup import SlotOccupancyRollup, CameraOccupancyRollup
+from app.models.slot_event import SlotEvent
+from app.services.occupancy_rollup import BUCKET_SIZES
+from app.services.slot_service import checkpoint_occupied_slots
+from app.services.slot_state import slot_state
+from app.utils.partition_utils import (
+    MAXVALUE_PARTITION,
+    PARTITIONED_TABLES,
+    expired_partitions,
+    missing_bounds,
+    next_period,
+    parse_partition_bound,
+    partition_definitions,
+    partition_name,
+    period_start
+)
+
+
+async def list_partitions(table_name: str, db: AsyncSession) -> List[Tuple[str, Optional[date]]]:
+    """(name, upper bound date or None for MAXVALUE) of every partition of a MySQL table, in order"""
+    result = await db.execute(
+        text(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        ),
+        {"table": table_name}
+    )
+    return [(name, parse_partition_bound(description)) for name, description in result.all()]
+
+
+async def carry_forward_open_rows(table_name: str, before: date, db: AsyncSession) -> int:
+    """
+    Move still-open slot events older than before into the kept history (commit is done by caller)
+    Each one is closed at before and continued by a copy starting at before,
+    so expired history can be dropped whole while every slot keeps the
+    event of its current status. Returns the number of rows carried forward
+    """
+    if table_name != SlotEvent.__tablename__:
+        return 0
+    start = datetime.combine(before, datetime.min.time())
+    # Locked until commit: a status change waits instead of closing a row being moved
+    result = await db.execute(
+        select(SlotEvent.id, SlotEvent.slot_id, SlotEvent.old_status, SlotEvent.new_status)
+        .where(SlotEvent.end_time.is_(None), SlotEvent.start_time < start)
+        .with_for_update()
+    )
+    rows = result.all()
+    if not rows:
+        return 0
+
+    await db.execute(
+        update(SlotEvent)
+        .where(SlotEvent.id.in_([row.id for row in rows]))
+        .values(end_time=start)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(insert(SlotEvent).values([
+        {
+            "slot_id": row.slot_id,
+            "old_status": row.old_status,
+            "new_status": row.new_status,
+            "start_time": start,
+            "end_time": None
+        }
+        for row in rows
+    ]))
+    return len(rows)
+
+
+async def apply_retention(
+        table_name: str,
+        retention_days: int,
+        db: AsyncSession,
+        partitions_ahead: int = 3,
+        today: Optional[date] = None
+) -> Dict:
+    """
+    Enforce retention on one time-partitioned table (commit is done by caller)
+    MySQL partitioned tables: drop every partition older than the cutoff in
+    one ALTER TABLE (no row-by-row delete) and pre-create upcoming partitions.
+    Other backends / unpartitioned tables: one bulk range DELETE.
+    Still-open slot events in the expired range are carried forward first
+    (see carry_forward_open_rows), so a slot that never changes status
+    keeps its current event without holding back retention.
+    """
+    column_name, unit = PARTITIONED_TABLES[table_name]
+    today = today or datetime.now(timezone.utc).date()
+    cutoff = today - timedelta(days=retention_days) if retention_days > 0 else None
+    summary = {"dropped_partitions": [], "added_partitions": [], "deleted_rows": 0, "carried_rows": 0}
+
+    connection = await db.connection()
+    partitions = await list_partitions(table_name, db) if connection.dialect.name == "mysql" else []
+
+    if not partitions:
+        if cutoff is not None:
+            summary["carried_rows"] = await carry_forward_open_rows(table_name, cutoff, db)
+            target = table(table_name, column(column_name))
+            result = await db.execute(delete(target).where(target.c[column_name] < cutoff))
+            summary["deleted_rows"] = result.rowcount
+        return summary
+
+    # Drop expired partitions (whole partitions only, the one holding the cutoff stays)
+    if cutoff is not None:
+        expired = expired_partitions(partitions, cutoff)
+        if len(expired) == len(partitions):
+            expired = expired[:-1]  # MySQL keeps at least one partition
+        if expired:
+            # Open rows of the expired partitions move to the first kept one (the DDL commits it on MySQL)
+            kept_from = max(bound for name, bound in partitions if name in expired)
+            summary["carried_rows"] = await carry_forward_open_rows(table_name, kept_from, db)
+            await db.execute(text(f"ALTER TABLE `{table_name}` DROP PARTITION {', '.join(expired)}"))
+            summary["dropped_partitions"] = expired
+
+    # Keep partitions_ahead periods ahead, split off the (empty) MAXVALUE partition
+    until = period_start(today, unit)
+    for _ in range(partitions_ahead):
+        until = next_period(until, unit)
+    bounds = missing_bounds(partitions, until, unit)
+    if bounds and any(name == MAXVALUE_PARTITION for name, _ in partitions):
+        await db.execute(text(
+            f"ALTER TABLE `{table_name}` REORGANIZE PARTITION {MAXVALUE_PARTITION} "
+            f"INTO ({partition_definitions(bounds)})"
+        ))
+        summary["added_partitions"] = [partition_name(bound) for bound in bounds]
+
+    return summary
+
+
+async def apply_rollup_retention(
+        retention_days: Dict[int, int],
+        db: AsyncSession,
+        today: Optional[date] = None
+) -> int:
+    """
+    Delete rollup buckets older than their retention (commit is done by caller)
+    retention_days: bucket_seconds -> days (0 = forever), one bulk DELETE per table and size
+    Returns the number of rows deleted
+    """
+    today = today or datetime.now(timezone.utc).date()
+    deleted = 0
+    for bucket_seconds, days in retention_days.items():
+        if days <= 0:
+            continue
+        cutoff = datetime.combine(today - timedelta(days=days), datetime.min.time())
+        for model in (SlotOccupancyRollup, CameraOccupancyRollup):
+            result = await db.execute(
+                delete(model).where(model.bucket_seconds == bucket_seconds, model.bucket_start < cutoff)
+            )
+            deleted += result.rowcount
+    return deleted
+
+
+class RetentionJob:
+    """
+    Periodic retention of the append-only history tables
+    Runs apply_retention on every partitioned table and prunes the minute/hour
+    occupancy rollups each interval seconds (first run right after start).
+    Without the slot state store, also adds the time of still-occupied slots
+    to the rollups every checkpoint_interval seconds (0 = never), as the
+    store does for its own slots.
+    """
+
+    def __init__(
+            self,
+            retention_days: Dict[str, int],
+            interval: float = 3600.0,
+            partitions_ahead: int = 3,
+            rollup_retention_days: Optional[Dict[int, int]] = None,
+            checkpoint_interval: float = 0.0
+    ):
+        self.retention_days = retention_days
+        self.rollup_retention_days = rollup_retention_days or {}
+        self.interval = interval
+        self.partitions_ahead = partitions_ahead
+        self.checkpoint_interval = checkpoint_interval
+        self._task: Optional[asyncio.Task] = None
+        self._checkpoint_task: Optional[asyncio.Task] = None
+
+        # Stats
+        self.runs = 0
+        self.failed_runs = 0
+        self.last_run_time = 0.0
+        self.last_summary: Dict[str, Dict] = {}
+        self.checkpoints = 0
+        self.checkpointed_slots = 0
+        self.failed_checkpoints = 0
+
+    async def run_once(self) -> Dict[str, Dict]:
+        """Apply retention to every table, return a summary per table"""
+        summary = {}
+        for table_name, days in self.retention_days.items():
+            try:
+                async with async_session_maker() as db:
+                    summary[table_name] = await apply_retention(table_name, days, db, self.partitions_ahead)
+                    await db.commit()
+            except Exception as e:
+                self.failed_runs += 1
+                summary[table_name] = {"error": str(e)}
+                logger.error(f"[ERROR] Retention failed for {table_name}: {e}")
+                continue
+
+            result = summary[table_name]
+            if result["dropped_partitions"] or result["added_partitions"] or result["deleted_rows"] or result["carried_rows"]:
+                logger.info(f"[OK] Retention {table_name}: {result}")
+
+        if self.rollup_retention_days:
+            try:
+                async with async_session_maker() as db:
+                    deleted = await apply_rollup_retention(self.rollup_retention_days, db)
+                    await db.commit()
+                summary["occupancy_rollups"] = {"deleted_rows": deleted}
+                if deleted:
+                    logger.info(f"[OK] Retention occupancy rollups: {deleted} buckets deleted")
+            except Exception as e:
+                self.failed_runs += 1
+                summary["occupancy_rollups"] = {"error": str(e)}
+                logger.error(f"[ERROR] Retention failed for occupancy rollups: {e}")
+
+        self.runs += 1
+        self.last_run_time = time.time()
+        self.last_summary = summary
+        return summary
+
+    async def checkpoint_once(self) -> int:
+        """Add the time of still-occupied slots to the rollups (skipped while the slot state store does it)"""
+        if slot_state.loaded:
+            return 0
+        try:
+            async with async_session_maker() as db:
+                count = await checkpoint_occupied_slots(db)
+                await db.commit()
+        except Exception as e:
+            self.failed_checkpoints += 1
+            logger.error(f"[ERROR] Occupancy checkpoint failed: {e}")
+            return 0
+        self.checkpoints += 1
+        self.checkpointed_slots += count
+        return count
+
+    async def _run(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    async def _run_checkpoints(self):
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            await self.checkpoint_once()
+
+    def start(self):
+        """Start the periodic job (in the running event loop)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"[OK] Retention job started (every {self.interval:.0f}s, {self.retention_days} days)")
+        if self._checkpoint_task is None and self.checkpoint_interval > 0:
+            self._checkpoint_task = asyncio.create_task(self._run_checkpoints())
+
+    async def stop(self):
+        """Stop the periodic job (occupied time is checkpointed once more up to shutdown)"""
+        checkpointing = self._checkpoint_task is not None
+        for task in (self._task, self._checkpoint_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._checkpoint_task = None
+        if checkpointing:
+            await self.checkpoint_once()
+
+    def get_stats(self) -> Dict:
+        """Get job statistics"""
+        return {
+            "running": self._task is not None,
+            "runs": self.runs,
+            "failed_runs": self.failed_runs,
+            "last_run_time": self.last_run_time,
+            "last_summary": self.last_summary,
+            "checkpoints": self.checkpoints,
+            "checkpointed_slots": self.checkpointed_slots,
+            "failed_checkpoints": self.failed_checkpoints
+        }
+
+
+# Global job (started in the app lifespan), nothing is deleted unless RETENTION_ENABLED
+retention_job = RetentionJob(
+    retention_days={
+        "detections": settings.DETECTION_RETENTION_DAYS if settings.RETENTION_ENABLED else 0,
+        "slot_events": settings.SLOT_EVENT_RETENTION_DAYS if settings.RETENTION_ENABLED else 0
+    },
+    interval=settings.RETENTION_INTERVAL,
+    partitions_ahead=settings.RETENTION_PARTITIONS_AHEAD,
+    rollup_retention_days={
+        BUCKET_SIZES["minute"]: settings.ROLLUP_MINUTE_RETENTION_DAYS,
+        BUCKET_SIZES["hour"]: settings.ROLLUP_HOUR_RETENTION_DAYS
+    } if settings.RETENTION_ENABLED else {},
+    checkpoint_interval=settings.ROLLUP_CHECKPOINT_INTERVAL
+)
@@ -0,0 +1,219 @@
+# Slot cache - per-camera slot layouts kept in memory
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.geometry import Polygon
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.slot import Slot
+from app.models.camera import Camera
+from app.utils.polygon_utils import (
+    SlotMasks,
+    build_slot_masks,
+    build_slot_warps,
+    polygon_from_points,
+    transform_points_homography,
+    unpack_polygons
+)
+from app.core.logger import logger
+
+# Above this many detections the SQL prefilter uses their union bbox
+MAX_PREFILTER_BOXES = 32
+
+
+class SlotLayout:
+    """
+    Slot geometry of one camera (read-only snapshot)
+    Built once per layout version: prepared Shapely polygons, areas,
+    bounding boxes and an STRtree, so matching needs no DB and no
+    geometry construction per frame.
+    With a homography, matching geometry (geometries, areas, bounds, tree)
+    is in ground-plane coordinates; polygons stay in frame coordinates.
+    """
+
+    def __init__(
+        self,
+        camera_id: int,
+        version: int,
+        slot_ids: List[int],
+        polygons: List[np.ndarray],
+        geometries: Optional[List[Polygon]] = None,
+        homography: Optional[np.ndarray] = None
+    ):
+        self.camera_id = camera_id
+        self.version = version
+        self.slot_ids = slot_ids
+        self.polygons = polygons  # One (K, 2) float32 array per slot (frame coordinates)
+        self.homography = homography  # 3x3 frame -> ground plane, or None
+
+        if homography is not None:
+            geometries = [polygon_from_points(transform_points_homography(points, homography)) for points in polygons]
+        elif geometries is None:
+            geometries = [polygon_from_points(points) for points in polygons]
+        self.geometries = np.array(geometries, dtype=object)
+        shapely.prepare(self.geometries)
+        self.areas = shapely.area(self.geometries)  # (S,) float64
+        self.bounds = shapely.bounds(self.geometries).reshape(-1, 4)  # (S, 4) [x_min, y_min, x_max, y_max]
+        self.tree = STRtree(self.geometries)
+        self._masks: Dict[float, SlotMasks] = {}
+        self._warps: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.slot_ids)
+
+    def query(self, geometry) -> np.ndarray:
+        """Indices of slots whose bounding box intersects a geometry"""
+        return self.tree.query(geometry)
+
+    def get_masks(self, scale: float) -> SlotMasks:
+        """Rasterized slot masks at scale (built on first use, kept with this layout version)"""
+        masks = self._masks.get(scale)
+        if masks is None:
+            masks = build_slot_masks(self.polygons, scale)
+            self._masks[scale] = masks
+        return masks
+
+    def get_warps(self, size: int) -> np.ndarray:
+        """(S, 3, 3) slot-to-patch perspective transforms (built on first use, kept with this layout version)"""
+        warps = self._warps.get(size)
+        if warps is None:
+            warps = build_slot_warps(self.polygons, size)
+            self._warps[size] = warps
+        return warps
+
+
+class SlotCache:
+    """
+    Per-camera slot layouts, loaded from DB on first use
+    Slot routes call invalidate() on create/delete, which bumps the camera's
+    version so every consumer rebuilds its derived data (masks, ROIs, ...)
+    """
+
+    def __init__(self):
+        self._layouts: Dict[int, SlotLayout] = {}
+        self._versions: Dict[int, int] = {}
+        self._lock = Lock()
+
+    def version(self, camera_id: int) -> int:
+        """Current layout version of a camera"""
+        return self._versions.get(camera_id, 0)
+
+    def get_cached(self, camera_id: int) -> Optional[SlotLayout]:
+        """Get the cached layout without touching the DB (None if not loaded)"""
+        return self._layouts.get(camera_id)
+
+    async def get_layout(self, camera_id: int, db: AsyncSession) -> SlotLayout:
+        """Get the layout of a camera, loading it from DB if needed"""
+        layout = self._layouts.get(camera_id)
+        if layout is not None:
+            return layout
+
+        version = self.version(camera_id)
+        layout = await _load_layout(camera_id, version, Slot.camera_id == camera_id, db)
+
+        with self._lock:
+            # Don't cache a layout that was invalidated while loading
+            if self.version(camera_id) == version:
+                self._layouts[camera_id] = layout
+
+        logger.debug(f"Loaded slot layout for camera {camera_id}: {len(layout)} slots (version {version})")
+        return layout
+
+    async def load_candidates(self, camera_id: int, boxes: np.ndarray, db: AsyncSession) -> Tuple[List[int], SlotLayout]:
+        """
+        Uncached alternative to get_layout (when the in-memory index is disabled)
+        Loads the polygons of slots whose stored bbox intersects one of the
+        (N, 4) YOLO boxes only (bbox prefilter in SQL).
+        Returns (ids of every slot of the camera, layout of the candidates).
+        """
+        result = await db.execute(select(Slot.id).where(Slot.camera_id == camera_id).order_by(Slot.id))
+        all_ids = list(result.scalars().all())
+        if not all_ids or len(boxes) == 0:
+            return all_ids, SlotLayout(camera_id, self.version(camera_id), [], [])
+
+        # Per-box overlap tests; one union box when there are many detections
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        x0, y0 = boxes[:, 0] - boxes[:, 2] / 2, boxes[:, 1] - boxes[:, 3] / 2
+        x1, y1 = boxes[:, 0] + boxes[:, 2] / 2, boxes[:, 1] + boxes[:, 3] / 2
+        if len(boxes) > MAX_PREFILTER_BOXES:
+            x0, y0, x1, y1 = [x0.min()], [y0.min()], [x1.max()], [y1.max()]
+
+        overlaps = [
+            and_(Slot.min_x <= bx1, Slot.max_x >= bx0, Slot.min_y <= by1, Slot.max_y >= by0)
+            for bx0, by0, bx1, by1 in zip(map(float, x0), map(float, y0), map(float, x1), map(float, y1))
+        ]
+        condition = and_(
+            Slot.camera_id == camera_id,
+            or_(Slot.min_x.is_(None), *overlaps)  # Slots without stored bbox are always candidates
+        )
+        return all_ids, await _load_layout(camera_id, self.version(camera_id), condition, db)
+
+    def invalidate(self, camera_id: int):
+        """Drop the cached layout of a camera (call after slot changes)"""
+        with self._lock:
+            self._versions[camera_id] = self.version(camera_id) + 1
+            self._layouts.pop(camera_id, None)
+        logger.debug(f"Invalidated slot layout for camera {camera_id}")
+
+
+async def _load_layout(camera_id: int, version: int, condition, db: AsyncSession) -> SlotLayout:
+    """
+    Build a layout from the slots matching a condition
+    Packed polygons are decoded in bulk (one frombuffer, one vectorized
+    geometry call), only slots without a blob fall back to JSON
+    """
+    result = await db.execute(
+        select(Slot.id, Slot.polygon_blob, Slot.vertex_count).where(condition).order_by(Slot.id)
+    )
+    rows = result.all()
+
+    packed = [(slot_id, blob, count) for slot_id, blob, count in rows if blob is not None and count]
+    slots = {}  # slot_id -> (points, geometry)
+    try:
+        points, geometries = unpack_polygons([blob for _, blob, _ in packed], [count for _, _, count in packed])
+        slots.update(zip([slot_id for slot_id, _, _ in packed], zip(points, geometries)))
+    except ValueError as e:
+        logger.error(f"Invalid packed polygons for camera {camera_id}, decoding JSON: {e}")
+
+    # Slots without packed polygon (not backfilled): decode JSON
+    unpacked_ids = [slot_id for slot_id, _, _ in rows if slot_id not in slots]
+    if unpacked_ids:
+        result = await db.execute(select(Slot.id, Slot.polygon).where(Slot.id.in_(unpacked_ids)))
+        for slot_id, polygon in result.all():
+            try:
+                slots[slot_id] = (np.asarray(polygon, dtype=np.float32).reshape(-1, 2), polygon_from_points(polygon))
+            except (TypeError, ValueError) as e:
+                logger.error(f"Invalid polygon for slot {slot_id}: {e}")
+
+    slot_ids = [slot_id for slot_id, _, _ in rows if slot_id in slots]
+    homography = _parse_homography(
+        camera_id, await db.scalar(select(Camera.homography_matrix).where(Camera.id == camera_id))
+    )
+    return SlotLayout(
+        camera_id, version, slot_ids,
+        [slots[slot_id][0] for slot_id in slot_ids],
+        [slots[slot_id][1] for slot_id in slot_ids],
+        homography
+    )
+
+
+def _parse_homography(camera_id: int, matrix) -> Optional[np.ndarray]:
+    """3x3 homography of a camera, None if not set or invalid"""
+    if not matrix:
+        return None
+    try:
+        homography = np.asarray(matrix, dtype=np.float64).reshape(3, 3)
+    except (TypeError, ValueError) as e:
+        logger.error(f"Invalid homography for camera {camera_id}, matching in image space: {e}")
+        return None
+    if not np.isfinite(homography).all() or abs(np.linalg.det(homography)) < 1e-12:
+        logger.error(f"Degenerate homography for camera {camera_id}, matching in image space")
+        return None
+    return homography
+
+
+# Global slot cache instance
+slot_cache = SlotCache()
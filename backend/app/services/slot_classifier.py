@@ -0,0 +1,142 @@
+# Slot classifier - per-slot occupancy engine (slot patches instead of full-frame YOLO)
+from threading import Lock
+from typing import Optional
+import numpy as np
+
+from app.core.settings import settings
+from app.core.logger import logger
+
+# Occupancy engines a camera can use
+OCCUPANCY_ENGINES = ("yolo", "classifier")
+
+
+class SlotClassifier:
+    """
+    Common interface of every slot classifier
+    predict() takes a (S, size, size, 3) uint8 BGR batch of slot patches
+    (one per slot) and returns (S,) occupancy scores
+    """
+
+    name = "base"
+
+    def __init__(self, size: int = 64, threshold: float = 0.5):
+        self.size = size
+        self.threshold = threshold
+
+    def predict(self, patches: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def classify(self, patches: np.ndarray) -> np.ndarray:
+        """(S,) bool, True = occupied"""
+        if len(patches) == 0:
+            return np.zeros(0, dtype=bool)
+        return self.predict(patches) >= self.threshold
+
+
+class EdgeDensityClassifier(SlotClassifier):
+    """
+    Baseline heuristic: an empty slot is mostly flat asphalt, a vehicle adds
+    edges. Score = fraction of patch pixels with a strong gradient.
+    """
+
+    name = "edges"
+
+    def __init__(self, size: int = 64, threshold: float = 0.08, edge_threshold: float = 24.0):
+        super().__init__(size, threshold)
+        self.edge_threshold = edge_threshold
+        self._gray_weights = np.array([0.114, 0.587, 0.299], dtype=np.float32)  # BGR
+
+    def predict(self, patches: np.ndarray) -> np.ndarray:
+        gray = patches.astype(np.float32) @ self._gray_weights  # (S, H, W)
+        gradient = np.abs(np.diff(gray, axis=2))[:, :-1, :] + np.abs(np.diff(gray, axis=1))[:, :, :-1]
+        return (gradient > self.edge_threshold).mean(axis=(1, 2))
+
+
+class OnnxSlotClassifier(SlotClassifier):
+    """
+    Small CNN exported to ONNX, run with ONNX Runtime on CPU
+    Input (S, 3, size, size) float32 RGB in [0, 1]. Output (S, 2) logits
+    [empty, occupied] or (S, 1) occupied probability/logit.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, size: int = 64, threshold: float = 0.5, num_threads: int = 0):
+        super().__init__(size, threshold)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        # Static input shape wins over the configured size
+        shape = model_input.shape
+        if len(shape) == 4 and isinstance(shape[2], int):
+            self.size = shape[2]
+        self.single_batch = len(shape) == 4 and shape[0] == 1
+
+    def predict(self, patches: np.ndarray) -> np.ndarray:
+        batch = np.ascontiguousarray(patches[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32)
+        batch *= 1 / 255.0
+
+        if self.single_batch:
+            output = np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0] for i in range(len(batch))])
+        else:
+            output = self.session.run(None, {self.input_name: batch})[0]
+
+        output = np.asarray(output, dtype=np.float32).reshape(len(batch), -1)
+        if output.shape[1] >= 2:
+            # Softmax probability of the "occupied" class
+            exp = np.exp(output - output.max(axis=1, keepdims=True))
+            return exp[:, 1] / exp.sum(axis=1)
+
+        scores = output[:, 0]
+        if scores.min() < 0 or scores.max() > 1:
+            scores = 1 / (1 + np.exp(-scores))  # Logits
+        return scores
+
+
+def create_slot_classifier(
+    model_path: str = "",
+    size: int = 64,
+    threshold: float = 0.5,
+    edge_density: float = 0.08,
+    num_threads: int = 0
+) -> SlotClassifier:
+    """
+    Create the slot classifier: the ONNX model if one is configured,
+    otherwise (or if it fails to load) the edge-density heuristic
+    """
+    if model_path:
+        try:
+            return OnnxSlotClassifier(model_path, size=size, threshold=threshold, num_threads=num_threads)
+        except Exception as e:
+            logger.error(f"[ERROR] Slot classifier {model_path} unavailable, using edge-density heuristic: {e}")
+    return EdgeDensityClassifier(size=size, threshold=edge_density)
+
+
+# Global classifier (shared by every camera using the classifier engine)
+_slot_classifier: Optional[SlotClassifier] = None
+_slot_classifier_lock = Lock()
+
+
+def get_slot_classifier() -> SlotClassifier:
+    """Get the global slot classifier (created on first use)"""
+    global _slot_classifier
+    with _slot_classifier_lock:
+        if _slot_classifier is None:
+            _slot_classifier = create_slot_classifier(
+                model_path=settings.SLOT_CLASSIFIER_MODEL,
+                size=settings.SLOT_CLASSIFIER_SIZE,
+                threshold=settings.SLOT_CLASSIFIER_THRESHOLD,
+                edge_density=settings.SLOT_CLASSIFIER_EDGE_DENSITY,
+                num_threads=settings.INFERENCE_THREADS
+            )
+            logger.info(f"[OK] Slot classifier ready ({_slot_classifier.name}, {_slot_classifier.size}px patches)")
+        return _slot_classifier
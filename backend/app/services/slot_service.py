@@ -1,193 +1,478 @@
 # Slot service - parking slot status logic
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Union
+import time
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, case, insert, literal, or_, select, update
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import datetime, timezone
 import numpy as np
 
 from app.models.slot import Slot, SlotStatus
 from app.models.slot_event import SlotEvent
 from app.utils.polygon_utils import (
-    bbox_yolo_to_polygon,  # For YOLO format bbox
+    bboxes_yolo_to_polygons,  # For YOLO format bboxes
+    bboxes_yolo_to_ground_polygons,
+    overlap_matrix,
+    raster_overlap_matrix,
+    best_slot_matches,
     polygon_from_points,
-    calculate_overlap_ratio
+    point_in_polygon
 )
+from app.services.slot_cache import slot_cache
+from app.services.occupancy_rollup import OccupiedPeriod, StatusChange, to_utc_naive, write_rollups
+from app.utils.detection_utils import detections_to_boxes
 from app.core.settings import settings
 from app.core.logger import logger
 
+class _CameraStatusRing:
+    """Smoothing state of one camera: (slots x frames) ring of 0/1 codes"""
+    def __init__(self, slot_ids: List[int], frames: int):
+        self.slot_ids = list(slot_ids)
+        self.history = np.zeros((len(slot_ids), frames), dtype=np.uint8)  # 1 = occupied
+        self.filled = np.zeros(len(slot_ids), dtype=np.int32)  # Valid frames per slot (<= frames)
+        self.position = 0
+        self.stable = np.zeros(len(slot_ids), dtype=np.uint8)
+        self.pending_since = np.full(len(slot_ids), np.nan)  # Start of a not yet committed change
+
+    def resize(self, slot_ids: List[int]):
+        """Follow a new slot layout: keep rows of remaining slots, evict removed ones"""
+        old_index = {slot_id: index for index, slot_id in enumerate(self.slot_ids)}
+        kept = np.array([old_index.get(slot_id, -1) for slot_id in slot_ids], dtype=np.int64)
+        known = kept >= 0
+
+        history = np.zeros((len(slot_ids), self.history.shape[1]), dtype=np.uint8)
+        filled = np.zeros(len(slot_ids), dtype=np.int32)
+        stable = np.zeros(len(slot_ids), dtype=np.uint8)
+        pending_since = np.full(len(slot_ids), np.nan)
+        history[known] = self.history[kept[known]]
+        filled[known] = self.filled[kept[known]]
+        stable[known] = self.stable[kept[known]]
+        pending_since[known] = self.pending_since[kept[known]]
+
+        self.slot_ids = list(slot_ids)
+        self.history, self.filled, self.stable, self.pending_since = history, filled, stable, pending_since
+
+
 class SlotStatusBuffer:
-    """Buffer to smooth status changes for N frames."""
-    def __init__(self, smooth_frames: int = 3):
-        self.buffer: Dict[int, List[str]] = {} # slot_id -> [status, status, ...]
-        self.smoothing_frames = smooth_frames
+    """
+    Smooth status changes over the last N frames, per camera
+    Each camera keeps a (slots x N) NumPy ring updated in one vectorized step:
+    - a slot becomes occupied when the occupied share of its window >= enter_ratio
+    - and becomes empty again when that share <= exit_ratio (hysteresis)
+    - a change is committed only after it held for debounce seconds
+    Slots missing from the layout and removed cameras are evicted.
+    """
+    def __init__(
+        self,
+        smooth_frames: int = 3,
+        enter_ratio: float = 0.6,
+        exit_ratio: float = 0.4,
+        debounce: float = 0.0
+    ):
+        self.smoothing_frames = max(1, smooth_frames)
+        self.enter_ratio = enter_ratio
+        self.exit_ratio = min(exit_ratio, enter_ratio)
+        self.debounce = debounce
+        self._cameras: Dict[int, _CameraStatusRing] = {}
 
-    def add_status(self, slot_id: int, status: str) -> str:
+    def update(self, camera_id: int, slot_ids: List[int], occupied: np.ndarray, now: float = None) -> np.ndarray:
         """
-        Add a new status for buffer, return stable status
+        Add one frame of raw statuses for a camera, return stable statuses
+        Args:
+            slot_ids: slot ids of the camera layout (order of occupied)
+            occupied: (S,) bool raw occupancy of every slot in this frame
+        Returns:
+            (S,) bool stable occupancy
         """
-        if slot_id not in self.buffer:
-            self.buffer[slot_id] = []
+        if now is None:
+            now = time.monotonic()
 
-        self.buffer[slot_id].append(status)
+        ring = self._cameras.get(camera_id)
+        if ring is None:
+            ring = self._cameras[camera_id] = _CameraStatusRing(slot_ids, self.smoothing_frames)
+        elif ring.slot_ids != list(slot_ids):
+            ring.resize(slot_ids)
 
-        # Keep only the last N statuses
-        if len(self.buffer[slot_id]) > self.smoothing_frames:
-            self.buffer[slot_id].pop(0)
-        
-        # if we have enough frames, determine stable status
-        if len(self.buffer[slot_id]) < self.smoothing_frames:
-            return self.buffer[slot_id][0]
-        
-        # Vote: most common status in buffer
-        from collections import Counter
-        counter = Counter(self.buffer[slot_id])
-        most_common_status = counter.most_common(1)[0][0]
+        occupied = np.asarray(occupied, dtype=np.uint8)
+        first = ring.filled == 0
+
+        ring.history[:, ring.position] = occupied
+        ring.position = (ring.position + 1) % ring.history.shape[1]
+        np.minimum(ring.filled + 1, ring.history.shape[1], out=ring.filled)
+
+        share = self._valid_share(ring)
+
+        target = np.where(ring.stable == 1, share > self.exit_ratio, share >= self.enter_ratio).astype(np.uint8)
+        target[first] = occupied[first]  # New slots start from their first status
+        ring.stable[first] = occupied[first]
+
+        # Debounce: a change must hold for debounce seconds before it is committed
+        changing = target != ring.stable
+        ring.pending_since[~changing] = np.nan
+        starting = changing & np.isnan(ring.pending_since)
+        ring.pending_since[starting] = now
+        commit = changing & (now - ring.pending_since >= self.debounce)
+        ring.stable[commit] = target[commit]
+        ring.pending_since[commit] = np.nan
+
+        return ring.stable.astype(bool)
+
+    def _valid_share(self, ring: _CameraStatusRing) -> np.ndarray:
+        """Occupied share over the last filled frames of every slot"""
+        frames = ring.history.shape[1]
+        # Age of every column: 0 = newest frame
+        age = (ring.position - 1 - np.arange(frames)) % frames
+        valid = age[None, :] < ring.filled[:, None]
+        return (ring.history * valid).sum(axis=1) / np.maximum(ring.filled, 1)
+
+    def evict_camera(self, camera_id: int):
+        """Drop all state of a camera (camera deleted or detector stopped)"""
+        self._cameras.pop(camera_id, None)
+
+    def evict_slots(self, camera_id: int, slot_ids: List[int]):
+        """Drop state of deleted slots"""
+        ring = self._cameras.get(camera_id)
+        if ring is not None:
+            removed = set(slot_ids)
+            ring.resize([slot_id for slot_id in ring.slot_ids if slot_id not in removed])
 
-        return most_common_status
-    
 # Global buffer instance
-status_buffer = SlotStatusBuffer(smooth_frames=settings.SMOOTHING_FRAMES)
+status_buffer = SlotStatusBuffer(
+    smooth_frames=settings.SMOOTHING_FRAMES,
+    enter_ratio=settings.SMOOTHING_ENTER_RATIO,
+    exit_ratio=settings.SMOOTHING_EXIT_RATIO,
+    debounce=settings.SMOOTHING_DEBOUNCE
+)
 
 async def match_detections_to_slots(
         camera_id: int,
-        detections: List[Dict],
+        detections: Union[List[Dict], np.ndarray],
         db: AsyncSession,
-        threshold: float = None
+        threshold: float = None,
+        engine: str = None
 ) -> Dict[int, str]:
     """
     Match detections with slots, return dict {slot_id: new_status}
-    OPTIMIZED for performance with early exit and caching
+    Slot geometry comes from the slot cache (prepared polygons + STRtree),
+    so no DB round-trip or polygon construction per frame. Overlaps of all
+    detections are computed as one (D, S) matrix, either from exact polygon
+    intersections or from rasterized slot masks (summed-area tables).
+    Cameras with a homography always use polygons in ground-plane coordinates
     
     Args:
         camera_id (int): ID of the camera
-        detections (List[Dict]): List of detection dicts with 'bbox' key
-        db (AsyncSession): Database session
+        detections (List[Dict] | np.ndarray): List of detection dicts with 'bbox' key,
+            or compact (N, 6) array [x, y, w, h, confidence, class_id]
+        db (AsyncSession): Database session (only used to load the layout once)
         threshold (float): Overlap ratio threshold to consider slot occupied
+        engine (str): "polygon" or "raster" (default: settings.MATCHING_ENGINE)
 
     Returns:
         Dict[int, str]: Mapping of slot_id to new status
     """
     if threshold is None:
         threshold = settings.DETECTION_THRESHOLD
+    if engine is None:
+        engine = settings.MATCHING_ENGINE
 
-    # Early exit if no detections
-    if not detections:
-        result = await db.execute(
-            select(Slot).where(Slot.camera_id == camera_id)
-        )
-        slots = result.scalars().all()
-        return {slot.id: SlotStatus.EMPTY.value for slot in slots}
+    # [x, y, w, h] boxes from dicts or compact array
+    boxes = detections_to_boxes(detections)
+
+    # Slot geometry from the per-camera cache (DB is only hit after invalidation),
+    # or only the slots near the detections (SQL bbox prefilter) when the cache is off
+    if settings.SLOT_CACHE_ENABLED:
+        layout = await slot_cache.get_layout(camera_id, db)
+        slot_ids = layout.slot_ids
+    else:
+        slot_ids, layout = await slot_cache.load_candidates(camera_id, boxes, db)
 
-    # get all slots for the camera
-    result = await db.execute(
-        select(Slot).where(Slot.camera_id == camera_id)
-    )
-    slots = result.scalars().all()
-    
     # Early exit if no slots
-    if not slots:
+    if len(slot_ids) == 0:
         return {}
 
-    # Make polygons from slots (with error handling)
-    slot_polygons = {}
-    for slot in slots:
-        try:
-            slot_polygons[slot.id] = polygon_from_points(slot.polygon)
-        except Exception as e:
-            logger.error(f"Error creating polygon for slot {slot.id}: {e}")
-            continue
-    
-    # Init all slots as empty
-    slot_status_map = {slot.id: SlotStatus.EMPTY.value for slot in slots}
+    # Overlap of every detection with every nearby slot in one batch
+    if engine == "raster" and layout.homography is None:
+        ratios = raster_overlap_matrix(boxes, layout.get_masks(settings.MATCHING_RASTER_SCALE))
+    else:
+        # Cameras with a homography match in ground-plane (rectified) coordinates
+        if layout.homography is not None:
+            bbox_polys = bboxes_yolo_to_ground_polygons(boxes, layout.homography)
+        else:
+            bbox_polys = bboxes_yolo_to_polygons(boxes)
+        ratios = overlap_matrix(bbox_polys, layout.geometries, layout.areas, layout.tree)
+    best, best_ratio, matched = best_slot_matches(ratios, threshold)
 
-    # With each detectionm. find overlapp 
-    for detection in detections:
-        bbox = detection.get("bbox")
-        if not bbox or len(bbox) != 4:
-            continue
+    # Slot with highest overlap of each matched detection is occupied
+    occupied = np.zeros(len(layout), dtype=bool)
+    occupied[best[matched]] = True
+    if layout.slot_ids != slot_ids:
+        # Candidate layout: every other slot of the camera is empty
+        occupied = np.isin(slot_ids, np.asarray(layout.slot_ids)[occupied])
 
-        try:
-            # Convert YOLO format [center_x, center_y, w, h] to polygon
-            bbox_poly = bbox_yolo_to_polygon(bbox)
-        except Exception as e:
-            logger.error(f"Invalid bbox {bbox}: {e}")
-            continue
-
-        # Find slot have highest overlap
-        best_slot_id = None
-        best_ratio = 0.0
-
-        for slot_id, slot_poly in slot_polygons.items():
-            ratio = calculate_overlap_ratio(bbox_poly, slot_poly)
-            if ratio > best_ratio:
-                best_ratio = ratio
-                best_slot_id = slot_id
-        
-        # If best overlap exceeds threshold, mark slot as occupied
-        if best_slot_id and best_ratio >= threshold:
-            slot_status_map[best_slot_id] = SlotStatus.OCCUPIED.value
-            logger.debug(f"Detection bbox {bbox} matched slot {best_slot_id} with ratio {best_ratio:.2f}")
-        else:
-            logger.debug(f"Detection bbox {bbox} no match (best ratio: {best_ratio:.2f}, threshold: {threshold})")
+    logger.debug(
+        f"{int(matched.sum())}/{len(boxes)} detections matched a slot "
+        f"(best ratios: {np.round(best_ratio, 2).tolist()}, threshold: {threshold})"
+    )
 
-    # Apply smoothing 
-    smoothed_status_map = {}
-    for slot_id, raw_status in slot_status_map.items():
-        smoothed_status = status_buffer.add_status(slot_id, raw_status)
-        smoothed_status_map[slot_id] = smoothed_status
+    # Apply smoothing (one vectorized step for the whole camera)
+    smoothed_status_map = smooth_slot_occupancy(camera_id, slot_ids, occupied)
     
     # Log summary
-    occupied_count = sum(1 for status in smoothed_status_map.values() if status == SlotStatus.OCCUPIED.value)
-    logger.info(f"Matched {len(detections)} detections to {len(slots)} slots: {occupied_count} occupied, {len(slots) - occupied_count} empty (threshold: {threshold})")
+    occupied_count = sum(status == SlotStatus.OCCUPIED.value for status in smoothed_status_map.values())
+    logger.info(f"Matched {len(boxes)} detections to {len(slot_ids)} slots: {occupied_count} occupied, {len(slot_ids) - occupied_count} empty (threshold: {threshold})")
     
     return smoothed_status_map
 
+def smooth_slot_occupancy(camera_id: int, slot_ids: List[int], occupied: np.ndarray) -> Dict[int, str]:
+    """
+    Smooth raw per-slot occupancy of one frame (from any occupancy engine),
+    return dict {slot_id: status}
+    """
+    stable = status_buffer.update(camera_id, slot_ids, occupied)
+    return {
+        slot_id: SlotStatus.OCCUPIED.value if is_occupied else SlotStatus.EMPTY.value
+        for slot_id, is_occupied in zip(slot_ids, stable.tolist())
+    }
+
 async def update_slot_statuses(
         slot_status_map: Dict[int, str],
         db: AsyncSession
-):
+) -> Dict[int, str]:
     """
     Update slot statuses in the database and make events
+    Constant number of statements whatever the number of slots: one IN
+    select of the current rows, one UPDATE ... CASE for the changed
+    slots, one to close their open events, one multi-row insert of their
+    events, one select of the released slots' checkpoint and one upsert
+    per rollup table.
     
     Args:
         slot_status_map (Dict[int, str]): Mapping of slot_id to new status
         db (AsyncSession): Database session
+    
+    Returns:
+        Dict[int, str]: slot_id -> new status of the slots that changed
+    """
+    changed, _ = await update_and_load_slot_statuses(slot_status_map, db)
+    return changed
+
+async def update_and_load_slot_statuses(
+        slot_status_map: Dict[int, str],
+        db: AsyncSession
+) -> Tuple[Dict[int, str], List[Slot]]:
+    """
+    Same as update_slot_statuses, also returns the Slot rows it loaded
+    (with the new statuses) so callers need no second select
+    
+    Returns:
+        Tuple[Dict[int, str], List[Slot]]: (slot_id -> new status of the changed slots, slots of the map)
     """
-    updated_count = 0
+    if not slot_status_map:
+        return {}, []
     
-    for slot_id, new_status in slot_status_map.items():
-        # get slot current status
-        result = await db.execute(
-            select(Slot).where(Slot.id == slot_id)
+    # Current rows of every slot in one query (refreshed if already in the session)
+    result = await db.execute(
+        select(Slot)
+        .where(Slot.id.in_(list(slot_status_map.keys())))
+        .execution_options(populate_existing=True)
+    )
+    slots = result.scalars().all()
+    old_statuses = {
+        slot.id: slot.status.value if slot.status is not None else None
+        for slot in slots
+    }
+    since = {slot.id: (slot.last_changed_at, slot.camera_id) for slot in slots}
+    
+    # update only slots whose status changed
+    changed = {
+        slot_id: slot_status_map[slot_id]
+        for slot_id, old_status in old_statuses.items()
+        if old_status != slot_status_map[slot_id]
+    }
+    if not changed:
+        return changed, slots
+    
+    now = datetime.now(timezone.utc)
+    await write_slot_statuses(
+        {slot_id: (status, now) for slot_id, status in changed.items()},
+        [
+            {
+                "slot_id": slot_id,
+                "old_status": old_statuses[slot_id],
+                "new_status": status,
+                "start_time": now
+            }
+            for slot_id, status in changed.items()
+        ],
+        db
+    )
+    
+    # Occupied time of released slots, from their last change or last checkpoint. Read after
+    # the UPDATE (which waits for a running checkpoint's row locks) so no time is counted twice.
+    released = [
+        slot_id for slot_id in changed
+        if old_statuses[slot_id] == SlotStatus.OCCUPIED.value and since[slot_id][0] is not None
+    ]
+    accounted = {}
+    if released:
+        result = await db.execute(select(Slot.id, Slot.accounted_until).where(Slot.id.in_(released)))
+        accounted = {slot_id: accounted_until for slot_id, accounted_until in result.all() if accounted_until is not None}
+    await write_rollups(
+        [
+            (slot_id, since[slot_id][1], occupied_since(since[slot_id][0], accounted.get(slot_id)), now)
+            for slot_id in released
+        ],
+        [(slot_id, since[slot_id][1], now) for slot_id in changed],
+        db
+    )
+    
+    # Loaded rows follow the bulk update (without marking them dirty)
+    for slot in slots:
+        if slot.id in changed:
+            set_committed_value(slot, "status", SlotStatus(changed[slot.id]))
+            set_committed_value(slot, "last_changed_at", now)
+    
+    # Log updates (commit will be done by caller)
+    logger.info(f"Updated {len(changed)} slot status changes (ready to commit): {changed}")
+    return changed, slots
+
+def occupied_since(last_changed_at: datetime, accounted_until: Optional[datetime]) -> datetime:
+    """Start of the occupied time not yet in the rollups (naive UTC)"""
+    start = to_utc_naive(last_changed_at)
+    if accounted_until is not None:
+        start = max(start, to_utc_naive(accounted_until))
+    return start
+
+async def checkpoint_occupied_slots(db: AsyncSession, now: Optional[datetime] = None) -> int:
+    """
+    Add the occupied time of slots still occupied (up to now) to the rollups (commit is done by caller)
+    DB counterpart of SlotStateStore.checkpoint: without it occupied time only
+    reaches the rollups when a slot is released. The rows are locked until
+    commit so a concurrent release starts its period at the new accounted_until.
+    Returns the number of slots checkpointed
+    """
+    now = to_utc_naive(now or datetime.now(timezone.utc))
+    result = await db.execute(
+        select(Slot.id, Slot.camera_id, Slot.last_changed_at, Slot.accounted_until)
+        .where(Slot.status == SlotStatus.OCCUPIED, Slot.last_changed_at.isnot(None))
+        .with_for_update()
+    )
+    periods = [
+        (slot_id, camera_id, occupied_since(last_changed_at, accounted_until), now)
+        for slot_id, camera_id, last_changed_at, accounted_until in result.all()
+    ]
+    periods = [period for period in periods if period[2] < now]
+    if not periods:
+        return 0
+    
+    await write_rollups(periods, [], db)
+    await db.execute(
+        update(Slot)
+        .where(Slot.id.in_([period[0] for period in periods]))
+        .values(accounted_until=now, updated_at=Slot.updated_at)  # Not a slot edit
+        .execution_options(synchronize_session=False)
+    )
+    return len(periods)
+
+async def write_slot_statuses(
+        statuses: Dict[int, Tuple[str, datetime]],
+        events: List[Dict],
+        db: AsyncSession,
+        periods: Optional[List[OccupiedPeriod]] = None,
+        changes: Optional[List[StatusChange]] = None
+):
+    """
+    Write slot statuses, their events and the occupancy rollups in bulk (commit is done by caller)
+    Each new event closes the previous event of its slot (end_time = its start_time).
+    
+    Args:
+        statuses (Dict[int, Tuple[str, datetime]]): slot_id -> (status, last_changed_at)
+        events (List[Dict]): SlotEvent rows (slot_id, old_status, new_status, start_time), oldest first
+        db (AsyncSession): Database session
+        periods (List[OccupiedPeriod]): Occupied periods to add to the rollups
+        changes (List[StatusChange]): Status changes to count in the rollups
+    """
+    if statuses:
+        # One UPDATE for all slots (values picked per slot id)
+        await db.execute(
+            update(Slot)
+            .where(Slot.id.in_(list(statuses.keys())))
+            .values(
+                status=case(
+                    {slot_id: literal(SlotStatus(status), Slot.status.type) for slot_id, (status, _) in statuses.items()},
+                    value=Slot.id
+                ),
+                last_changed_at=case(
+                    {slot_id: literal(changed_at, Slot.last_changed_at.type) for slot_id, (_, changed_at) in statuses.items()},
+                    value=Slot.id
+                )
+            )
+            .execution_options(synchronize_session=False)
         )
-        slot = result.scalar_one_or_none()
-
-        if not slot:
-            continue
-            
-        old_status = slot.status.value
-
-        # update only if status changed
-        if old_status != new_status:
-            # Update slot
-            slot.status = SlotStatus(new_status)
-            slot.last_changed_at = datetime.now(timezone.utc)
-
-            # Create slot event
-            event = SlotEvent(
-                slot_id=slot.id,
-                old_status=old_status,
-                new_status=new_status,
-                start_time=datetime.now(timezone.utc)
+    
+    if events:
+        # Chain the batch's own events, the first one of each slot closes its open event in DB
+        rows = []
+        first_start = {}
+        last_row = {}
+        for event in events:
+            row = {**event, "end_time": None}
+            previous = last_row.get(row["slot_id"])
+            if previous is None:
+                first_start[row["slot_id"]] = row["start_time"]
+            else:
+                previous["end_time"] = row["start_time"]
+            last_row[row["slot_id"]] = row
+            rows.append(row)
+        
+        await db.execute(
+            update(SlotEvent)
+            .where(SlotEvent.slot_id.in_(list(first_start.keys())), SlotEvent.end_time.is_(None))
+            .values(
+                end_time=case(
+                    {slot_id: literal(start_time, SlotEvent.end_time.type) for slot_id, start_time in first_start.items()},
+                    value=SlotEvent.slot_id
+                )
             )
-            db.add(event)
+            .execution_options(synchronize_session=False)
+        )
+        
+        # One multi-row insert for the slot events
+        await db.execute(insert(SlotEvent).values(rows))
+    
+    if periods or changes:
+        await write_rollups(periods or [], changes or [], db)
 
-            logger.info(f"Slot {slot.id} status changed from {old_status} to {new_status}")
-            updated_count += 1
+async def get_slots_at_point(camera_id: int, x: float, y: float, db: AsyncSession) -> List[Slot]:
+    """
+    Get the slots of a camera containing a point (frame coordinates)
+    Stored bboxes prefilter candidates in SQL, only those polygons are tested
     
-    # Log updates (commit will be done by caller)
-    if updated_count > 0:
-        logger.info(f"Updated {updated_count} slot status changes (ready to commit)")
+    Args:
+        camera_id (int): ID of the camera
+        x, y (float): Point in frame pixels
+        db (AsyncSession): Database session
+    Returns:
+        List[Slot]: Slots whose polygon contains the point
+    """
+    result = await db.execute(
+        select(Slot).where(
+            Slot.camera_id == camera_id,
+            or_(
+                Slot.min_x.is_(None),  # Not backfilled yet: test the polygon
+                and_(Slot.min_x <= x, Slot.max_x >= x, Slot.min_y <= y, Slot.max_y >= y)
+            )
+        )
+    )
+
+    slots = []
+    for slot in result.scalars().all():
+        try:
+            if point_in_polygon((x, y), polygon_from_points(slot.polygon)):
+                slots.append(slot)
+        except Exception as e:
+            logger.error(f"Error creating polygon for slot {slot.id}: {e}")
+    return slots
 
 async def get_slot_status(camera_id: int | None, db: AsyncSession) -> Dict:
     """
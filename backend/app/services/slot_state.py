@@ -0,0 +1,299 @@
+# Slot state store - current slot statuses in memory, written behind to the DB
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import case, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import async_session_maker
+from app.core.logger import logger
+from app.core.settings import settings
+from app.models.slot import Slot, SlotStatus
+from app.services.occupancy_rollup import OccupiedPeriod, StatusChange, to_utc_naive
+from app.services.slot_service import occupied_since, write_slot_statuses
+
+
+def utc_now() -> datetime:
+    """Current time as naive UTC (the form stored in and read back from the DB)"""
+    return to_utc_naive(datetime.now(timezone.utc))
+
+
+class SlotState:
+    """One slot as served by the read endpoints (attribute names match SlotResponse)"""
+
+    __slots__ = (
+        "id", "camera_id", "label", "polygon", "area", "polygon_blob", "vertex_count",
+        "status", "last_changed_at", "version", "accounted_until"
+    )
+
+    def __init__(self, slot: Slot):
+        self.id = slot.id
+        self.camera_id = slot.camera_id
+        self.label = slot.label
+        self.polygon = slot.polygon
+        self.area = slot.area
+        self.polygon_blob = slot.polygon_blob
+        self.vertex_count = slot.vertex_count
+        self.status = slot.status.value if slot.status is not None else SlotStatus.EMPTY.value
+        # Naive UTC like the DB values (see utc_now)
+        self.last_changed_at = to_utc_naive(slot.last_changed_at or utc_now())
+        self.version = 0  # Bumped on every status change
+        # Time up to which the current status is counted in the occupancy rollups
+        # (from the last checkpoint, so occupied time before a restart is not lost)
+        self.accounted_until = occupied_since(self.last_changed_at, slot.accounted_until)
+
+
+class SlotStateStore:
+    """
+    Authoritative current state of every slot (status, last_changed_at, version)
+    Loaded once at startup. The detection pipeline applies status changes
+    here and the read endpoints are served from memory; changed rows and
+    their SlotEvents are flushed to the DB in bulk by a background task,
+    every flush_interval seconds or as soon as flush_size rows are pending,
+    and once more on shutdown. Occupied time goes to the occupancy rollups
+    when a slot is released, and every checkpoint_interval seconds for slots
+    still occupied so the current buckets stay up to date.
+    Only used from the event loop (no locking).
+    """
+
+    def __init__(self, flush_interval: float = 1.0, flush_size: int = 500, checkpoint_interval: float = 60.0):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.checkpoint_interval = checkpoint_interval
+        self.max_pending_events = flush_size * 20  # Oldest events are dropped beyond this while the DB is down
+
+        self.loaded = False
+        self._slots: Dict[int, SlotState] = {}
+        self._dirty = set()  # Slot ids whose status must be written
+        self._events: List[Dict] = []
+        self._periods: List[OccupiedPeriod] = []  # Occupied periods not yet in the rollups
+        self._changes: List[StatusChange] = []
+        self._last_checkpoint = time.monotonic()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Stats
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flushed_events = 0
+        self.failed_flushes = 0
+        self.dropped_events = 0
+        self.last_flush_time = 0.0
+
+    async def load(self, db: AsyncSession):
+        """Load every slot from DB (replaces the current state)"""
+        result = await db.execute(select(Slot))
+        self._slots = {slot.id: SlotState(slot) for slot in result.scalars().all()}
+        self._dirty.clear()
+        self._events.clear()
+        self._periods.clear()
+        self._changes.clear()
+        self.loaded = True
+        logger.info(f"[OK] Slot state store loaded {len(self._slots)} slots")
+
+    def get(self, slot_id: int) -> Optional[SlotState]:
+        """State of one slot (None if unknown)"""
+        return self._slots.get(slot_id)
+
+    def list(self, camera_id: Optional[int] = None) -> List[SlotState]:
+        """Every slot, or the slots of a camera, ordered by id"""
+        return [
+            state for slot_id, state in sorted(self._slots.items())
+            if camera_id is None or state.camera_id == camera_id
+        ]
+
+    def summary(self, camera_id: Optional[int] = None) -> Dict:
+        """Slot counts per status (same shape as get_slot_status)"""
+        status = {"total": 0, "empty": 0, "occupied": 0, "reserved": 0, "disabled": 0}
+        for state in self._slots.values():
+            if camera_id is None or state.camera_id == camera_id:
+                status["total"] += 1
+                if state.status in status:
+                    status[state.status] += 1
+        return status
+
+    def apply(self, slot_status_map: Dict[int, str]) -> Dict[int, str]:
+        """
+        Apply new statuses, queue changed rows and events for the next flush
+        Returns slot_id -> new status of the slots that changed
+        """
+        now = utc_now()
+        changed = {}
+        for slot_id, new_status in slot_status_map.items():
+            state = self._slots.get(slot_id)
+            if state is None or state.status == new_status:
+                continue
+
+            self._events.append({
+                "slot_id": slot_id,
+                "old_status": state.status,
+                "new_status": new_status,
+                "start_time": now
+            })
+            if state.status == SlotStatus.OCCUPIED.value:
+                self._periods.append((slot_id, state.camera_id, state.accounted_until, now))
+            self._changes.append((slot_id, state.camera_id, now))
+            state.status = new_status
+            state.last_changed_at = now
+            state.accounted_until = now
+            state.version += 1
+            self._dirty.add(slot_id)
+            changed[slot_id] = new_status
+
+        if changed:
+            logger.info(f"Slot status changes (pending flush): {changed}")
+            if self._wakeup is not None and len(self._dirty) + len(self._events) >= self.flush_size:
+                self._wakeup.set()
+        return changed
+
+    def upsert_slot(self, slot: Slot):
+        """Add or replace a slot (after create/update in DB)"""
+        if self.loaded:
+            state = SlotState(slot)
+            previous = self._slots.get(slot.id)
+            if previous is not None:
+                state.version = previous.version
+            self._slots[slot.id] = state
+
+    def remove_slots(self, slot_ids: List[int]):
+        """Forget deleted slots and their pending writes"""
+        for slot_id in slot_ids:
+            self._slots.pop(slot_id, None)
+            self._dirty.discard(slot_id)
+        removed = set(slot_ids)
+        self._events = [event for event in self._events if event["slot_id"] not in removed]
+        self._periods = [period for period in self._periods if period[0] not in removed]
+        self._changes = [change for change in self._changes if change[0] not in removed]
+
+    def remove_camera(self, camera_id: int):
+        """Forget every slot of a deleted camera"""
+        self.remove_slots([slot_id for slot_id, state in self._slots.items() if state.camera_id == camera_id])
+
+    def checkpoint(self):
+        """Queue the occupied time of slots still occupied (up to now) for the rollups"""
+        now = utc_now()
+        for slot_id, state in self._slots.items():
+            if state.status == SlotStatus.OCCUPIED.value:
+                self._periods.append((slot_id, state.camera_id, state.accounted_until, now))
+                state.accounted_until = now
+        self._last_checkpoint = time.monotonic()
+
+    async def flush(self) -> int:
+        """Write pending rows, events and rollups to DB in one transaction, return rows written"""
+        if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+        if not self._dirty and not self._events and not self._periods and not self._changes:
+            return 0
+
+        # Take the pending batch (new changes keep queueing meanwhile)
+        dirty, events, periods, changes = self._dirty, self._events, self._periods, self._changes
+        self._dirty, self._events, self._periods, self._changes = set(), [], [], []
+        statuses = {
+            slot_id: (self._slots[slot_id].status, self._slots[slot_id].last_changed_at)
+            for slot_id in dirty if slot_id in self._slots
+        }
+
+        try:
+            async with async_session_maker() as db:
+                # Slots deleted since the batch was taken get no events (they would be orphans)
+                statuses = {slot_id: value for slot_id, value in statuses.items() if slot_id in self._slots}
+                events = [event for event in events if event["slot_id"] in self._slots]
+                periods = [period for period in periods if period[0] in self._slots]
+                changes = [change for change in changes if change[0] in self._slots]
+                await write_slot_statuses(statuses, events, db, periods=periods, changes=changes)
+                if periods:
+                    # Same marker as the DB checkpoints, so the DB path never counts this time again
+                    accounted = {slot_id: end for slot_id, _, _, end in periods}
+                    await db.execute(
+                        update(Slot)
+                        .where(Slot.id.in_(list(accounted.keys())))
+                        .values(
+                            accounted_until=case(
+                                {slot_id: literal(end, Slot.accounted_until.type) for slot_id, end in accounted.items()},
+                                value=Slot.id
+                            ),
+                            updated_at=Slot.updated_at
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                await db.commit()
+        except Exception as e:
+            # Put the batch back in front of newer changes, retried next flush
+            self._dirty |= {slot_id for slot_id in dirty if slot_id in self._slots}
+            self._events = [event for event in events if event["slot_id"] in self._slots] + self._events
+            self._periods = [period for period in periods if period[0] in self._slots] + self._periods
+            self._changes = [change for change in changes if change[0] in self._slots] + self._changes
+            overflow = len(self._events) - self.max_pending_events
+            if overflow > 0:
+                del self._events[:overflow]
+                self.dropped_events += overflow
+            del self._periods[:max(0, len(self._periods) - self.max_pending_events)]
+            del self._changes[:max(0, len(self._changes) - self.max_pending_events)]
+            self.failed_flushes += 1
+            logger.error(f"[ERROR] Slot state flush failed ({len(self._dirty)} rows, {len(self._events)} events pending): {e}")
+            return 0
+
+        self.flushes += 1
+        self.flushed_rows += len(statuses)
+        self.flushed_events += len(events)
+        self.last_flush_time = time.time()
+        logger.debug(f"Flushed {len(statuses)} slot statuses and {len(events)} events")
+        return len(statuses)
+
+    async def _run(self):
+        """Flush loop: every flush_interval, or early when flush_size is reached"""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self):
+        """Load the slots and start the flush task"""
+        async with async_session_maker() as db:
+            await self.load(db)
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush task and write everything still pending"""
+        if self._task is not None:
+            # Let the running flush finish instead of cancelling it mid-write
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self.loaded:
+            self.checkpoint()  # Count occupied time up to shutdown
+        await self.flush()
+        self._wakeup = None
+        logger.info("Slot state store stopped")
+
+    def get_stats(self) -> Dict:
+        """Get store statistics"""
+        return {
+            "loaded": self.loaded,
+            "slots": len(self._slots),
+            "pending_rows": len(self._dirty),
+            "pending_events": len(self._events),
+            "pending_periods": len(self._periods),
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "flushed_events": self.flushed_events,
+            "failed_flushes": self.failed_flushes,
+            "dropped_events": self.dropped_events,
+            "last_flush_time": self.last_flush_time
+        }
+
+
+# Global store (loaded at startup when SLOT_STATE_STORE_ENABLED)
+slot_state = SlotStateStore(
+    flush_interval=settings.SLOT_STATE_FLUSH_INTERVAL,
+    flush_size=settings.SLOT_STATE_FLUSH_SIZE,
+    checkpoint_interval=settings.ROLLUP_CHECKPOINT_INTERVAL
+)
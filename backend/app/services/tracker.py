@@ -0,0 +1,154 @@
+# Vehicle tracker - carry detections between inference frames
+from typing import Dict, Tuple
+import numpy as np
+
+from app.utils.detection_utils import DETECTION_COLUMNS, empty_detections
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """IoU of every pair of YOLO boxes [center_x, center_y, w, h]: (A, 4) x (B, 4) -> (A, B)"""
+    a0 = boxes_a[:, None, 0:2] - boxes_a[:, None, 2:4] / 2
+    a1 = boxes_a[:, None, 0:2] + boxes_a[:, None, 2:4] / 2
+    b0 = boxes_b[None, :, 0:2] - boxes_b[None, :, 2:4] / 2
+    b1 = boxes_b[None, :, 0:2] + boxes_b[None, :, 2:4] / 2
+
+    overlap = np.clip(np.minimum(a1, b1) - np.maximum(a0, b0), 0, None).prod(axis=2)
+    union = boxes_a[:, None, 2:4].prod(axis=2) + boxes_b[None, :, 2:4].prod(axis=2) - overlap
+    return np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+
+
+class VehicleTracker:
+    """
+    IoU tracker with a constant-velocity (alpha-beta, Kalman-lite) box model
+
+    - Tracks are predicted to the time of each new inference, then matched
+      to detections greedily by IoU
+    - Matched tracks keep their ID, unmatched detections start new tracks
+    - A track that stays put for stationary_time (a parked vehicle) is kept
+      for up to stationary_max_missed inferences without a detection, so a
+      missed detection does not flip its slot to empty
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        max_missed: int = 2,
+        stationary_speed: float = 0.05,
+        stationary_time: float = 3.0,
+        stationary_max_missed: int = 10,
+        alpha: float = 0.6,
+        beta: float = 0.2
+    ):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.stationary_speed = stationary_speed  # Box diagonals per second
+        self.stationary_time = stationary_time
+        self.stationary_max_missed = stationary_max_missed
+        self.alpha = alpha
+        self.beta = beta
+
+        # Track state, one row per track
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.boxes = np.zeros((0, 4), dtype=np.float64)  # [center_x, center_y, w, h] at last_time
+        self.velocities = np.zeros((0, 4), dtype=np.float64)  # Per second
+        self.scores = np.zeros((0, 2), dtype=np.float64)  # [confidence, class_id] of last detection
+        self.missed = np.zeros(0, dtype=np.int32)
+        self.still_since = np.zeros(0, dtype=np.float64)  # Start of the current stationary period
+        self.last_time = None
+        self._next_id = 1
+
+        # Stats
+        self.tracks_created = 0
+        self.coasted = 0
+
+    def predict(self, timestamp: float) -> np.ndarray:
+        """Predicted (T, 4) boxes of every track at timestamp"""
+        if self.last_time is None:
+            return self.boxes.copy()
+        return self.boxes + self.velocities * max(0.0, timestamp - self.last_time)
+
+    def update(self, detections: np.ndarray, timestamp: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Feed one frame of (N, 6) detections
+        Returns (M, 6) tracked boxes (matched tracks + parked tracks still
+        coasting) and their (M,) track IDs
+        """
+        dt = 0.0 if self.last_time is None else max(0.0, timestamp - self.last_time)
+        predicted = self.predict(timestamp)
+        measured = detections[:, 0:4].astype(np.float64)
+
+        # Greedy IoU assignment, best pairs first
+        track_for = np.full(len(detections), -1, dtype=np.int64)
+        if len(predicted) and len(detections):
+            ious = iou_matrix(predicted, measured)
+            tracks, dets = np.nonzero(ious >= self.iou_threshold)
+            order = np.argsort(-ious[tracks, dets], kind="stable")
+            used_tracks = np.zeros(len(predicted), dtype=bool)
+            for track, det in zip(tracks[order].tolist(), dets[order].tolist()):
+                if not used_tracks[track] and track_for[det] < 0:
+                    used_tracks[track] = True
+                    track_for[det] = track
+
+        matched_dets = np.nonzero(track_for >= 0)[0]
+        matched_tracks = track_for[matched_dets]
+
+        # Alpha-beta correction of matched tracks
+        boxes = predicted
+        velocities = self.velocities.copy()
+        if len(matched_tracks):
+            residual = measured[matched_dets] - predicted[matched_tracks]
+            boxes[matched_tracks] = predicted[matched_tracks] + self.alpha * residual
+            if dt > 0:
+                velocities[matched_tracks] += self.beta * residual / dt
+            self.scores[matched_tracks] = detections[matched_dets, 4:6]
+
+        missed = self.missed + 1
+        missed[matched_tracks] = 0
+
+        # Stationary: speed below stationary_speed box diagonals per second
+        diagonal = np.maximum(np.hypot(boxes[:, 2], boxes[:, 3]), 1.0)
+        moving = np.hypot(velocities[:, 0], velocities[:, 1]) / diagonal > self.stationary_speed
+        still_since = np.where(moving, timestamp, self.still_since)
+        parked = (timestamp - still_since) >= self.stationary_time
+
+        # Keep tracks within their miss budget (larger for parked vehicles)
+        keep = missed <= np.where(parked, self.stationary_max_missed, self.max_missed)
+        coasting = keep & (missed > 0) & parked
+        velocities[missed > 0] = 0.0  # Don't extrapolate tracks that were not seen
+
+        # New tracks for unmatched detections
+        new_dets = np.nonzero(track_for < 0)[0]
+        new_ids = np.arange(self._next_id, self._next_id + len(new_dets), dtype=np.int64)
+        self._next_id += len(new_dets)
+        self.tracks_created += len(new_dets)
+        self.coasted += int(coasting.sum())
+
+        output_rows = np.nonzero(keep & ((missed == 0) | coasting))[0]
+
+        self.ids = np.concatenate([self.ids[keep], new_ids])
+        self.boxes = np.concatenate([boxes[keep], measured[new_dets]])
+        self.velocities = np.concatenate([velocities[keep], np.zeros((len(new_dets), 4))])
+        self.scores = np.concatenate([self.scores[keep], detections[new_dets, 4:6].astype(np.float64)])
+        self.missed = np.concatenate([missed[keep], np.zeros(len(new_dets), dtype=np.int32)])
+        self.still_since = np.concatenate([still_since[keep], np.full(len(new_dets), timestamp)])
+        self.last_time = timestamp
+
+        # Output: every visible or coasting track (existing ones first, then new)
+        kept_rows = np.cumsum(keep) - 1
+        rows = np.concatenate([kept_rows[output_rows], np.arange(keep.sum(), len(self.ids))])
+        if len(rows) == 0:
+            return empty_detections(), np.zeros(0, dtype=np.int64)
+
+        tracked = np.empty((len(rows), DETECTION_COLUMNS), dtype=np.float32)
+        tracked[:, 0:4] = self.boxes[rows]
+        tracked[:, 4:6] = self.scores[rows]
+        return tracked, self.ids[rows]
+
+    def get_stats(self) -> Dict:
+        """Get tracker statistics"""
+        return {
+            "active_tracks": int(len(self.ids)),
+            "parked_tracks": int(((self.last_time or 0.0) - self.still_since >= self.stationary_time).sum()),
+            "tracks_created": self.tracks_created,
+            "coasted": self.coasted
+        }
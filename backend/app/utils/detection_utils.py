@@ -0,0 +1,95 @@
+# Detection utilities - compact detection arrays
+
+from typing import Dict, List, Sequence, Union
+import numpy as np
+
+# Compact detection layout: one row per box
+# [center_x, center_y, width, height, confidence, class_id]
+DETECTION_COLUMNS = 6
+
+
+def empty_detections() -> np.ndarray:
+    """Return an empty (0, 6) detection array."""
+    return np.zeros((0, DETECTION_COLUMNS), dtype=np.float32)
+
+
+def result_to_array(result) -> np.ndarray:
+    """
+    Convert one ultralytics Result into a compact (N, 6) float32 array.
+    Uses whole-tensor operations instead of iterating over boxes.
+    """
+    boxes = result.boxes if result is not None else None
+    if boxes is None or len(boxes) == 0:
+        return empty_detections()
+
+    xywh = boxes.xywh.cpu().numpy()
+    conf = boxes.conf.cpu().numpy()
+    cls = boxes.cls.cpu().numpy()
+
+    detections = np.empty((len(conf), DETECTION_COLUMNS), dtype=np.float32)
+    detections[:, 0:4] = xywh
+    detections[:, 4] = conf
+    detections[:, 5] = cls
+    return detections
+
+
+def array_to_detections(detections: np.ndarray, names: Dict[int, str], track_ids: np.ndarray = None) -> List[Dict]:
+    """
+    Convert a compact (N, 6) array into detection dicts
+    [{"bbox": [x, y, w, h], "confidence": float, "class_name": str}, ...]
+    With track_ids, every dict also gets its "track_id".
+    """
+    boxes = detections[:, 0:4].tolist()
+    confidences = detections[:, 4].tolist()
+    class_ids = detections[:, 5].astype(np.int64).tolist()
+
+    result = [
+        {
+            "bbox": bbox,
+            "confidence": conf,
+            "class_name": names.get(cls, str(cls))
+        }
+        for bbox, conf, cls in zip(boxes, confidences, class_ids)
+    ]
+
+    if track_ids is not None:
+        for detection, track_id in zip(result, np.asarray(track_ids).tolist()):
+            detection["track_id"] = track_id
+    return result
+
+
+def class_ids_for_names(names: Dict[int, str], class_names: Sequence[str]) -> np.ndarray:
+    """Map class names to the class ids of a model (unknown names are ignored)."""
+    wanted = {name.strip().lower() for name in class_names if name.strip()}
+    return np.array(
+        [cls for cls, name in names.items() if str(name).lower() in wanted],
+        dtype=np.float32
+    )
+
+
+def filter_detections(detections: np.ndarray, class_ids: np.ndarray = None, min_confidence: float = 0.0) -> np.ndarray:
+    """
+    Keep detections with confidence >= min_confidence and (if given) a class in class_ids.
+    One boolean mask over the whole array, no per-box Python work.
+    """
+    keep = detections[:, 4] >= min_confidence
+    if class_ids is not None:
+        keep &= np.isin(detections[:, 5], class_ids)
+    return detections[keep]
+
+
+def detections_to_boxes(detections: Union[np.ndarray, List[Dict]]) -> np.ndarray:
+    """
+    Get (N, 4) float [x, y, w, h] boxes from a compact detection array
+    or from a list of detection dicts (invalid bboxes are skipped).
+    """
+    if isinstance(detections, np.ndarray):
+        return detections[:, 0:4]
+
+    boxes = [
+        detection.get("bbox") for detection in detections
+        if detection.get("bbox") and len(detection.get("bbox")) == 4
+    ]
+    if not boxes:
+        return np.zeros((0, 4), dtype=np.float64)
+    return np.asarray(boxes, dtype=np.float64)
@@ -0,0 +1,79 @@
+# Partition utilities - MySQL RANGE partitions by day/month on a datetime column
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+PARTITION_UNITS = ("day", "month")
+
+# Time-partitioned tables: table -> (partition column, partition unit)
+PARTITIONED_TABLES = {
+    "detections": ("timestamp", "day"),
+    "slot_events": ("start_time", "month"),
+}
+
+MAXVALUE_PARTITION = "pmax"
+
+
+def period_start(day: date, unit: str) -> date:
+    """First day of the period (day or month) containing day"""
+    return day.replace(day=1) if unit == "month" else day
+
+
+def next_period(day: date, unit: str) -> date:
+    """First day of the period after the one starting at day"""
+    if unit == "month":
+        return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    return day + timedelta(days=1)
+
+
+def partition_name(bound: date) -> str:
+    """Name of the partition holding rows before bound (p20261018)"""
+    return f"p{bound:%Y%m%d}"
+
+
+def partition_bounds(first_bound: date, until: date, unit: str) -> List[date]:
+    """Upper bounds from first_bound (a period start) up to the first bound after until"""
+    bounds = [first_bound]
+    while bounds[-1] <= until:
+        bounds.append(next_period(bounds[-1], unit))
+    return bounds
+
+
+def partition_definitions(bounds: List[date], with_maxvalue: bool = True) -> str:
+    """PARTITION clauses for RANGE (TO_DAYS(column)) partitioning"""
+    parts = [
+        f"PARTITION {partition_name(bound)} VALUES LESS THAN (TO_DAYS('{bound.isoformat()}'))"
+        for bound in bounds
+    ]
+    if with_maxvalue:
+        parts.append(f"PARTITION {MAXVALUE_PARTITION} VALUES LESS THAN MAXVALUE")
+    return ", ".join(parts)
+
+
+def partition_by_clause(column: str, bounds: List[date]) -> str:
+    """PARTITION BY clause for ALTER TABLE (history before the first bound goes to the first partition)"""
+    return f"PARTITION BY RANGE (TO_DAYS(`{column}`)) ({partition_definitions(bounds)})"
+
+
+def to_days_date(value: int) -> date:
+    """Date of a MySQL TO_DAYS() value"""
+    return date.fromordinal(value - 365)
+
+
+def parse_partition_bound(description: Optional[str]) -> Optional[date]:
+    """Upper bound of a partition from information_schema PARTITION_DESCRIPTION (None = MAXVALUE)"""
+    if description is None or description.strip().upper() == "MAXVALUE":
+        return None
+    return to_days_date(int(description))
+
+
+def expired_partitions(partitions: List[Tuple[str, Optional[date]]], cutoff: date) -> List[str]:
+    """Partitions whose rows are all older than cutoff (upper bound <= cutoff)"""
+    return [name for name, bound in partitions if bound is not None and bound <= cutoff]
+
+
+def missing_bounds(partitions: List[Tuple[str, Optional[date]]], until: date, unit: str) -> List[date]:
+    """Bounds to add (before MAXVALUE) so partitions exist up to until"""
+    bounds = [bound for _, bound in partitions if bound is not None]
+    if not bounds:
+        return []
+    return partition_bounds(max(bounds), until, unit)[1:]
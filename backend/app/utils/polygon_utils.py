@@ -1,6 +1,9 @@
 # Polygon utilities - intersection, IoU, etc.
 
-from typing import List, Tuple
+from typing import List, NamedTuple, Optional, Tuple
+import cv2
+import shapely
+from shapely import STRtree
 from shapely.geometry import Polygon, box
 import numpy as np
 
@@ -8,6 +11,62 @@ def polygon_from_points(points: List[List[float]]) -> Polygon:
     """Create a Shapely polygon from a list of points."""
     return Polygon(points)
 
+# Packed polygon format: float32 little-endian [x0, y0, x1, y1, ...]
+PACKED_POLYGON_DTYPE = np.dtype("<f4")
+
+def pack_polygon(points) -> Tuple[bytes, int]:
+    """Pack polygon points into a float32 little-endian blob, return (blob, vertex count)."""
+    points = np.asarray(points, dtype=PACKED_POLYGON_DTYPE).reshape(-1, 2)
+    return points.tobytes(), len(points)
+
+def unpack_polygon(blob: bytes, vertex_count: int = None) -> np.ndarray:
+    """Decode a packed polygon into a read-only (K, 2) float32 view of the blob (no copy)."""
+    points = np.frombuffer(blob, dtype=PACKED_POLYGON_DTYPE).reshape(-1, 2)
+    if vertex_count is not None and len(points) != vertex_count:
+        raise ValueError(f"packed polygon has {len(points)} vertices, expected {vertex_count}")
+    return points
+
+def unpack_polygons(blobs: List[bytes], vertex_counts: List[int]) -> Tuple[List[np.ndarray], np.ndarray]:
+    """
+    Decode many packed polygons with one frombuffer over their concatenation.
+    returns:
+        (list of (K, 2) float32 views, array of Shapely polygons built in one vectorized call)
+    """
+    if not blobs:
+        return [], np.zeros(0, dtype=object)
+
+    coords = np.frombuffer(b"".join(blobs), dtype=PACKED_POLYGON_DTYPE).reshape(-1, 2)
+    counts = np.asarray(vertex_counts, dtype=np.int64)
+    if counts.sum() != len(coords):
+        raise ValueError("vertex counts do not match packed polygon data")
+
+    polygons = np.split(coords, np.cumsum(counts)[:-1])
+    rings = shapely.linearrings(coords, indices=np.repeat(np.arange(len(counts)), counts))
+    return polygons, shapely.polygons(rings)
+
+def repair_slot_polygon(points: List[List[float]]) -> Tuple[List[List[float]], float, Tuple[float, float, float, float]]:
+    """
+    Validate a slot polygon and repair it with make_valid.
+    If the repair splits it (e.g. a bow-tie), the largest part is kept.
+    returns:
+        (points of the repaired polygon, area, (min_x, min_y, max_x, max_y))
+    raises:
+        ValueError if the points do not enclose any area
+    """
+    polygon = Polygon(points)
+    if not polygon.is_valid:
+        repaired = shapely.make_valid(polygon)
+        parts = [part for part in shapely.get_parts(repaired) if isinstance(part, Polygon)]
+        if not parts:
+            raise ValueError("polygon has no area")
+        polygon = max(parts, key=lambda part: part.area)
+
+    if polygon.is_empty or polygon.area <= 0:
+        raise ValueError("polygon has no area")
+
+    coords = [[float(x), float(y)] for x, y in polygon.exterior.coords[:-1]]
+    return coords, float(polygon.area), tuple(float(v) for v in polygon.bounds)
+
 def bbox_to_polygon(bbox: List[float]) -> Polygon:
     """
     Convert a bounding box to a Shapely polygon.
@@ -60,11 +119,243 @@ def calculate_overlap_ratio(bbox_poly: Polygon, slot_poly: Polygon) -> float:
         return 0.0
     return intersection / slot_poly.area
 
+def bboxes_yolo_to_polygons(boxes: np.ndarray) -> np.ndarray:
+    """
+    Convert (N, 4) YOLO boxes [center_x, center_y, width, height] to an array
+    of Shapely polygons in one vectorized call (rows with NaN/inf give None).
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    half = boxes[:, 2:4] / 2
+    polygons = shapely.box(
+        boxes[:, 0] - half[:, 0], boxes[:, 1] - half[:, 1],
+        boxes[:, 0] + half[:, 0], boxes[:, 1] + half[:, 1]
+    )
+    polygons[~np.isfinite(boxes).all(axis=1)] = None
+    return polygons
+
+def overlap_matrix(
+        bbox_polys: np.ndarray,
+        slot_polys: np.ndarray,
+        slot_areas: Optional[np.ndarray] = None,
+        tree: Optional[STRtree] = None
+) -> np.ndarray:
+    """
+    Overlap ratio of every bbox over every slot (intersection area / slot area).
+    Candidate pairs come from an STRtree query, then every intersection area is
+    computed in one vectorized shapely.intersection/shapely.area call.
+    args:
+        bbox_polys: (D,) array of bbox polygons
+        slot_polys: (S,) array of slot polygons
+        slot_areas: (S,) slot areas (computed if not given)
+        tree: STRtree over slot_polys (built if not given)
+    returns:
+        (D, S) float64 matrix, 0 where a pair does not intersect
+    """
+    bbox_polys = np.asarray(bbox_polys, dtype=object)
+    slot_polys = np.asarray(slot_polys, dtype=object)
+    ratios = np.zeros((len(bbox_polys), len(slot_polys)), dtype=np.float64)
+    if len(bbox_polys) == 0 or len(slot_polys) == 0:
+        return ratios
+
+    if slot_areas is None:
+        slot_areas = shapely.area(slot_polys)
+    if tree is None:
+        tree = STRtree(slot_polys)
+
+    # (2, P) pairs [bbox index, slot index] whose bounding boxes intersect
+    bbox_index, slot_index = tree.query(bbox_polys)
+    if len(bbox_index) == 0:
+        return ratios
+
+    areas = shapely.area(shapely.intersection(bbox_polys[bbox_index], slot_polys[slot_index]))
+    slot_area = slot_areas[slot_index]
+    valid = slot_area > 0
+    ratios[bbox_index[valid], slot_index[valid]] = areas[valid] / slot_area[valid]
+    return ratios
+
+def best_slot_matches(ratios: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Best slot of every bbox from an overlap matrix.
+    returns:
+        (best slot index per bbox, best ratio per bbox, mask of bboxes with ratio >= threshold)
+    """
+    if ratios.shape[1] == 0:
+        empty = np.zeros(ratios.shape[0])
+        return empty.astype(np.int64), empty, empty.astype(bool)
+
+    best = ratios.argmax(axis=1)
+    best_ratio = ratios[np.arange(len(ratios)), best]
+    matched = (best_ratio > 0) & (best_ratio >= threshold)
+    return best, best_ratio, matched
+
+class SlotMasks(NamedTuple):
+    """
+    Rasterized slots: one summed-area table per slot over its own bbox,
+    packed into one flat array (see build_slot_masks)
+    """
+    scale: float  # Raster pixels per frame pixel
+    origins: np.ndarray  # (S, 2) int64 [x, y] of each slot bbox in raster pixels
+    sizes: np.ndarray  # (S, 2) int64 [width, height] of each slot bbox in raster pixels
+    offsets: np.ndarray  # (S,) int64 start of each table in tables
+    tables: np.ndarray  # Flat int32, table of slot s is (height + 1, width + 1)
+    pixel_counts: np.ndarray  # (S,) slot area in raster pixels
+
+def build_slot_masks(polygons: List[np.ndarray], scale: float = 0.5) -> SlotMasks:
+    """
+    Rasterize slot polygons (frame coordinates) at scale and build one
+    summed-area table per slot, so the area of a slot inside any
+    axis-aligned box is 4 table lookups.
+    """
+    origins = np.zeros((len(polygons), 2), dtype=np.int64)
+    sizes = np.zeros((len(polygons), 2), dtype=np.int64)
+    offsets = np.zeros(len(polygons), dtype=np.int64)
+    tables = []
+    offset = 0
+
+    for index, points in enumerate(polygons):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2) * scale
+        x0, y0 = np.floor(points.min(axis=0)).astype(np.int64)
+        x1, y1 = np.ceil(points.max(axis=0)).astype(np.int64) + 1
+        width, height = max(1, x1 - x0), max(1, y1 - y0)
+
+        mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(mask, [np.round(points - [x0, y0]).astype(np.int32)], 1)
+
+        table = np.zeros((height + 1, width + 1), dtype=np.int32)
+        table[1:, 1:] = mask.cumsum(axis=0, dtype=np.int32).cumsum(axis=1, dtype=np.int32)
+
+        origins[index] = (x0, y0)
+        sizes[index] = (width, height)
+        offsets[index] = offset
+        tables.append(table.ravel())
+        offset += table.size
+
+    tables = np.concatenate(tables) if tables else np.zeros(0, dtype=np.int32)
+    pixel_counts = tables[offsets + (sizes[:, 1] + 1) * (sizes[:, 0] + 1) - 1] if len(polygons) else np.zeros(0, dtype=np.int32)
+    return SlotMasks(scale, origins, sizes, offsets, tables, pixel_counts)
+
+def raster_overlap_matrix(boxes: np.ndarray, masks: SlotMasks) -> np.ndarray:
+    """
+    Overlap ratio of every YOLO box [center_x, center_y, w, h] over every
+    rasterized slot (slot pixels inside the box / slot pixels), computed
+    for all (D, S) pairs at once with summed-area table lookups.
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    ratios = np.zeros((len(boxes), len(masks.offsets)), dtype=np.float64)
+    if len(boxes) == 0 or len(masks.offsets) == 0:
+        return ratios
+
+    finite = np.isfinite(boxes).all(axis=1)
+    boxes = np.where(finite[:, None], boxes, 0.0)
+
+    # Box edges in raster pixels: (D, 1) against slot tables (1, S)
+    half = boxes[:, 2:4] / 2
+    x0 = np.round((boxes[:, 0] - half[:, 0]) * masks.scale)[:, None]
+    y0 = np.round((boxes[:, 1] - half[:, 1]) * masks.scale)[:, None]
+    x1 = np.round((boxes[:, 0] + half[:, 0]) * masks.scale)[:, None]
+    y1 = np.round((boxes[:, 1] + half[:, 1]) * masks.scale)[:, None]
+
+    # Clip to each slot bbox, in that slot's table coordinates
+    origin_x, origin_y = masks.origins[:, 0], masks.origins[:, 1]
+    width, height = masks.sizes[:, 0], masks.sizes[:, 1]
+    ax0 = np.clip(x0 - origin_x, 0, width).astype(np.int64)
+    ax1 = np.clip(x1 - origin_x, 0, width).astype(np.int64)
+    ay0 = np.clip(y0 - origin_y, 0, height).astype(np.int64)
+    ay1 = np.clip(y1 - origin_y, 0, height).astype(np.int64)
+
+    stride = width + 1
+    tables = masks.tables
+    base = masks.offsets
+    inside = (
+        tables[base + ay1 * stride + ax1] - tables[base + ay0 * stride + ax1]
+        - tables[base + ay1 * stride + ax0] + tables[base + ay0 * stride + ax0]
+    )
+
+    counts = masks.pixel_counts
+    np.divide(inside, counts, out=ratios, where=counts > 0)
+    ratios[~finite] = 0.0
+    return ratios
+
+def slot_quad(points: np.ndarray) -> np.ndarray:
+    """
+    Four corners of a slot as (4, 2) float32 [top-left, top-right, bottom-right, bottom-left]
+    Quadrilateral slots keep their own corners, other polygons use their
+    minimum-area rotated rectangle.
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+    if len(points) != 4:
+        points = cv2.boxPoints(cv2.minAreaRect(points))
+
+    sums = points.sum(axis=1)
+    diffs = points[:, 1] - points[:, 0]
+    return np.array(
+        [points[sums.argmin()], points[diffs.argmin()], points[sums.argmax()], points[diffs.argmax()]],
+        dtype=np.float32
+    )
+
+def build_slot_warps(polygons: List[np.ndarray], size: int) -> np.ndarray:
+    """(S, 3, 3) perspective transforms mapping each slot's quad onto a size x size patch"""
+    target = np.array([[0, 0], [size - 1, 0], [size - 1, size - 1], [0, size - 1]], dtype=np.float32)
+    warps = np.zeros((len(polygons), 3, 3), dtype=np.float64)
+    for index, points in enumerate(polygons):
+        quad = slot_quad(points)
+        if np.unique(quad, axis=0).shape[0] == 4:
+            warps[index] = cv2.getPerspectiveTransform(quad, target)
+        else:
+            # Degenerate slot: sample the neighbourhood of its first corner
+            warps[index] = [[1, 0, -quad[0, 0]], [0, 1, -quad[0, 1]], [0, 0, 1]]
+    return warps
+
+def warp_slot_patches(frame: np.ndarray, warps: np.ndarray, size: int, out: np.ndarray = None) -> np.ndarray:
+    """Warp every slot of a frame to a (S, size, size, C) uint8 patch batch"""
+    if out is None or out.shape != (len(warps), size, size) + frame.shape[2:]:
+        out = np.empty((len(warps), size, size) + frame.shape[2:], dtype=frame.dtype)
+    for index, warp in enumerate(warps):
+        cv2.warpPerspective(frame, warp, (size, size), dst=out[index], flags=cv2.INTER_LINEAR,
+                            borderMode=cv2.BORDER_REPLICATE)
+    return out
+
 def point_in_polygon(point: Tuple[float, float], polygon: Polygon) -> bool:
     """Check if a point (x, y) is inside a given polygon."""
     from shapely.geometry import Point
     return polygon.contains(Point(point))
 
+def transform_points_homography(points: np.ndarray, H: np.ndarray) -> np.ndarray:
+    """
+    Transform (..., 2) points with a 3x3 homography matrix H in one matrix multiply.
+    returns:
+        (..., 2) transformed points
+    """
+    points = np.asarray(points, dtype=np.float64)
+    H = np.asarray(H, dtype=np.float64)
+    transformed = points @ H[:, :2].T + H[:, 2]  # (..., 3) homogeneous
+    return transformed[..., :2] / transformed[..., 2:3]
+
+def bboxes_yolo_to_corners(boxes: np.ndarray) -> np.ndarray:
+    """Convert (N, 4) YOLO boxes [center_x, center_y, w, h] to (N, 4, 2) corners (clockwise from top-left)."""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    x0 = boxes[:, 0] - boxes[:, 2] / 2
+    y0 = boxes[:, 1] - boxes[:, 3] / 2
+    x1 = boxes[:, 0] + boxes[:, 2] / 2
+    y1 = boxes[:, 1] + boxes[:, 3] / 2
+    return np.stack([
+        np.column_stack([x0, y0]),
+        np.column_stack([x1, y0]),
+        np.column_stack([x1, y1]),
+        np.column_stack([x0, y1])
+    ], axis=1)
+
+def bboxes_yolo_to_ground_polygons(boxes: np.ndarray, H: np.ndarray) -> np.ndarray:
+    """
+    Map (N, 4) YOLO boxes into ground-plane quadrilaterals with a homography,
+    all boxes in one matrix multiply (rows with NaN/inf give None).
+    """
+    quads = transform_points_homography(bboxes_yolo_to_corners(boxes), H)
+    polygons = np.empty(len(quads), dtype=object)
+    finite = np.isfinite(quads).all(axis=(1, 2))
+    polygons[finite] = shapely.polygons(quads[finite])
+    return polygons
+
 def transform_bbox_homography(bbox: List[float], H:np.ndarray) -> List[float]:
     """
     Transform a bounding box using a homography matrix H.
@@ -84,18 +375,161 @@ def transform_bbox_homography(bbox: List[float], H:np.ndarray) -> List[float]:
         [x, y + h]
     ], dtype='float32')
 
-    # Convert to homogeneous coordinates
-    ones = np.ones((4,1))
-    corners_homogeneous = np.hstack([corners, ones])  # Shape (4, 3)
-
-    # Apply homography
-    transformed = (H @ corners_homogeneous.T).T # Shape (4, 3)
-    transformed = transformed[:, :2] / transformed[:, 2:3]
+    transformed = transform_points_homography(corners, H)
 
     # get new bounding box
-    x_min = np.min(transformed[:, 0])
-    y_min = np.min(transformed[:, 1])
-    x_max = np.max(transformed[:, 0])
-    y_max = np.max(transformed[:, 1])
+    x_min, y_min = transformed.min(axis=0)
+    x_max, y_max = transformed.max(axis=0)
+
+    return [float(x_min), float(y_min), float(x_max - x_min), float(y_max - y_min)]
+
+def _box_overlap_pairs(boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(i, j) index pairs, i < j, of (N, 4) [x0, y0, x1, y1] boxes that overlap (touching is not overlap)"""
+    geoms = shapely.box(boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3])
+    left, right = STRtree(geoms).query(geoms, predicate="intersects")
+    a, b = boxes[left], boxes[right]
+    keep = (left < right) & (a[:, 0] < b[:, 2]) & (b[:, 0] < a[:, 2]) & (a[:, 1] < b[:, 3]) & (b[:, 1] < a[:, 3])
+    return left[keep], right[keep]
+
+
+def _merge_overlapping_boxes(boxes: np.ndarray) -> np.ndarray:
+    """
+    Replace every group of overlapping boxes by its bounding box, until none overlap
+    Connected components of the STRtree overlap pairs, one pass per round
+    (a merged box can reach boxes none of its parts overlapped)
+    """
+    while len(boxes) > 1:
+        left, right = _box_overlap_pairs(boxes)
+        if not len(left):
+            break
+
+        # Union-find over the overlap pairs
+        parent = np.arange(len(boxes))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in zip(left.tolist(), right.tolist()):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+        labels = np.array([find(i) for i in range(len(boxes))])
+
+        _, labels = np.unique(labels, return_inverse=True)
+        merged = np.empty((labels.max() + 1, 4))
+        merged[:, :2] = np.inf
+        merged[:, 2:] = -np.inf
+        np.minimum.at(merged[:, :2], labels, boxes[:, :2])
+        np.maximum.at(merged[:, 2:], labels, boxes[:, 2:])
+        boxes = merged
+    return boxes
+
+
+def _merge_cheapest_boxes(boxes: np.ndarray, max_crops: int) -> np.ndarray:
+    """
+    Merge the pair of (non-overlapping) boxes whose union adds the least
+    extra area until max_crops are left; a merged box also absorbs every
+    box it comes to overlap. Extra-area costs are kept as a matrix with the
+    cheapest partner of each row cached, so a merge only rescans the rows
+    whose cached partner changed.
+    """
+    def box_area(b):
+        return np.clip(b[..., 2] - b[..., 0], 0, None) * np.clip(b[..., 3] - b[..., 1], 0, None)
+
+    boxes = boxes.copy()
+    count = len(boxes)
+    areas = box_area(boxes)
+    alive = np.ones(count, dtype=bool)
+
+    def union_cost(i):
+        union = np.hstack([np.minimum(boxes[:, :2], boxes[i, :2]), np.maximum(boxes[:, 2:], boxes[i, 2:])])
+        row = box_area(union) - areas - areas[i]
+        row[~alive] = np.inf
+        row[i] = np.inf
+        return row
+
+    cost = np.vstack([union_cost(i) for i in range(count)])
+    partner = cost.argmin(axis=1)
+    row_min = cost[np.arange(count), partner]
+
+    while alive.sum() > max_crops:
+        i = int(np.argmin(row_min))
+        merged = [int(partner[i])]
+        while merged:
+            # Merge into box i, then take every box the grown box overlaps
+            for j in merged:
+                boxes[i, :2] = np.minimum(boxes[i, :2], boxes[j, :2])
+                boxes[i, 2:] = np.maximum(boxes[i, 2:], boxes[j, 2:])
+                alive[j] = False
+                cost[j] = np.inf
+                cost[:, j] = np.inf
+                row_min[j] = np.inf
+            areas[i] = box_area(boxes[i])
+            b = boxes[i]
+            overlap = alive & (boxes[:, 0] < b[2]) & (b[0] < boxes[:, 2]) & (boxes[:, 1] < b[3]) & (b[1] < boxes[:, 3])
+            overlap[i] = False
+            merged = np.flatnonzero(overlap).tolist()
+
+        # Only the row/column of box i changed (and dead columns became inf)
+        cost[i] = union_cost(i)
+        cost[:, i] = cost[i]
+        partner[i] = int(np.argmin(cost[i]))
+        row_min[i] = cost[i, partner[i]]
+        stale = alive & ~np.isfinite(cost[np.arange(count), partner])
+        stale |= alive & (partner == i)
+        stale[i] = False
+        for k in np.flatnonzero(stale).tolist():
+            partner[k] = int(np.argmin(cost[k]))
+            row_min[k] = cost[k, partner[k]]
+        better = alive & (cost[:, i] < row_min)
+        partner[better] = i
+        row_min[better] = cost[better, i]
+    return boxes[alive]
+
+
+def slot_crop_regions(
+        polygons: List[np.ndarray],
+        frame_shape: Tuple[int, ...],
+        padding: float = 0.25,
+        max_crops: int = 1
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Compute padded crop regions covering all slot polygons.
+    args:
+        polygons: list of (K, 2) point arrays in frame coordinates
+        frame_shape: (height, width, ...) of the frame
+        padding: padding added on each side, as a fraction of each slot bbox size
+        max_crops: max number of crops (overlapping crops are always merged)
+    returns:
+        Non-overlapping crops [(x0, y0, x1, y1), ...] clipped to the frame
+    """
+    height, width = frame_shape[:2]
+    if not polygons:
+        return [(0, 0, width, height)]
+
+    # Padded bbox of every slot
+    boxes = np.array([
+        [*points.min(axis=0), *points.max(axis=0)]
+        for points in (np.asarray(points, dtype=np.float64).reshape(-1, 2) for points in polygons)
+    ])
+    pad = (boxes[:, 2:] - boxes[:, :2]) * padding
+    boxes = np.hstack([boxes[:, :2] - pad, boxes[:, 2:] + pad])
+
+    # Merge overlapping boxes, then the cheapest pairs until max_crops is met
+    boxes = _merge_overlapping_boxes(boxes)
+    if len(boxes) > max(1, max_crops):
+        boxes = _merge_cheapest_boxes(boxes, max(1, max_crops))
+
+    crops = []
+    for x0, y0, x1, y1 in boxes:
+        x0 = int(max(0, np.floor(x0)))
+        y0 = int(max(0, np.floor(y0)))
+        x1 = int(min(width, np.ceil(x1)))
+        y1 = int(min(height, np.ceil(y1)))
+        if x1 > x0 and y1 > y0:
+            crops.append((x0, y0, x1, y1))
 
-    return [float(x_min), float(y_min), float(x_max - x_min), float(y_max - y_min)]
\ No newline at end of file
+    return crops or [(0, 0, width, height)]
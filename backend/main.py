@@ -6,8 +6,11 @@ from contextlib import asynccontextmanager
 
 from app.core.logger import logger
 from app.core.settings import settings
-from app.routes import health_routes, camera_routes, slot_routes, detection_routes, stream_routes, websocket_routes, detector_routes
+from app.routes import health_routes, camera_routes, slot_routes, detection_routes, stream_routes, websocket_routes, detector_routes, history_routes
 from app.services import ai_listener
+from app.services.slot_state import slot_state
+from app.services.detection_writer import detection_writer
+from app.services.retention import retention_job
 import asyncio
 
 @asynccontextmanager
@@ -27,6 +30,19 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"[ERROR] Failed to pre-load YOLO model: {e}")
     
+    # Load slot states into memory (statuses are written behind to the DB)
+    if settings.SLOT_STATE_STORE_ENABLED:
+        try:
+            await slot_state.start()
+        except Exception as e:
+            logger.error(f"[ERROR] Failed to load slot state store, using DB directly: {e}")
+    
+    # Buffered detection inserts
+    detection_writer.start()
+    
+    # Add upcoming partitions periodically (expired history is dropped only when RETENTION_ENABLED)
+    retention_job.start()
+    
     # Note: Detectors are now started dynamically via API
     # Use POST /api/v1/detectors/{camera_id}/start to start detection
     logger.info("Use POST /api/v1/detectors/{camera_id}/start to start camera detection")
@@ -35,6 +51,11 @@ async def lifespan(app: FastAPI):
     
     # Cleanup - stop all detectors
     ai_listener.stop_detector()
+    ai_listener.stop_inference_scheduler()
+    await detection_writer.stop()  # Write buffered detections
+    await retention_job.stop()
+    if slot_state.loaded:
+        await slot_state.stop()  # Flush pending status changes
     logger.info("Shutting down Smart Parking API...")
 
 app = FastAPI(
@@ -60,6 +81,7 @@ app.include_router(slot_routes.router, prefix="/api/v1", tags=["Slots"])
 app.include_router(detection_routes.router, prefix="/api/v1", tags=["Detections"])
 app.include_router(detector_routes.router, prefix="/api/v1", tags=["Detectors"])
 app.include_router(stream_routes.router, prefix="/api/v1", tags=["Stream"])
+app.include_router(history_routes.router, prefix="/api/v1", tags=["History"])
 app.include_router(websocket_routes.router, tags=["WebSocket"])
 
 @app.get("/")
@@ -0,0 +1,94 @@
+"""
+Script to compare inference backends (torch / onnx / openvino) side by side
+
+Chạy: python scripts/benchmark_backends.py --model checkpoint_last.pt --source video.mp4
+      python scripts/benchmark_backends.py --backends torch onnx --imgsz 480 --threads 4 --batch 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.inference_backends import BACKENDS, create_backend
+
+
+def load_frames(source, count):
+    """Read frames from a video/image/webcam, or make random frames if no source"""
+    if not source:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(count)]
+
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+
+    if not frames:
+        raise SystemExit(f"❌ Không đọc được frame từ {source}")
+    return frames
+
+
+def benchmark(backend, frames, batch, runs, warmup):
+    """Return per-frame latencies (ms) and detection counts of one backend"""
+    batches = [frames[i:i + batch] for i in range(0, len(frames), batch)]
+
+    for index in range(warmup):
+        backend.infer(batches[index % len(batches)])
+
+    latencies = []
+    detections = []
+    for index in range(runs):
+        images = batches[index % len(batches)]
+        started_at = time.perf_counter()
+        results = backend.infer(images)
+        latencies.append((time.perf_counter() - started_at) * 1000 / len(images))
+        detections.extend(len(result) for result in results)
+
+    return np.asarray(latencies), np.asarray(detections)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare YOLO inference backends on CPU")
+    parser.add_argument("--model", default="checkpoint_last.pt", help="Path to the .pt checkpoint")
+    parser.add_argument("--source", default="", help="Video/image/webcam index (empty = random frames)")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--threads", type=int, default=0, help="Backend threads (0 = default)")
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, max(args.batch, 16))
+
+    print("=" * 72)
+    print(f"🚀 BACKEND BENCHMARK - {args.model} (imgsz={args.imgsz}, batch={args.batch}, threads={args.threads or 'default'})")
+    print("=" * 72)
+    print(f"{'backend':<12}{'load s':>8}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'fps':>8}{'det/frame':>11}")
+
+    for name in args.backends:
+        started_at = time.perf_counter()
+        backend = create_backend(args.model, name, imgsz=args.imgsz, num_threads=args.threads)
+        load_time = time.perf_counter() - started_at
+
+        if backend.name != name:
+            print(f"{name:<12}⚠️ unavailable (fell back to {backend.name}), skipped")
+            continue
+
+        latencies, detections = benchmark(backend, frames, args.batch, args.runs, args.warmup)
+        print(
+            f"{name:<12}{load_time:>8.1f}{latencies.mean():>10.1f}{np.percentile(latencies, 50):>10.1f}"
+            f"{np.percentile(latencies, 95):>10.1f}{1000 / latencies.mean():>8.1f}{detections.mean():>11.2f}"
+        )
+
+    print("\n✅ Benchmark completed!")
@@ -1 +1,32 @@
 # Pytest configuration and fixtures
+import pytest
+import pytest_asyncio
+
+
+@pytest_asyncio.fixture
+async def db_engine(tmp_path):
+    """SQLite engine with every table created (file DB: concurrent sessions see each other's commits)"""
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.core.db import Base
+    import app.models  # noqa: F401  Register every model on Base
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_maker(db_engine):
+    """Session factory on the test engine (override in a module to seed rows)"""
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    return async_sessionmaker(db_engine, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
+async def session(session_maker):
+    """One session on the test engine"""
+    async with session_maker() as db:
+        yield db
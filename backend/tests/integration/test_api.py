@@ -1,4 +1,6 @@
 # Integration tests for API endpoints
+import asyncio
+
 import pytest
 from httpx import AsyncClient
 from main import app
@@ -30,10 +32,15 @@ async def test_full_flow():
                 {"bbox": [10, 10, 80, 80], "confidence": 0.95, "class_name": "car"}
             ]
         })
-        assert det_resp.status_code == 201
+        assert det_resp.status_code == 202  # Queued, slots are matched in a background task
+        assert det_resp.json()["detections_count"] == 1
         
-        # 4. Check slot status
-        slots = await client.get(f"/api/v1/slots?camera_id={camera_id}")
-        assert slots.status_code == 200
-        slot_data = slots.json()[0]
-        assert slot_data["status"] == "occupied"  # Should be occupied now
\ No newline at end of file
+        # 4. Check slot status (wait for the background slot update)
+        for _ in range(50):
+            slots = await client.get(f"/api/v1/slots?camera_id={camera_id}")
+            assert slots.status_code == 200
+            slot_data = slots.json()[0]
+            if slot_data["status"] == "occupied":
+                break
+            await asyncio.sleep(0.1)
+        assert slot_data["status"] == "occupied"  # Should be occupied now
@@ -0,0 +1,61 @@
+# Unit tests for the adaptive cadence controller
+from app.services.cadence_controller import CadenceController
+
+
+def record_frame(controller, latency, compute_time=0.01):
+    """One processed frame: inference then post-processing (the interval adjusts once)"""
+    controller.record_inference(latency * 0.7, compute_time)
+    controller.record_postprocess(latency * 0.3)
+
+
+def test_interval_backs_off_when_over_target():
+    controller = CadenceController(initial_interval=0.5, floor=0.2, ceiling=5.0, target_latency=0.5)
+    for _ in range(20):
+        record_frame(controller, 1.0, 0.1)
+    assert controller.interval > 0.5
+    assert controller.interval <= 5.0
+
+
+def test_interval_speeds_up_to_floor_with_spare_capacity():
+    controller = CadenceController(initial_interval=1.0, floor=0.2, ceiling=5.0, target_latency=0.5)
+    for _ in range(200):
+        record_frame(controller, 0.05)
+    assert controller.interval == 0.2
+
+
+def test_interval_adjusts_once_per_frame():
+    controller = CadenceController(initial_interval=1.0, floor=0.2, ceiling=5.0, target_latency=0.5)
+    controller.record_inference(2.0, 0.1)
+    assert controller.interval == 1.0  # Waits for the frame's post-processing
+
+    controller.record_postprocess(0.1)
+    assert controller.interval == 1.25
+
+
+def test_interval_holds_inside_hysteresis_band():
+    controller = CadenceController(initial_interval=1.0, floor=0.2, ceiling=5.0, target_latency=0.5)
+    for _ in range(50):
+        record_frame(controller, 0.4)  # Between half the target and the target
+    assert controller.interval == 1.0
+
+
+def test_interval_recovers_after_transient_spike():
+    controller = CadenceController(initial_interval=0.2, floor=0.2, ceiling=5.0, target_latency=0.5)
+    for _ in range(100):
+        record_frame(controller, 0.1)
+    for _ in range(8):
+        record_frame(controller, 2.0)
+    assert controller.interval > 0.5
+
+    frames = 0
+    while controller.interval >= 0.3:
+        record_frame(controller, 0.1)
+        frames += 1
+        assert controller.interval < controller.ceiling
+    assert frames <= 30
+
+
+def test_cpu_budget_bounds_interval():
+    controller = CadenceController(initial_interval=0.2, floor=0.2, ceiling=5.0, target_latency=10.0, cpu_budget=0.25)
+    record_frame(controller, 0.1, 0.1)
+    assert controller.interval >= 0.4
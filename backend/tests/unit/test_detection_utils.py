@@ -0,0 +1,37 @@
+# Unit tests for detection utilities
+import numpy as np
+from app.utils.detection_utils import (
+    array_to_detections,
+    class_ids_for_names,
+    detections_to_boxes,
+    filter_detections
+)
+
+NAMES = {0: "person", 2: "car", 7: "truck"}
+
+DETECTIONS = np.array([
+    [10, 10, 4, 4, 0.9, 2],   # car
+    [20, 20, 4, 4, 0.1, 2],   # car, low confidence
+    [30, 30, 4, 4, 0.8, 0],   # person
+    [40, 40, 4, 4, 0.7, 7],   # truck
+], dtype=np.float32)
+
+def test_filter_by_class_and_confidence():
+    class_ids = class_ids_for_names(NAMES, ["Car", "truck", "bus"])
+    kept = filter_detections(DETECTIONS, class_ids, min_confidence=0.25)
+    assert kept[:, 5].tolist() == [2, 7]
+
+def test_array_to_detections():
+    detections = array_to_detections(DETECTIONS[:1], NAMES)
+    assert detections[0]["bbox"] == [10, 10, 4, 4]
+    assert detections[0]["class_name"] == "car"
+    assert abs(detections[0]["confidence"] - 0.9) < 1e-6
+
+def test_detections_to_boxes_from_dicts():
+    boxes = detections_to_boxes([
+        {"bbox": [1, 2, 3, 4]},
+        {"bbox": [1, 2]},  # Invalid, skipped
+        {"confidence": 0.5},
+    ])
+    assert boxes.shape == (1, 4)
+    assert detections_to_boxes(DETECTIONS).shape == (4, 4)
@@ -0,0 +1,127 @@
+# Unit tests for the batched detection writer (SQLite)
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
+
+from app.models.camera import Camera
+from app.models.detection import Detection
+from app.routes import detection_routes
+from app.services import detection_writer as detection_writer_module
+from app.services.detection_writer import DetectionQueueFull, DetectionWriter, InvalidDetection
+
+pytest.importorskip("aiosqlite")
+
+CAR = {"bbox": [10, 10, 20, 20], "confidence": 0.9, "class_name": "car"}
+
+
+@pytest_asyncio.fixture
+async def session_maker(monkeypatch, db_engine, session_maker):
+    async with session_maker() as db:
+        db.add(Camera(id=1, name="cam"))
+        await db.commit()
+
+    session_maker.inserts = []
+    event.listen(
+        db_engine.sync_engine, "before_cursor_execute",
+        lambda *args: args[2].startswith("INSERT INTO detections") and session_maker.inserts.append(args[2])
+    )
+    monkeypatch.setattr(detection_writer_module, "async_session_maker", session_maker)
+    yield session_maker
+
+
+async def count_rows(session_maker) -> int:
+    async with session_maker() as db:
+        return await db.scalar(select(func.count()).select_from(Detection))
+
+
+@pytest.mark.asyncio
+async def test_buffered_rows_written_in_batches(session_maker):
+    writer = DetectionWriter(batch_size=4, flush_interval=60)
+    writer.start()
+
+    for frame in range(5):
+        writer.offer(1, [CAR, CAR], timestamp=1_700_000_000 + frame)
+    assert await count_rows(session_maker) == 0
+
+    await writer.stop()
+    assert await count_rows(session_maker) == 10
+    assert len(session_maker.inserts) == 3  # 4 + 4 + 2 rows
+    assert writer.get_stats()["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_sampling_keeps_share_of_frames(session_maker):
+    writer = DetectionWriter(flush_interval=60, sample_rate=0.25)
+
+    kept = sum(bool(writer.offer(1, [CAR])) for _ in range(8))
+    assert kept == 2
+    assert writer.sampled_out_frames == 6
+
+
+@pytest.mark.asyncio
+async def test_backpressure_when_full(session_maker):
+    writer = DetectionWriter(batch_size=100, flush_interval=60, max_pending=3, put_timeout=0.05)
+
+    assert writer.offer(1, [CAR, CAR, CAR]) == 3
+    assert writer.offer(1, [CAR]) == 0  # Dropped, never blocks the detector
+    assert writer.dropped_rows == 1
+
+    # put() waits for the flush task to make room
+    writer.start()
+    assert await writer.put(1, [CAR, CAR]) == 2
+    await writer.stop()
+    assert await count_rows(session_maker) == 5
+
+
+@pytest.mark.asyncio
+async def test_put_raises_when_buffer_stays_full(session_maker, monkeypatch):
+    async def stalled_flush():
+        return 0  # DB not keeping up
+
+    writer = DetectionWriter(batch_size=100, flush_interval=60, max_pending=2, put_timeout=0.05)
+    monkeypatch.setattr(writer, "flush", stalled_flush)
+    writer.start()
+
+    writer.offer(1, [CAR, CAR])
+    with pytest.raises(DetectionQueueFull):
+        await writer.put(1, [CAR])
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_malformed_detection_is_rejected(session_maker):
+    writer = DetectionWriter(flush_interval=60)
+
+    with pytest.raises(InvalidDetection):
+        await writer.put(1, [CAR, {"bbox": [1, 2, 3], "confidence": 0.5}])
+    assert writer.pending == 0  # Nothing of the frame is buffered
+
+    # The detector path skips bad detections and keeps the rest
+    assert writer.offer(1, [CAR, {"bbox": [1, 2, 3, 4], "confidence": None}, {"bbox": "x", "confidence": 1}]) == 1
+    assert writer.invalid_rows == 2
+    assert writer.pending == 1
+
+
+@pytest.mark.asyncio
+async def test_rows_rejected_by_db_do_not_block_the_buffer(session_maker):
+    writer = DetectionWriter(batch_size=10, flush_interval=60)
+    writer.offer(1, [CAR, CAR])
+    writer._rows.insert(1, {**writer._rows[0], "confidence": None})  # NOT NULL violation
+
+    assert await writer.flush() == 2
+    assert writer.rejected_rows == 1
+    assert writer.pending == 0
+    assert await count_rows(session_maker) == 2
+
+
+def test_route_returns_422_for_malformed_detection(monkeypatch):
+    monkeypatch.setattr(detection_routes, "detection_writer", DetectionWriter(flush_interval=60))
+    app = FastAPI()
+    app.include_router(detection_routes.router)
+
+    response = TestClient(app).post(
+        "/detections", json={"camera_id": 1, "detections": [{"bbox": [1, 2], "confidence": 0.9}]}
+    )
+    assert response.status_code == 422
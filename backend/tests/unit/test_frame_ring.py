@@ -0,0 +1,40 @@
+# Unit tests for frame ring
+import numpy as np
+from app.services.frame_ring import FrameRing
+
+def test_readers_get_latest_read_only_view():
+    ring = FrameRing(num_slots=3)
+    slot, buffer = ring.acquire_write()
+    assert buffer is None  # Size unknown before the first frame
+    seq = ring.commit(slot, np.full((4, 4, 3), 7, dtype=np.uint8))
+
+    slot, read_seq, frame = ring.acquire()
+    assert read_seq == seq
+    assert frame[0, 0, 0] == 7
+    assert not frame.flags.writeable
+    ring.release(slot)
+
+def test_held_slot_is_not_overwritten():
+    ring = FrameRing(num_slots=2)
+    slot, _ = ring.acquire_write()
+    ring.commit(slot, np.zeros((2, 2), dtype=np.uint8))
+    held, _, frame = ring.acquire()
+
+    # Only the other slot is free for the writer
+    write_slot, buffer = ring.acquire_write()
+    assert write_slot != held
+    buffer[...] = 1
+    ring.commit(write_slot, buffer)
+
+    # Latest and held slots both busy: writer must skip
+    assert ring.acquire_write() == (None, None)
+    assert ring.dropped_frames == 1
+    assert frame.sum() == 0
+    ring.release(held)
+
+def test_acquire_waits_for_newer_frame():
+    ring = FrameRing(num_slots=2)
+    slot, _ = ring.acquire_write()
+    seq = ring.commit(slot, np.zeros((2, 2), dtype=np.uint8))
+    slot, latest, frame = ring.acquire(after_seq=seq, timeout=0.05)
+    assert slot is None and frame is None and latest == seq
@@ -0,0 +1,54 @@
+# Unit tests for exported-model pre/post-processing
+import numpy as np
+
+from app.services.inference_backends import _ExportedBackend
+
+
+class _FakeBackend(_ExportedBackend):
+    """Exported backend returning a canned raw output"""
+
+    def __init__(self, output, **kwargs):
+        super().__init__("fake.onnx", **kwargs)
+        self.names = {0: "car", 1: "truck"}
+        self.output = output
+        self.inputs = None
+
+    def _forward(self, batch):
+        self.inputs = batch
+        return self.output
+
+
+def test_letterbox_shape_is_stride_aligned():
+    backend = _FakeBackend(None, imgsz=640)
+    batch, _ = backend._preprocess([np.zeros((360, 640, 3), dtype=np.uint8)])
+    assert batch.shape == (1, 3, 384, 640)
+    assert batch.dtype == np.float32
+
+
+def test_raw_head_decoded_to_frame_coordinates_with_nms():
+    # 1280x720 frame -> gain 0.5, 640x360 image padded to 640x384 (12 px on top)
+    raw = np.zeros((1, 6, 3), dtype=np.float32)
+    raw[0, :4, 0] = [320, 192, 100, 50]  # car, centered
+    raw[0, :4, 1] = [322, 193, 100, 50]  # duplicate car, suppressed by NMS
+    raw[0, :4, 2] = [100, 112, 40, 40]   # truck
+    raw[0, 4, 0:2] = [0.9, 0.8]
+    raw[0, 5, 2] = 0.6
+
+    backend = _FakeBackend(raw, imgsz=640)
+    detections = backend.infer([np.zeros((720, 1280, 3), dtype=np.uint8)])[0]
+
+    assert detections.shape == (2, 6)
+    car, truck = detections[np.argsort(detections[:, 5])]
+    np.testing.assert_allclose(car, [640, 360, 200, 100, 0.9, 0], atol=1e-4)
+    np.testing.assert_allclose(truck, [200, 200, 80, 80, 0.6, 1], atol=1e-4)
+
+
+def test_end_to_end_head_is_filtered_by_confidence():
+    raw = np.zeros((1, 300, 6), dtype=np.float32)
+    raw[0, 0] = [0, 12, 100, 112, 0.8, 1]
+    raw[0, 1] = [0, 12, 50, 62, 0.1, 0]
+
+    backend = _FakeBackend(raw, imgsz=640)
+    detections = backend.infer([np.zeros((360, 640, 3), dtype=np.uint8)])[0]
+
+    np.testing.assert_allclose(detections, [[50, 50, 100, 100, 0.8, 1]], atol=1e-4)
@@ -0,0 +1,181 @@
+# Unit tests for the batching inference scheduler (fake detectors and model)
+import time
+from threading import Event
+
+import numpy as np
+
+from app.services.ai_listener import InferenceScheduler
+
+
+class FakeDetector:
+    """Records what the scheduler hands back for each frame"""
+
+    def __init__(self, camera_id: int):
+        self.camera_id = camera_id
+        self.running = True
+        self.results = []
+        self.dropped = []
+        self.failed = []
+        self.done = Event()
+
+    def _on_inference_result(self, crop_boxes, names, frame_id, timestamp, compute_time=0.0):
+        self.results.append((frame_id, len(crop_boxes)))
+        self.done.set()
+
+    def _on_inference_dropped(self, frame_id):
+        self.dropped.append(frame_id)
+
+    def _on_inference_failed(self, frame_id):
+        self.failed.append(frame_id)
+
+
+def frame():
+    return np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+def test_batch_size_counts_images_round_robin():
+    scheduler = InferenceScheduler(max_batch_size=3, queue_size=32, queue_per_camera=4)
+    cameras = [FakeDetector(1), FakeDetector(2)]
+    for frame_id in range(1, 4):
+        for detector in cameras:
+            assert scheduler.submit(detector, [frame()], frame_id, 0.0)
+
+    batch, stale = scheduler._take_batch(time.time())
+
+    # Cameras alternate: a busy camera cannot fill the whole batch
+    assert [(job.detector.camera_id, job.frame_id) for job in batch] == [(1, 1), (2, 1), (1, 2)]
+    assert stale == []
+
+    batch, _ = scheduler._take_batch(time.time())
+    assert [(job.detector.camera_id, job.frame_id) for job in batch] == [(2, 2), (1, 3), (2, 3)]
+
+
+def test_crops_of_a_frame_stay_in_one_batch():
+    scheduler = InferenceScheduler(max_batch_size=3, queue_per_camera=4)
+    a, b = FakeDetector(1), FakeDetector(2)
+    scheduler.submit(a, [frame(), frame()], 1, 0.0)
+    scheduler.submit(b, [frame(), frame()], 1, 0.0)
+
+    batch, _ = scheduler._take_batch(time.time())
+    assert [job.detector.camera_id for job in batch] == [1]
+    assert scheduler.get_stats()["queue_depth"] == 1
+
+
+def test_partial_batch_waits_max_wait():
+    scheduler = InferenceScheduler(max_batch_size=8, max_wait_ms=50)
+    scheduler.running = True
+    scheduler.submit(FakeDetector(1), [frame()], 1, 0.0)
+
+    started = time.perf_counter()
+    batch = scheduler._next_batch()
+    waited = time.perf_counter() - started
+
+    assert len(batch) == 1
+    assert 0.04 <= waited < 0.5
+
+
+def test_full_batch_does_not_wait():
+    scheduler = InferenceScheduler(max_batch_size=2, max_wait_ms=1000, queue_per_camera=4)
+    scheduler.running = True
+    detector = FakeDetector(1)
+    scheduler.submit(detector, [frame()], 1, 0.0)
+    scheduler.submit(detector, [frame()], 2, 0.0)
+
+    started = time.perf_counter()
+    assert len(scheduler._next_batch()) == 2
+    assert time.perf_counter() - started < 0.5
+
+
+def test_drop_oldest_evicts_queued_frame():
+    scheduler = InferenceScheduler(queue_per_camera=2, drop_policy="oldest")
+    detector = FakeDetector(1)
+    for frame_id in (1, 2, 3):
+        assert scheduler.submit(detector, [frame()], frame_id, 0.0)
+
+    assert detector.dropped == [1]
+    batch, _ = scheduler._take_batch(time.time())
+    assert [job.frame_id for job in batch] == [2, 3]
+    assert scheduler.get_camera_stats(1)["dropped_full"] == 1
+
+
+def test_drop_newest_rejects_new_frame():
+    scheduler = InferenceScheduler(queue_per_camera=2, drop_policy="newest")
+    detector = FakeDetector(1)
+    assert scheduler.submit(detector, [frame()], 1, 0.0)
+    assert scheduler.submit(detector, [frame()], 2, 0.0)
+    assert not scheduler.submit(detector, [frame()], 3, 0.0)
+
+    assert detector.dropped == []  # Caller keeps ownership of a rejected frame
+    batch, _ = scheduler._take_batch(time.time())
+    assert [job.frame_id for job in batch] == [1, 2]
+
+
+def test_global_queue_size_is_shared_by_cameras():
+    scheduler = InferenceScheduler(queue_size=2, queue_per_camera=2, drop_policy="newest")
+    assert scheduler.submit(FakeDetector(1), [frame()], 1, 0.0)
+    assert scheduler.submit(FakeDetector(2), [frame()], 1, 0.0)
+    assert not scheduler.submit(FakeDetector(3), [frame()], 1, 0.0)
+
+
+def test_stale_frames_are_dropped():
+    scheduler = InferenceScheduler(max_frame_age=0.5, queue_per_camera=4)
+    detector = FakeDetector(1)
+    scheduler.submit(detector, [frame()], 1, 0.0)
+    scheduler.submit(detector, [frame()], 2, 0.0)
+
+    batch, stale = scheduler._take_batch(time.time() + 1.0)
+    assert batch == []
+    assert [job.frame_id for job in stale] == [1, 2]
+    assert scheduler.get_camera_stats(1)["dropped_stale"] == 2
+
+
+def test_camera_stats():
+    scheduler = InferenceScheduler(queue_per_camera=4)
+    detector = FakeDetector(1)
+    scheduler.submit(detector, [frame()], 1, 0.0)
+    scheduler.submit(detector, [frame()], 2, 0.0)
+    assert scheduler.get_camera_stats(1)["queue_depth"] == 2
+
+    scheduler._take_batch(time.time() + 0.1)
+    stats = scheduler.get_camera_stats(1)
+    assert stats["submitted"] == 2 and stats["processed"] == 2 and stats["queue_depth"] == 0
+    assert stats["avg_wait_ms"] >= 100 and stats["max_wait_ms"] >= 100
+
+
+def test_forget_camera_releases_queued_frames():
+    scheduler = InferenceScheduler(queue_per_camera=4)
+    a, b = FakeDetector(1), FakeDetector(2)
+    scheduler.submit(a, [frame()], 1, 0.0)
+    scheduler.submit(a, [frame()], 2, 0.0)
+    scheduler.submit(b, [frame()], 1, 0.0)
+
+    scheduler.forget_camera(1)
+
+    assert a.dropped == [1, 2]
+    assert b.dropped == []
+    batch, _ = scheduler._take_batch(time.time())
+    assert [job.detector.camera_id for job in batch] == [2]
+
+
+def test_worker_hands_each_camera_its_crops(monkeypatch):
+    scheduler = InferenceScheduler(max_batch_size=4, max_wait_ms=10, queue_per_camera=4)
+    batches = []
+
+    def fake_runner(worker_id):
+        def infer(frames):
+            batches.append(len(frames))
+            return [np.zeros((0, 6), dtype=np.float32) for _ in frames], {0: "car"}
+        return infer
+    monkeypatch.setattr(scheduler, "_create_runner", fake_runner)
+
+    a, b = FakeDetector(1), FakeDetector(2)
+    scheduler.submit(a, [frame(), frame()], 1, 0.0)
+    scheduler.submit(b, [frame()], 1, 0.0)
+    scheduler.start()
+    try:
+        assert a.done.wait(2) and b.done.wait(2)
+    finally:
+        scheduler.stop()
+
+    assert a.results == [(1, 2)] and b.results == [(1, 1)]
+    assert batches == [3]  # One forward pass for both cameras
@@ -0,0 +1,67 @@
+# Unit tests for the inference process pool (spawned workers with a stub backend)
+import time
+
+import numpy as np
+import pytest
+
+from app.services.inference_workers import ProcessInferencePool
+
+SLOW_PIXEL = 255  # Frames starting with this value make the stub backend hang
+
+
+class StubBackend:
+    """One (1, 6) row per frame: [mean, first pixel, height, width, 0, 0]"""
+
+    names = {0: "car"}
+
+    def infer(self, frames):
+        if any(frame.flat[0] == SLOW_PIXEL for frame in frames):
+            time.sleep(30)
+        return [
+            np.array([[frame.mean(), frame.flat[0], frame.shape[0], frame.shape[1], 0, 0]], dtype=np.float32)
+            for frame in frames
+        ]
+
+
+def stub_backend(model_path, backend, imgsz, num_threads):
+    return StubBackend()
+
+
+@pytest.fixture
+def pool():
+    pool = ProcessInferencePool(
+        "stub.pt", num_processes=1, slots_per_process=2, max_frame_bytes=8 * 8 * 3,
+        timeout=1.0, startup_timeout=60.0, backend_factory=stub_backend
+    )
+    pool.start()
+    assert pool.wait_ready(0) == {0: "car"}
+    yield pool
+    pool.stop()
+
+
+def frame(value, height=8, width=8):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def test_frames_round_trip_through_shared_memory(pool):
+    detections = pool.infer(0, [frame(7), frame(9, height=4)])
+
+    assert [row[0].tolist() for row in detections] == [[7, 7, 8, 8, 0, 0], [9, 9, 4, 8, 0, 0]]
+
+
+def test_frame_larger_than_slot_is_rejected(pool):
+    with pytest.raises(ValueError):
+        pool.infer(0, [frame(1, height=16)])
+
+
+def test_timeout_restarts_worker(pool):
+    pid = pool._workers[0].process.pid
+
+    with pytest.raises(TimeoutError):
+        pool.infer(0, [frame(SLOW_PIXEL)])
+
+    # The hung worker is replaced before its slots are reused
+    worker = pool._workers[0]
+    assert worker.process.pid != pid and worker.process.is_alive()
+    detections = pool.infer(0, [frame(3)])
+    assert detections[0][0].tolist() == [3, 3, 8, 8, 0, 0]
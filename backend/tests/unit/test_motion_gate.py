@@ -0,0 +1,37 @@
+# Unit tests for motion gate
+import numpy as np
+from app.services.motion_gate import MotionGate
+from app.services.slot_cache import SlotLayout
+
+SLOT = np.array([[400, 200], [600, 200], [600, 350], [400, 350]], dtype=np.float32)
+
+def make_frame(car: bool = False, noise_outside: bool = False) -> np.ndarray:
+    frame = np.full((360, 640, 3), 40, dtype=np.uint8)
+    if car:
+        frame[220:300, 420:500] = 255
+    if noise_outside:
+        frame[10:40, 10:40] = 255
+    return frame
+
+def test_motion_outside_slots_is_skipped():
+    layout = SlotLayout(1, 0, [1], [SLOT])
+    gate = MotionGate(force_interval=100, settle_frames=0)
+    assert gate.should_infer(make_frame(), layout, 0.0)  # First frame always runs
+    assert not gate.should_infer(make_frame(noise_outside=True), layout, 1.0)
+    assert gate.skipped == 1
+
+def test_motion_inside_slot_triggers_and_settles():
+    layout = SlotLayout(1, 0, [1], [SLOT])
+    gate = MotionGate(force_interval=100, settle_frames=1)
+    gate.should_infer(make_frame(), layout, 0.0)
+    gate.should_infer(make_frame(), layout, 1.0)  # Settle frame after the first one
+    assert gate.should_infer(make_frame(car=True), layout, 2.0)
+    assert gate.should_infer(make_frame(car=True), layout, 3.0)  # Settle frame
+    assert not gate.should_infer(make_frame(car=True), layout, 4.0)
+
+def test_forced_refresh():
+    layout = SlotLayout(1, 0, [1], [SLOT])
+    gate = MotionGate(force_interval=10, settle_frames=0)
+    gate.should_infer(make_frame(), layout, 0.0)
+    assert not gate.should_infer(make_frame(), layout, 5.0)
+    assert gate.should_infer(make_frame(), layout, 10.0)
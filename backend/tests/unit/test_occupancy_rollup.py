@@ -0,0 +1,126 @@
+# Unit tests for occupancy rollups and the history query (SQLite)
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+
+from app.models.camera import Camera
+from app.models.occupancy_rollup import SlotOccupancyRollup
+from app.models.slot import Slot, SlotStatus
+from app.models.slot_event import SlotEvent
+from app.services.occupancy_rollup import (
+    bucket_floor,
+    choose_bucket,
+    get_occupancy_history,
+    rollup_deltas,
+    split_period,
+    write_rollups
+)
+from app.services.slot_service import checkpoint_occupied_slots, update_slot_statuses, write_slot_statuses
+
+pytest.importorskip("aiosqlite")
+
+T0 = datetime(2026, 10, 17, 10, 0, 0)
+
+
+@pytest_asyncio.fixture
+async def session(session):
+    session.add(Camera(id=1, name="cam"))
+    session.add_all(Slot(id=i, camera_id=1, label=f"S{i}", polygon=[[0, 0], [1, 0], [1, 1]]) for i in (1, 2))
+    await session.commit()
+    yield session
+
+
+def test_split_period_across_buckets():
+    parts = split_period(T0 + timedelta(seconds=30), T0 + timedelta(minutes=2, seconds=15), 60)
+    assert parts == [
+        (T0, 30.0),
+        (T0 + timedelta(minutes=1), 60.0),
+        (T0 + timedelta(minutes=2), 15.0)
+    ]
+    assert bucket_floor(T0 + timedelta(hours=5, minutes=7), 86400) == datetime(2026, 10, 17)
+
+
+def test_rollup_deltas_slot_and_camera():
+    periods = [(1, 1, T0, T0 + timedelta(minutes=90)), (2, 1, T0, T0 + timedelta(minutes=30))]
+    changes = [(1, 1, T0 + timedelta(minutes=90))]
+    slot_deltas, camera_deltas = rollup_deltas(periods, changes)
+
+    assert slot_deltas[(1, 3600, T0)] == [3600.0, 0]
+    assert slot_deltas[(1, 3600, T0 + timedelta(hours=1))] == [1800.0, 1]
+    assert camera_deltas[(1, 3600, T0)] == [5400.0, 0]
+    assert camera_deltas[(1, 86400, datetime(2026, 10, 17))] == [7200.0, 1]
+
+
+def test_choose_bucket_by_range():
+    assert choose_bucket(T0, T0 + timedelta(hours=6), 750) == "minute"
+    assert choose_bucket(T0, T0 + timedelta(days=31), 750) == "hour"
+    assert choose_bucket(T0, T0 + timedelta(days=365), 750) == "day"
+
+
+@pytest.mark.asyncio
+async def test_upserts_accumulate_and_history_fills_gaps(session):
+    await write_rollups([(1, 1, T0, T0 + timedelta(minutes=30))], [], session)
+    await write_rollups([(2, 1, T0, T0 + timedelta(minutes=15))], [(2, 1, T0 + timedelta(minutes=15))], session)
+    await session.commit()
+
+    rows = (await session.execute(
+        select(SlotOccupancyRollup.slot_id, SlotOccupancyRollup.occupied_seconds)
+        .where(SlotOccupancyRollup.bucket_seconds == 3600)
+    )).all()
+    assert sorted(rows) == [(1, 1800.0), (2, 900.0)]
+
+    history = await get_occupancy_history(T0, T0 + timedelta(hours=3), "hour", session, camera_id=1)
+    assert [point["occupied_seconds"] for point in history] == [2700.0, 0.0, 0.0]
+    assert history[0]["changes"] == 1
+
+    slot_history = await get_occupancy_history(T0, T0 + timedelta(hours=1), "minute", session, slot_id=2)
+    assert len(slot_history) == 60
+    assert sum(point["occupied_seconds"] for point in slot_history) == 900.0
+
+
+@pytest.mark.asyncio
+async def test_next_event_closes_previous_end_time(session):
+    def event(slot_id, old, new, minutes):
+        return {"slot_id": slot_id, "old_status": old, "new_status": new, "start_time": T0 + timedelta(minutes=minutes)}
+
+    await write_slot_statuses({}, [event(1, "empty", "occupied", 0)], session)
+    await write_slot_statuses({}, [event(1, "occupied", "empty", 5), event(1, "empty", "occupied", 8)], session)
+    await session.commit()
+
+    rows = (await session.execute(
+        select(SlotEvent.start_time, SlotEvent.end_time).where(SlotEvent.slot_id == 1).order_by(SlotEvent.start_time)
+    )).all()
+    assert rows == [
+        (T0, T0 + timedelta(minutes=5)),
+        (T0 + timedelta(minutes=5), T0 + timedelta(minutes=8)),
+        (T0 + timedelta(minutes=8), None)
+    ]
+
+
+async def slot_occupied_seconds(db, slot_id):
+    return await db.scalar(
+        select(func.sum(SlotOccupancyRollup.occupied_seconds))
+        .where(SlotOccupancyRollup.slot_id == slot_id, SlotOccupancyRollup.bucket_seconds == 86400)
+    )
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_counts_still_occupied_slots_once(session):
+    occupied_at = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=10)
+    slot = await session.get(Slot, 1)
+    slot.status, slot.last_changed_at = SlotStatus.OCCUPIED, occupied_at
+    await session.commit()
+
+    # Still occupied: the checkpoint credits the time so far, the empty slot gets nothing
+    assert await checkpoint_occupied_slots(session, now=occupied_at + timedelta(minutes=5)) == 1
+    await session.commit()
+    assert await slot_occupied_seconds(session, 1) == 300.0
+    assert await slot_occupied_seconds(session, 2) is None
+
+    # Release: only the time after the checkpoint is added
+    assert await update_slot_statuses({1: "empty"}, session) == {1: "empty"}
+    await session.commit()
+    assert await slot_occupied_seconds(session, 1) == pytest.approx(600.0, abs=5)
+    assert await checkpoint_occupied_slots(session) == 0
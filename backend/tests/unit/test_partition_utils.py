@@ -0,0 +1,46 @@
+# Unit tests for partition utilities
+from datetime import date
+
+from app.utils.partition_utils import (
+    expired_partitions,
+    missing_bounds,
+    next_period,
+    parse_partition_bound,
+    partition_bounds,
+    partition_by_clause
+)
+
+
+def test_next_period():
+    assert next_period(date(2026, 12, 31), "day") == date(2027, 1, 1)
+    assert next_period(date(2026, 12, 1), "month") == date(2027, 1, 1)
+
+
+def test_partition_bounds_and_clause():
+    bounds = partition_bounds(date(2026, 11, 1), date(2026, 12, 15), "month")
+    assert bounds == [date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1)]
+
+    clause = partition_by_clause("start_time", bounds[:1])
+    assert clause == (
+        "PARTITION BY RANGE (TO_DAYS(`start_time`)) ("
+        "PARTITION p20261101 VALUES LESS THAN (TO_DAYS('2026-11-01')), "
+        "PARTITION pmax VALUES LESS THAN MAXVALUE)"
+    )
+
+
+def test_parse_partition_bound():
+    # MySQL: SELECT TO_DAYS('2007-10-07') = 733321
+    assert parse_partition_bound("733321") == date(2007, 10, 7)
+    assert parse_partition_bound("MAXVALUE") is None
+
+
+def test_expired_and_missing_partitions():
+    partitions = [
+        ("p20261015", date(2026, 10, 15)),
+        ("p20261016", date(2026, 10, 16)),
+        ("p20261017", date(2026, 10, 17)),
+        ("pmax", None),
+    ]
+    assert expired_partitions(partitions, date(2026, 10, 16)) == ["p20261015", "p20261016"]
+    assert missing_bounds(partitions, date(2026, 10, 19), "day") == [date(2026, 10, 18), date(2026, 10, 19), date(2026, 10, 20)]
+    assert missing_bounds(partitions, date(2026, 10, 10), "day") == []
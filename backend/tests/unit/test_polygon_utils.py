@@ -1,11 +1,31 @@
 # Unit tests for polygon utilities
+import itertools
+import time
+
 import pytest
 from app.utils.polygon_utils import (
     polygon_from_points,
     bbox_to_polygon,
     calculate_iou,
-    calculate_overlap_ratio
+    calculate_overlap_ratio,
+    slot_crop_regions,
+    bbox_yolo_to_polygon,
+    bboxes_yolo_to_polygons,
+    overlap_matrix,
+    best_slot_matches,
+    build_slot_masks,
+    raster_overlap_matrix,
+    transform_bbox_homography,
+    bboxes_yolo_to_ground_polygons,
+    repair_slot_polygon,
+    pack_polygon,
+    unpack_polygon,
+    unpack_polygons,
+    slot_quad,
+    build_slot_warps,
+    warp_slot_patches
 )
+import numpy as np
 
 def test_bbox_to_polygon():
     bbox = [0, 0, 10, 10]
@@ -31,4 +51,144 @@ def test_overlap_ratio():
     bbox_poly = bbox_to_polygon([5, 5, 10, 10])
     ratio = calculate_overlap_ratio(bbox_poly, slot_poly)
     # Intersection = 100, Slot area = 400
-    assert abs(ratio - 0.25) < 0.01
\ No newline at end of file
+    assert abs(ratio - 0.25) < 0.01
+
+def test_slot_crop_regions_merge_and_clip():
+    slots = [
+        [[10, 10], [50, 10], [50, 50], [10, 50]],
+        [[40, 10], [90, 10], [90, 50], [40, 50]],  # Overlaps the first slot
+        [[500, 300], [600, 300], [600, 400], [500, 400]],
+    ]
+    crops = slot_crop_regions(slots, (420, 620, 3), padding=0.25, max_crops=4)
+    assert len(crops) == 2
+    assert (0, 0, 103, 60) in crops  # Merged, clipped at the top-left corner
+    assert (475, 275, 620, 420) in crops  # Clipped at the bottom-right corner
+
+    crops = slot_crop_regions(slots, (420, 620, 3), padding=0.25, max_crops=1)
+    assert crops == [(0, 0, 620, 420)]
+
+def test_slot_crop_regions_many_slots():
+    slots = [
+        [[x, y], [x + 30, y], [x + 30, y + 50], [x, y + 50]]
+        for x in range(0, 1900, 40) for y in range(0, 1050, 60)
+    ]
+    started = time.perf_counter()
+    crops = slot_crop_regions(slots, (1080, 1920, 3), padding=0.1, max_crops=4)
+    assert time.perf_counter() - started < 2.0
+
+    assert len(crops) <= 4
+    for x0, y0, x1, y1 in crops:
+        assert 0 <= x0 < x1 <= 1920 and 0 <= y0 < y1 <= 1080
+    for a, b in itertools.combinations(crops, 2):
+        assert not (a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3])
+    for slot in slots:
+        (sx0, sy0), (sx1, sy1) = slot[0], slot[2]
+        assert any(x0 <= sx0 and y0 <= sy0 and min(sx1, 1920) <= x1 and min(sy1, 1080) <= y1 for x0, y0, x1, y1 in crops)
+
+def test_overlap_matrix_matches_pairwise_ratios():
+    rng = np.random.default_rng(0)
+    slots = [
+        polygon_from_points([[x, y], [x + 40, y + 5], [x + 35, y + 60], [x - 5, y + 55]])
+        for x in range(0, 400, 50) for y in range(0, 200, 70)
+    ]
+    boxes = np.column_stack([rng.uniform(0, 400, 30), rng.uniform(0, 200, 30), rng.uniform(5, 80, (30, 2))])
+    boxes[3] = [np.nan, 0, 10, 10]  # Invalid box never matches
+
+    ratios = overlap_matrix(bboxes_yolo_to_polygons(boxes), np.array(slots, dtype=object))
+
+    assert ratios.shape == (30, len(slots))
+    assert not ratios[3].any()
+    for i, bbox in enumerate(boxes):
+        if i == 3:
+            continue
+        expected = [calculate_overlap_ratio(bbox_yolo_to_polygon(bbox), slot) for slot in slots]
+        assert ratios[i] == pytest.approx(expected)
+
+def test_best_slot_matches_threshold():
+    ratios = np.array([[0.1, 0.6], [0.2, 0.1], [0.0, 0.0]])
+    best, best_ratio, matched = best_slot_matches(ratios, 0.3)
+    assert best.tolist()[:2] == [1, 0]
+    assert best_ratio.tolist() == [0.6, 0.2, 0.0]
+    assert matched.tolist() == [True, False, False]
+
+def test_raster_engine_agrees_with_polygon_engine():
+    rng = np.random.default_rng(1)
+    slots = [
+        np.array([[x, y], [x + 80, y + 10], [x + 70, y + 120], [x - 10, y + 110]], dtype=np.float32)
+        for x in range(20, 1200, 100) for y in range(20, 600, 150)
+    ]
+    boxes = np.column_stack([rng.uniform(0, 1250, 60), rng.uniform(0, 650, 60), rng.uniform(40, 200, (60, 2))])
+
+    polygon_ratios = overlap_matrix(
+        bboxes_yolo_to_polygons(boxes), np.array([polygon_from_points(p) for p in slots], dtype=object)
+    )
+    raster_ratios = raster_overlap_matrix(boxes, build_slot_masks(slots, scale=0.5))
+
+    assert raster_ratios.shape == polygon_ratios.shape
+    assert np.abs(raster_ratios - polygon_ratios).max() < 0.05
+    # Best slot picked from the raster is (near) best by exact overlap too
+    picked = polygon_ratios[np.arange(len(boxes)), raster_ratios.argmax(axis=1)]
+    assert (polygon_ratios.max(axis=1) - picked).max() < 0.05
+
+def test_batched_homography_matches_single_box_transform():
+    H = np.array([[1.2, 0.3, 5.0], [0.1, 2.0, -3.0], [0.0005, 0.002, 1.0]])
+    boxes = np.array([[50, 40, 20, 10], [200, 120, 60, 30]], dtype=np.float64)
+
+    polygons = bboxes_yolo_to_ground_polygons(boxes, H)
+
+    for polygon, (cx, cy, w, h) in zip(polygons, boxes):
+        x, y, bw, bh = transform_bbox_homography([cx - w / 2, cy - h / 2, w, h], H)
+        min_x, min_y, max_x, max_y = polygon.bounds
+        assert [min_x, min_y, max_x - min_x, max_y - min_y] == pytest.approx([x, y, bw, bh])
+
+def test_repair_slot_polygon():
+    points, area, bounds = repair_slot_polygon([[0, 0], [10, 0], [10, 5], [0, 5]])
+    assert area == 50
+    assert bounds == (0, 0, 10, 5)
+    assert len(points) == 4
+
+    # Bow-tie is split by make_valid, the largest valid part is kept
+    points, area, bounds = repair_slot_polygon([[0, 0], [10, 10], [10, 0], [0, 10]])
+    assert area == 25
+    assert polygon_from_points(points).is_valid
+
+    with pytest.raises(ValueError):
+        repair_slot_polygon([[0, 0], [1, 1], [2, 2]])
+
+def test_packed_polygons_roundtrip():
+    first, count = pack_polygon([[0, 0], [10, 0], [10, 5], [0, 5]])
+    assert count == 4
+    assert len(first) == 4 * 2 * 4
+
+    points = unpack_polygon(first, count)
+    assert points.dtype == np.float32
+    assert not points.flags.writeable  # View over the blob, no copy
+    assert points.tolist() == [[0, 0], [10, 0], [10, 5], [0, 5]]
+
+    second, _ = pack_polygon([[20, 20], [30, 20], [25, 30]])
+    polygons, geometries = unpack_polygons([first, second], [4, 3])
+    assert [len(p) for p in polygons] == [4, 3]
+    assert [g.area for g in geometries] == [50, 50]
+
+    with pytest.raises(ValueError):
+        unpack_polygons([first, second], [4, 4])
+
+def test_slot_quad_orders_corners():
+    quad = slot_quad(np.array([[10, 10], [0, 0], [10, 0], [0, 10]]))
+    assert quad.tolist() == [[0, 0], [10, 0], [10, 10], [0, 10]]
+
+def test_warp_slot_patches_samples_each_slot():
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    frame[20:40, 50:90] = 255
+    polygons = [
+        np.array([[50, 20], [89, 20], [89, 39], [50, 39]]),  # Bright slot
+        np.array([[120, 60], [160, 60], [170, 80], [140, 95], [120, 80]])  # Dark pentagon
+    ]
+    warps = build_slot_warps(polygons, 16)
+    patches = warp_slot_patches(frame, warps, 16)
+    assert patches.shape == (2, 16, 16, 3)
+    assert patches[0].min() == 255
+    assert patches[1].max() == 0
+
+    # Buffer is reused when the shape matches
+    assert warp_slot_patches(frame, warps, 16, out=patches) is patches
@@ -0,0 +1,89 @@
+# Unit tests for the retention job (SQLite fallback: bulk range delete)
+from datetime import date, datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+
+from app.models.camera import Camera
+from app.models.detection import Detection
+from app.models.slot import Slot
+from app.models.slot_event import SlotEvent
+from app.services.retention import apply_retention, carry_forward_open_rows
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest_asyncio.fixture
+async def session(session):
+    session.add(Camera(id=1, name="cam"))
+    session.add_all(
+        Detection(camera_id=1, bbox=[0, 0, 1, 1], confidence=0.9, class_name="car", timestamp=datetime(2026, 10, day))
+        for day in range(1, 18)
+    )
+    await session.commit()
+    yield session
+
+
+@pytest.mark.asyncio
+async def test_deletes_rows_older_than_retention(session):
+    summary = await apply_retention("detections", 7, session, today=date(2026, 10, 17))
+    await session.commit()
+
+    assert summary["deleted_rows"] == 9  # Oct 1..9, cutoff Oct 10
+    assert await session.scalar(select(func.min(Detection.timestamp))) == datetime(2026, 10, 10)
+
+
+@pytest.mark.asyncio
+async def test_zero_days_keeps_everything(session):
+    summary = await apply_retention("detections", 0, session, today=date(2026, 10, 17))
+
+    assert summary["deleted_rows"] == 0
+    assert await session.scalar(select(func.count()).select_from(Detection)) == 17
+
+
+async def add_slot_events(session):
+    session.add_all(Slot(id=i, camera_id=1, label=f"S{i}", polygon=[[0, 0], [1, 0], [1, 1]]) for i in (1, 2))
+    session.add_all([
+        SlotEvent(slot_id=1, old_status="empty", new_status="occupied",
+                  start_time=datetime(2025, 1, 1), end_time=datetime(2025, 1, 2)),
+        SlotEvent(slot_id=1, old_status="occupied", new_status="empty", start_time=datetime(2025, 1, 2)),
+        SlotEvent(slot_id=2, old_status="empty", new_status="occupied",
+                  start_time=datetime(2025, 3, 1), end_time=datetime(2025, 3, 2)),
+    ])
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_open_slot_events_are_carried_forward(session):
+    await add_slot_events(session)
+
+    summary = await apply_retention("slot_events", 30, session, today=date(2026, 10, 17))
+    await session.commit()
+
+    # Everything before the cutoff is deleted, the open event continues from the cutoff
+    assert summary["deleted_rows"] == 3
+    assert summary["carried_rows"] == 1
+    rows = (await session.execute(
+        select(SlotEvent.slot_id, SlotEvent.old_status, SlotEvent.new_status, SlotEvent.start_time, SlotEvent.end_time)
+    )).all()
+    assert rows == [(1, "occupied", "empty", datetime(2026, 9, 17), None)]
+
+
+@pytest.mark.asyncio
+async def test_carry_forward_leaves_recent_and_closed_rows(session):
+    await add_slot_events(session)
+
+    assert await carry_forward_open_rows("slot_events", date(2025, 1, 1), session) == 0
+    assert await carry_forward_open_rows("detections", date(2026, 1, 1), session) == 0
+    assert await carry_forward_open_rows("slot_events", date(2025, 2, 1), session) == 1
+    await session.commit()
+
+    rows = (await session.execute(
+        select(SlotEvent.start_time, SlotEvent.end_time).where(SlotEvent.slot_id == 1).order_by(SlotEvent.start_time)
+    )).all()
+    assert rows == [
+        (datetime(2025, 1, 1), datetime(2025, 1, 2)),
+        (datetime(2025, 1, 2), datetime(2025, 2, 1)),
+        (datetime(2025, 2, 1), None)
+    ]
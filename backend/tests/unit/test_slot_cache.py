@@ -0,0 +1,48 @@
+# Unit tests for the slot layout cache
+import numpy as np
+from shapely.geometry import box
+
+from app.services.slot_cache import SlotLayout, SlotCache
+
+
+def _square(x, y, size=10):
+    return np.array([[x, y], [x + size, y], [x + size, y + size], [x, y + size]], dtype=np.float32)
+
+
+def test_layout_precomputes_geometry_and_index():
+    layout = SlotLayout(1, 0, [7, 8], [_square(0, 0), _square(100, 0, 20)])
+
+    np.testing.assert_allclose(layout.areas, [100, 400])
+    np.testing.assert_allclose(layout.bounds[1], [100, 0, 120, 20])
+    assert list(layout.query(box(105, 5, 110, 10))) == [1]
+    assert len(layout.query(box(50, 50, 60, 60))) == 0
+
+
+def test_empty_layout():
+    layout = SlotLayout(1, 0, [], [])
+    assert len(layout) == 0
+    assert len(layout.query(box(0, 0, 10, 10))) == 0
+
+
+def test_invalidate_bumps_version_and_drops_layout():
+    cache = SlotCache()
+    cache._layouts[1] = SlotLayout(1, 0, [7], [_square(0, 0)])
+
+    cache.invalidate(1)
+
+    assert cache.version(1) == 1
+    assert cache.get_cached(1) is None
+
+
+def test_masks_are_cached_per_scale():
+    layout = SlotLayout(1, 0, [7], [_square(0, 0)])
+    assert layout.get_masks(0.5) is layout.get_masks(0.5)
+    assert layout.get_masks(1.0).pixel_counts[0] > layout.get_masks(0.5).pixel_counts[0]
+
+
+def test_layout_with_homography_uses_ground_plane_geometry():
+    H = np.diag([2.0, 0.5, 1.0])
+    layout = SlotLayout(1, 0, [7], [_square(0, 0)], homography=H)
+
+    np.testing.assert_allclose(layout.bounds[0], [0, 0, 20, 5])
+    np.testing.assert_allclose(layout.polygons[0], _square(0, 0))  # Frame coordinates kept for ROIs/motion
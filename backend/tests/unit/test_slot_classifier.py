@@ -0,0 +1,24 @@
+# Unit tests for the slot classifier engine
+import numpy as np
+from app.services.slot_classifier import EdgeDensityClassifier, create_slot_classifier
+
+
+def test_edge_density_flat_vs_textured():
+    rng = np.random.default_rng(0)
+    empty = np.full((16, 16, 3), 90, dtype=np.uint8)  # Flat asphalt
+    occupied = rng.integers(0, 255, (16, 16, 3), dtype=np.uint8)  # Lots of edges
+    classifier = EdgeDensityClassifier(size=16, threshold=0.08)
+
+    assert classifier.classify(np.stack([empty, occupied])).tolist() == [False, True]
+
+
+def test_classify_no_slots():
+    classifier = EdgeDensityClassifier(size=16)
+    assert classifier.classify(np.zeros((0, 16, 16, 3), dtype=np.uint8)).shape == (0,)
+
+
+def test_create_falls_back_to_heuristic():
+    classifier = create_slot_classifier("/nonexistent/classifier.onnx", size=32, edge_density=0.1)
+    assert classifier.name == "edges"
+    assert classifier.size == 32
+    assert classifier.threshold == 0.1
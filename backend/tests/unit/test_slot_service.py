@@ -1 +1,42 @@
 # Unit tests for slot service
+import numpy as np
+
+from app.services.slot_service import SlotStatusBuffer
+
+
+def test_majority_smoothing_with_hysteresis():
+    buffer = SlotStatusBuffer(smooth_frames=3, enter_ratio=0.6, exit_ratio=0.4)
+
+    assert buffer.update(1, [10, 11], [True, False], now=0).tolist() == [True, False]
+    # One empty frame is not enough to release slot 10 (share 0.5)
+    assert buffer.update(1, [10, 11], [False, True], now=1).tolist() == [True, False]
+    # 2 of 3 frames occupied: slot 11 enters, slot 10 still above exit ratio
+    assert buffer.update(1, [10, 11], [False, True], now=2).tolist() == [False, True]
+
+
+def test_debounce_delays_changes():
+    buffer = SlotStatusBuffer(smooth_frames=1, debounce=2.0)
+
+    assert buffer.update(1, [10], [False], now=0).tolist() == [False]
+    assert buffer.update(1, [10], [True], now=1).tolist() == [False]
+    assert buffer.update(1, [10], [True], now=2).tolist() == [False]
+    assert buffer.update(1, [10], [True], now=3).tolist() == [True]
+    # A flicker shorter than the debounce is ignored
+    assert buffer.update(1, [10], [False], now=4).tolist() == [True]
+    assert buffer.update(1, [10], [True], now=5).tolist() == [True]
+
+
+def test_layout_change_and_eviction():
+    buffer = SlotStatusBuffer(smooth_frames=3)
+    buffer.update(1, [10, 11], [True, True], now=0)
+    buffer.update(2, [20], [True], now=0)
+
+    # Slot 11 removed, slot 12 added: 10 keeps its history, 12 starts fresh
+    stable = buffer.update(1, [10, 12], np.array([False, False]), now=1)
+    assert stable.tolist() == [True, False]
+    assert buffer._cameras[1].slot_ids == [10, 12]
+
+    buffer.evict_slots(1, [10])
+    assert buffer._cameras[1].slot_ids == [12]
+    buffer.evict_camera(2)
+    assert 2 not in buffer._cameras
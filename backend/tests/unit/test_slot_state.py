@@ -0,0 +1,156 @@
+# Unit tests for the slot state store (SQLite)
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+
+from app.models.camera import Camera
+from app.models.occupancy_rollup import CameraOccupancyRollup
+from app.models.slot import Slot, SlotStatus
+from app.models.slot_event import SlotEvent
+from app.services import slot_state as slot_state_module
+from app.services.slot_state import SlotStateStore
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest_asyncio.fixture
+async def session_maker(monkeypatch, session_maker):
+    async with session_maker() as db:
+        db.add_all([Camera(id=1, name="cam 1"), Camera(id=2, name="cam 2")])
+        db.add_all(Slot(id=i, camera_id=1 if i <= 3 else 2, label=f"S{i}", polygon=[[0, 0], [1, 0], [1, 1]]) for i in range(1, 6))
+        await db.commit()
+
+    monkeypatch.setattr(slot_state_module, "async_session_maker", session_maker)
+    yield session_maker
+
+
+@pytest.mark.asyncio
+async def test_apply_serves_reads_then_flushes(session_maker):
+    store = SlotStateStore(flush_interval=60)
+    await store.start()
+
+    changed = store.apply({1: "occupied", 2: "empty", 4: "occupied", 99: "occupied"})
+    assert changed == {1: "occupied", 4: "occupied"}
+    assert store.get(1).status == "occupied" and store.get(1).version == 1
+    assert store.summary(1) == {"total": 3, "empty": 2, "occupied": 1, "reserved": 0, "disabled": 0}
+    assert [state.id for state in store.list(2)] == [4, 5]
+
+    # Nothing written until the flush
+    async with session_maker() as db:
+        assert (await db.scalar(select(Slot.status).where(Slot.id == 1))) == SlotStatus.EMPTY
+
+    await store.stop()  # Flushes on shutdown
+    async with session_maker() as db:
+        assert (await db.scalar(select(Slot.status).where(Slot.id == 1))) == SlotStatus.OCCUPIED
+        events = (await db.execute(select(SlotEvent.slot_id, SlotEvent.new_status))).all()
+    assert sorted(events) == [(1, "occupied"), (4, "occupied")]
+    assert store.get_stats()["pending_events"] == 0
+
+
+@pytest.mark.asyncio
+async def test_repeated_changes_coalesce_into_one_row(session_maker):
+    store = SlotStateStore(flush_interval=60)
+    async with session_maker() as db:
+        await store.load(db)
+
+    store.apply({1: "occupied"})
+    store.apply({1: "empty"})
+    store.apply({1: "occupied"})
+    assert await store.flush() == 1
+    assert store.flushed_events == 3
+    assert await store.flush() == 0
+
+
+@pytest.mark.asyncio
+async def test_removed_slots_drop_pending_writes(session_maker):
+    store = SlotStateStore(flush_interval=60)
+    async with session_maker() as db:
+        await store.load(db)
+
+    store.apply({1: "occupied", 4: "occupied"})
+    store.remove_camera(2)
+    assert store.get(4) is None
+    assert store.get_stats()["pending_events"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slot_deleted_during_flush_gets_no_events(session_maker, monkeypatch):
+    store = SlotStateStore(flush_interval=60)
+    async with session_maker() as db:
+        await store.load(db)
+    store.apply({1: "occupied", 2: "occupied"})
+
+    # The delete route removes slot 2 while the flush is opening its session
+    def deleting_session_maker():
+        store.remove_slots([2])
+        return session_maker()
+    monkeypatch.setattr(slot_state_module, "async_session_maker", deleting_session_maker)
+
+    assert await store.flush() == 1
+    async with session_maker() as db:
+        events = (await db.execute(select(SlotEvent.slot_id))).scalars().all()
+    assert events == [1]
+
+
+@pytest.mark.asyncio
+async def test_occupied_time_goes_to_rollups(session_maker):
+    store = SlotStateStore(flush_interval=60, checkpoint_interval=3600)
+    async with session_maker() as db:
+        await store.load(db)
+
+    store.apply({1: "occupied", 2: "occupied"})
+    store.get(1).accounted_until -= timedelta(seconds=30)  # Occupied 30s before release
+    store.apply({1: "empty"})
+    await store.flush()
+    async with session_maker() as db:
+        seconds = await db.scalar(
+            select(func.sum(CameraOccupancyRollup.occupied_seconds)).where(CameraOccupancyRollup.bucket_seconds == 86400)
+        )
+        changes = await db.scalar(
+            select(func.sum(CameraOccupancyRollup.changes)).where(CameraOccupancyRollup.bucket_seconds == 86400)
+        )
+    assert 30 <= seconds < 31
+    assert changes == 3
+
+    # Slot 2 is still occupied: counted by the checkpoint
+    store.get(2).accounted_until -= timedelta(seconds=20)
+    store.checkpoint()
+    await store.flush()
+    async with session_maker() as db:
+        seconds = await db.scalar(
+            select(func.sum(CameraOccupancyRollup.occupied_seconds)).where(CameraOccupancyRollup.bucket_seconds == 86400)
+        )
+    assert 50 <= seconds < 51
+
+
+@pytest.mark.asyncio
+async def test_load_resumes_from_last_checkpoint(session_maker):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    async with session_maker() as db:
+        for slot_id, accounted_until in ((1, now - timedelta(seconds=40)), (2, None)):
+            slot = await db.get(Slot, slot_id)
+            slot.status, slot.last_changed_at, slot.accounted_until = SlotStatus.OCCUPIED, now - timedelta(minutes=5), accounted_until
+        await db.commit()
+
+    store = SlotStateStore(flush_interval=60, checkpoint_interval=3600)
+    async with session_maker() as db:
+        await store.load(db)
+
+    # Naive UTC, from the persisted checkpoint (or the last change when never checkpointed)
+    assert store.get(1).last_changed_at == now - timedelta(minutes=5)
+    assert store.get(1).accounted_until == now - timedelta(seconds=40)
+    assert store.get(2).accounted_until == now - timedelta(minutes=5)
+    assert store.get(3).last_changed_at.tzinfo is None
+
+    # Occupied time since the last checkpoint before the restart reaches the rollups
+    store.checkpoint()
+    await store.flush()
+    async with session_maker() as db:
+        seconds = await db.scalar(
+            select(func.sum(CameraOccupancyRollup.occupied_seconds)).where(CameraOccupancyRollup.bucket_seconds == 86400)
+        )
+        accounted = await db.scalar(select(Slot.accounted_until).where(Slot.id == 1))
+    assert 340 <= seconds < 345
+    assert accounted > now
@@ -0,0 +1,59 @@
+# Unit tests for bulk slot status updates (SQLite)
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select
+
+from app.models.camera import Camera
+from app.models.slot import Slot, SlotStatus
+from app.models.slot_event import SlotEvent
+from app.services.slot_service import update_and_load_slot_statuses, update_slot_statuses
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest_asyncio.fixture
+async def session(db_engine, session):
+    session.add(Camera(id=1, name="cam"))
+    session.add_all(Slot(id=i, camera_id=1, label=f"S{i}", polygon=[[0, 0], [1, 0], [1, 1]]) for i in range(1, 201))
+    await session.commit()
+    session.statements = []
+    event.listen(db_engine.sync_engine, "before_cursor_execute", lambda *args: session.statements.append(args[2].split()[0]))
+    yield session
+
+
+@pytest.mark.asyncio
+async def test_constant_statements_per_update(session):
+    status_map = {i: "occupied" if i % 2 else "empty" for i in range(1, 201)}
+    status_map[999] = "occupied"  # Unknown slot is ignored
+
+    changed = await update_slot_statuses(status_map, session)
+    await session.commit()
+
+    # Select, slot update, close open events, insert events, slot and camera rollups
+    assert session.statements == ["SELECT", "UPDATE", "UPDATE", "INSERT", "INSERT", "INSERT"]
+    assert changed == {i: "occupied" for i in range(1, 201, 2)}
+
+    statuses = dict((await session.execute(select(Slot.id, Slot.status))).all())
+    assert statuses[1] == SlotStatus.OCCUPIED and statuses[2] == SlotStatus.EMPTY
+
+    events = (await session.execute(select(SlotEvent.slot_id, SlotEvent.old_status, SlotEvent.new_status))).all()
+    assert len(events) == 100
+    assert events[0] == (1, "empty", "occupied")
+
+
+@pytest.mark.asyncio
+async def test_no_change_no_writes(session):
+    changed = await update_slot_statuses({1: "empty", 2: "empty"}, session)
+
+    assert changed == {}
+    assert session.statements == ["SELECT"]
+
+
+@pytest.mark.asyncio
+async def test_loaded_rows_are_returned_with_new_statuses(session):
+    changed, slots = await update_and_load_slot_statuses({1: "occupied", 2: "empty"}, session)
+
+    assert changed == {1: "occupied"}
+    assert session.statements[0] == "SELECT" and session.statements.count("SELECT") == 1
+    assert {slot.id: slot.status for slot in slots} == {1: SlotStatus.OCCUPIED, 2: SlotStatus.EMPTY}
+    assert not session.dirty  # No per-row UPDATE on commit
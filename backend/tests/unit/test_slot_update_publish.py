@@ -0,0 +1,140 @@
+# Unit tests for slot status publishing: empty frames and change-only updates (fake DB, broadcast and store)
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.core.settings import settings
+from app.services import ai_listener
+from app.services.ai_listener import YOLODetector
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Serves slot rows for the broadcast query, counts queries and commits"""
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.queries = 0
+        self.commits = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        return FakeResult(self.slots)
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture
+def publisher(monkeypatch):
+    writes = []
+    broadcasts = []
+    stored = {}
+
+    async def fake_update(slot_status_map, db):
+        # Writes the statuses that differ from the stored ones, returns the rows it loaded
+        changed = {slot_id: status for slot_id, status in slot_status_map.items() if stored.get(slot_id) != status}
+        stored.update(changed)
+        writes.append(changed)
+        return changed, db.slots
+
+    async def fake_broadcast(camera_id, slots, **kwargs):
+        broadcasts.append({slot["id"]: slot["status"] for slot in slots})
+
+    monkeypatch.setattr(ai_listener, "update_and_load_slot_statuses", fake_update)
+    monkeypatch.setattr(ai_listener.manager, "send_slot_update", fake_broadcast)
+    monkeypatch.setattr(ai_listener.slot_state, "loaded", False)
+    monkeypatch.setattr(settings, "SLOT_UPDATE_CHANGE_ONLY", True)
+    monkeypatch.setattr(settings, "SLOT_UPDATE_HEARTBEAT", 10.0)
+
+    loop = asyncio.new_event_loop()
+    detector = YOLODetector(camera_id=1, stream_url="test.mp4", loop=loop)
+    db = FakeSession([SimpleNamespace(id=i, label=f"S{i}", polygon=[], status="empty") for i in (1, 2)])
+
+    def publish(statuses):
+        loop.run_until_complete(detector._publish_statuses(statuses, db, None, {}, 1, 0.0))
+
+    yield SimpleNamespace(detector=detector, db=db, publish=publish, writes=writes, broadcasts=broadcasts)
+    loop.close()
+
+
+def test_unchanged_frame_is_not_written_or_broadcast(publisher):
+    publisher.publish({1: "occupied", 2: "empty"})
+    queries, commits = publisher.db.queries, publisher.db.commits
+
+    publisher.publish({1: "occupied", 2: "empty"})
+
+    assert publisher.writes == [{1: "occupied", 2: "empty"}]
+    assert len(publisher.broadcasts) == 1
+    assert (publisher.db.queries, publisher.db.commits) == (queries, commits)
+    assert publisher.detector.suppressed_updates == 1
+
+
+def test_only_changed_slots_are_written(publisher):
+    publisher.publish({1: "occupied", 2: "empty"})
+    publisher.publish({1: "empty", 2: "empty"})
+
+    assert publisher.writes[-1] == {1: "empty"}
+    assert publisher.broadcasts[-1] == {1: "empty", 2: "empty"}
+    assert publisher.db.queries == 0  # Broadcast reuses the rows loaded by the update
+
+
+def test_heartbeat_without_change_loads_slots(publisher):
+    publisher.publish({1: "occupied", 2: "empty"})
+    publisher.detector._last_publish_time -= settings.SLOT_UPDATE_HEARTBEAT
+
+    publisher.publish({1: "occupied", 2: "empty"})
+    assert publisher.db.queries == 1
+
+
+def test_heartbeat_broadcasts_without_write(publisher):
+    publisher.publish({1: "occupied", 2: "empty"})
+    publisher.detector._last_publish_time -= settings.SLOT_UPDATE_HEARTBEAT  # Interval elapsed
+
+    publisher.publish({1: "occupied", 2: "empty"})
+
+    assert len(publisher.writes) == 1
+    assert len(publisher.broadcasts) == 2
+    assert publisher.detector.suppressed_updates == 0
+
+
+def test_change_only_off_writes_every_status(publisher, monkeypatch):
+    monkeypatch.setattr(settings, "SLOT_UPDATE_CHANGE_ONLY", False)
+
+    publisher.publish({1: "occupied", 2: "empty"})
+    publisher.publish({1: "occupied", 2: "empty"})
+
+    # Every frame goes through the DB update (which skips rows already stored)
+    assert publisher.writes == [{1: "occupied", 2: "empty"}, {}]
+    assert len(publisher.broadcasts) == 2
+    assert publisher.db.commits == 2
+
+
+def test_frame_without_vehicles_is_still_handled(publisher, monkeypatch):
+    handled = []
+
+    async def fake_handle(boxes, names, frame_id, timestamp, track_ids=None):
+        handled.append((frame_id, boxes.shape))
+
+    monkeypatch.setattr(publisher.detector, "_handle_detections", fake_handle)
+    monkeypatch.setattr(publisher.detector, "tracker", None)
+    people = np.array([[10, 10, 5, 20, 0.9, 0]], dtype=np.float32)
+
+    publisher.detector._process_detections(people, {0: "person", 2: "car"}, 1, 0.0)
+    publisher.detector._process_detections(np.zeros((0, 6), dtype=np.float32), {0: "person", 2: "car"}, 2, 0.0)
+    publisher.detector.loop.run_until_complete(asyncio.sleep(0.01))
+
+    # Both frames reach matching with no vehicle, so occupied slots can become empty
+    assert handled == [(1, (0, 6)), (2, (0, 6))]
@@ -0,0 +1,47 @@
+# Unit tests for the vehicle tracker
+import numpy as np
+
+from app.services.tracker import VehicleTracker, iou_matrix
+
+
+def _detections(*boxes):
+    return np.array([[*box, 0.9, 2] for box in boxes], dtype=np.float32).reshape(-1, 6)
+
+
+def test_iou_matrix():
+    ious = iou_matrix(np.array([[5, 5, 10, 10]]), np.array([[5, 5, 10, 10], [10, 5, 10, 10], [50, 50, 4, 4]]))
+    np.testing.assert_allclose(ious, [[1.0, 1 / 3, 0.0]])
+
+
+def test_ids_are_stable_for_moving_vehicle():
+    tracker = VehicleTracker()
+    _, first = tracker.update(_detections([100, 100, 40, 20], [300, 100, 40, 20]), timestamp=0.0)
+    tracked, ids = tracker.update(_detections([305, 100, 40, 20], [110, 100, 40, 20]), timestamp=1.0)
+
+    assert sorted(first.tolist()) == [1, 2]
+    assert ids.tolist() == [1, 2]
+    np.testing.assert_allclose(tracked[0, 0], 106, atol=1)  # Alpha-smoothed towards 110
+
+
+def test_parked_vehicle_survives_missed_detections():
+    tracker = VehicleTracker(stationary_time=2.0, max_missed=1, stationary_max_missed=3)
+    for t in range(4):
+        tracker.update(_detections([100, 100, 40, 20]), timestamp=float(t))
+
+    for t in range(4, 7):
+        tracked, ids = tracker.update(_detections(), timestamp=float(t))
+        assert ids.tolist() == [1]
+        np.testing.assert_allclose(tracked[0, :4], [100, 100, 40, 20], atol=1e-3)
+
+    tracked, ids = tracker.update(_detections(), timestamp=7.0)
+    assert len(ids) == 0
+
+
+def test_moving_vehicle_is_not_carried():
+    tracker = VehicleTracker(max_missed=1)
+    tracker.update(_detections([100, 100, 40, 20]), timestamp=0.0)
+    tracker.update(_detections([140, 100, 40, 20]), timestamp=1.0)
+
+    tracked, ids = tracker.update(_detections(), timestamp=2.0)
+    assert len(ids) == 0
+    assert tracker.get_stats()["active_tracks"] == 1  # Kept internally for re-association